@@ -1,8 +1,11 @@
 import logging
+
+import requests
+from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.device_registry import async_get as async_get_device_registry
-from .api.client import FusionSolarClient
-from functools import partial
 
+from .api.exceptions import TransientException
+from .client_pool import get_client_pool
 from .const import DOMAIN
 from .sensor import DeviceHandlerFactory
 
@@ -14,22 +17,14 @@ PLATFORMS: list[str] = ["sensor", "switch"]
 async def async_setup_entry(hass, entry):
     entry.async_on_unload(entry.add_update_listener(update_listener))
 
-    username = entry.options.get("username", entry.data["username"])
-    password = entry.options.get("password", entry.data["password"])
-    subdomain = entry.options.get("subdomain", entry.data.get("subdomain", "uni001eu5"))
-
-    client = await hass.async_add_executor_job(
-        partial(
-            FusionSolarClient,
-            username,
-            password,
-            captcha_model_path=hass,
-            huawei_subdomain=subdomain,
-        )
-    )
-
-    if DOMAIN not in hass.data:
-        hass.data[DOMAIN] = {}
+    # entries of the same FusionSolar account share a single logged-in client
+    pool = get_client_pool(hass)
+    try:
+        client = await pool.async_acquire(entry)
+    except (TransientException, requests.exceptions.RequestException) as err:
+        # FusionSolar is unreachable or failing for the moment, Home Assistant sets
+        # the entry up again later
+        raise ConfigEntryNotReady(f"FusionSolar is not available: {err}") from err
 
     hass.data[DOMAIN][entry.entry_id] = client
 
@@ -54,6 +49,8 @@ async def async_setup_entry(hass, entry):
         hass.data[DOMAIN][f"{entry.entry_id}_sensor_handler"] = sensor_handler
     except Exception as e:
         _LOGGER.error("Failed to create coordinator for device %s: %s", device_name, e)
+        hass.data[DOMAIN].pop(entry.entry_id, None)
+        await pool.async_release(entry)
         return False
 
     device_registry = async_get_device_registry(hass)
@@ -81,5 +78,6 @@ async def async_unload_entry(hass, entry):
         hass.data[DOMAIN].pop(f"{entry.entry_id}_coordinator", None)
         hass.data[DOMAIN].pop(f"{entry.entry_id}_sensor_handler", None)
         hass.data[DOMAIN].pop(entry.entry_id, None)
+        await get_client_pool(hass).async_release(entry)
 
     return unload_ok
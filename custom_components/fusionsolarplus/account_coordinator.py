@@ -0,0 +1,273 @@
+"""Account-level poll cycle shared by all config entries of a FusionSolar account.
+
+Design notes for contributors:
+- Every account of the client pool has one `AccountCoordinator`, which owns the poll
+  timer of all its devices. The coordinators of the config entries (child
+  coordinators) have no timer of their own. They are updated by the account
+  coordinator with the result for their device, so all devices of an account are
+  polled at the same moment and their entities show the same snapshot.
+- A poll cycle checks the session once for the whole account, then fetches every
+  device that is due with `BaseDeviceHandler.async_fetch`, at most
+  `MAX_PARALLEL_FETCHES` at a time. Each fetch sends the requests of its own device,
+  there is no merging of requests across devices here. The asyncio client sends
+  identical GET requests that are in flight at the same time only once, and serves
+  station and device lists from its response cache.
+- Rate limits are enforced here. A cycle is skipped while the previous one is still
+  running, and when FusionSolar answers with a rate limit, the remaining fetches of
+  the cycle are dropped and polling of the account pauses for `RATE_LIMIT_PAUSE`.
+- Every device has an adaptive poll interval. The account polls every
+  `UPDATE_INTERVAL`, but a device is only fetched in a cycle once its interval has
+  passed. The interval doubles every time a poll returns the same values as the
+  previous one (timestamps such as `latestTime` are not compared, they change on
+  every poll), up to the maximum configured in the options of the entry, and
+  drops back to the minimum (the realtime interval of the entry) as soon as the data
+  changes or a poll fails. Much of the cloud data only changes every few minutes,
+  so idle devices are polled rarely while devices with changing data keep the short
+  interval.
+- Child coordinators can still be refreshed on their own (first refresh during the
+  setup of the entry, refresh requests after switching a device).
+"""
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .api.async_client import AsyncFusionSolarClient
+from .api.exceptions import FusionSolarRateLimit
+
+_LOGGER = logging.getLogger(__name__)
+
+UPDATE_INTERVAL = timedelta(seconds=15)
+
+# device fetches of an account that run at the same time
+MAX_PARALLEL_FETCHES = 4
+
+# seconds polling of an account pauses after FusionSolar reported a rate limit
+RATE_LIMIT_PAUSE = 5 * 60
+
+# factor the poll interval of a device grows by while its data does not change
+INTERVAL_GROWTH = 2
+
+# poll cycles do not start exactly on time, a device that is due within this many
+# seconds is polled now instead of one cycle later
+INTERVAL_SLACK = 1.0
+
+# keys of the payloads that hold the time of a measurement or of the response
+# instead of a value
+TIMESTAMP_KEYS = frozenset({"latestTime"})
+
+
+def is_rate_limited(err: BaseException) -> bool:
+    """Return whether an error, or an error it was raised from, is a rate limit."""
+    while err is not None:
+        if isinstance(err, FusionSolarRateLimit):
+            return True
+        err = err.__cause__ or err.__context__
+    return False
+
+
+def payload_values(data: Any) -> Any:
+    """Return a payload without its timestamps, for comparing two polls."""
+    if isinstance(data, dict):
+        return {
+            key: payload_values(value)
+            for key, value in data.items()
+            if key not in TIMESTAMP_KEYS
+        }
+    if isinstance(data, list):
+        return [payload_values(value) for value in data]
+    return data
+
+
+class AdaptiveInterval:
+    """Poll interval of a device that grows while the device's data is static"""
+
+    def __init__(self, minimum: float, maximum: float):
+        self.minimum = max(minimum, UPDATE_INTERVAL.total_seconds())
+        self.maximum = max(maximum, self.minimum)
+        self.interval = self.minimum
+        self.next_poll = 0.0
+        self.polls = 0
+        self.changes = 0
+        self._last_data: Any = None
+
+    def is_due(self, now: float) -> bool:
+        return now + INTERVAL_SLACK >= self.next_poll
+
+    def polled(self, data: Any, now: float) -> None:
+        """Adapt the interval to a successful poll."""
+        data = payload_values(data)
+        if self.polls and data == self._last_data:
+            self.interval = min(self.interval * INTERVAL_GROWTH, self.maximum)
+        else:
+            self.changes += 1
+            self.interval = self.minimum
+        self.polls += 1
+        self._last_data = data
+        self.next_poll = now + self.interval
+
+    def reset(self, now: float = 0.0) -> None:
+        """Poll at the minimum interval again, starting with the next cycle."""
+        self.interval = self.minimum
+        self.next_poll = now
+
+
+class AccountCoordinator:
+    """Polls all devices of a FusionSolar account in one cycle."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        key: Tuple[str, str],
+        async_client: AsyncFusionSolarClient,
+    ):
+        self.hass = hass
+        self.key = key
+        self.async_client = async_client
+        # entry id -> (device handler, child coordinator)
+        self._children: Dict[str, Tuple[Any, DataUpdateCoordinator]] = {}
+        self._intervals: Dict[str, AdaptiveInterval] = {}
+        self._unsub_timer: Optional[CALLBACK_TYPE] = None
+        self._polling = False
+        self._paused_until = 0.0
+
+        self.cycles = 0
+        self.skipped_cycles = 0
+        self.last_cycle_duration: Optional[float] = None
+
+    def register(
+        self,
+        entry_id: str,
+        handler: Any,
+        coordinator: DataUpdateCoordinator,
+        min_interval: float,
+        max_interval: float,
+    ) -> None:
+        """Add the device of an entry to the poll cycle and start polling.
+
+        The device was just refreshed, its interval starts with that data.
+        """
+        self._children[entry_id] = (handler, coordinator)
+        interval = AdaptiveInterval(min_interval, max_interval)
+        interval.polled(coordinator.data, time.monotonic())
+        self._intervals[entry_id] = interval
+        if self._unsub_timer is None:
+            self._unsub_timer = async_track_time_interval(
+                self.hass,
+                self._async_poll,
+                UPDATE_INTERVAL,
+                name=f"FusionSolar poll {self.key[0]}@{self.key[1]}",
+                cancel_on_shutdown=True,
+            )
+
+    def unregister(self, entry_id: str) -> None:
+        """Remove the device of an entry from the poll cycle."""
+        self._children.pop(entry_id, None)
+        self._intervals.pop(entry_id, None)
+        if not self._children:
+            self.shutdown()
+
+    def poll_fast(self, coordinator: DataUpdateCoordinator) -> None:
+        """Poll the device of a child coordinator at the minimum interval again, e.g.
+        after it was switched."""
+        for entry_id, (_, child) in self._children.items():
+            if child is coordinator:
+                self._intervals[entry_id].reset()
+
+    def shutdown(self) -> None:
+        """Stop polling."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    def diagnostics(self, entry_id: Optional[str] = None) -> Dict[str, Any]:
+        diagnostics = {
+            "devices": len(self._children),
+            "cycles": self.cycles,
+            "skipped_cycles": self.skipped_cycles,
+            "last_cycle_duration": self.last_cycle_duration,
+            "paused_for": max(0.0, round(self._paused_until - time.monotonic(), 1)),
+        }
+        interval = self._intervals.get(entry_id)
+        if interval is not None:
+            diagnostics["device_interval"] = interval.interval
+            diagnostics["device_polls"] = interval.polls
+            diagnostics["device_changes"] = interval.changes
+        return diagnostics
+
+    async def _async_poll(self, now=None) -> None:
+        if self._polling or time.monotonic() < self._paused_until:
+            self.skipped_cycles += 1
+            _LOGGER.debug("Skipping poll cycle of account %s", self.key)
+            return
+
+        self._polling = True
+        start = time.monotonic()
+        try:
+            await self._async_run_cycle()
+        finally:
+            self._polling = False
+            self.cycles += 1
+            self.last_cycle_duration = round(time.monotonic() - start, 3)
+
+    async def _async_run_cycle(self) -> None:
+        now = time.monotonic()
+        due = [
+            (entry_id, handler, coordinator)
+            for entry_id, (handler, coordinator) in self._children.items()
+            if self._intervals[entry_id].is_due(now)
+        ]
+        if not due:
+            return
+
+        try:
+            # checks the session once instead of once per device
+            await self.async_client.ensure_session()
+        except Exception as err:
+            _LOGGER.debug("Session check of account %s failed: %s", self.key, err)
+
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_FETCHES)
+        rate_limited = asyncio.Event()
+
+        async def fetch(handler) -> Any:
+            async with semaphore:
+                if rate_limited.is_set():
+                    raise FusionSolarRateLimit("Request dropped after a rate limit")
+                try:
+                    return await handler.async_fetch()
+                except Exception as err:
+                    if is_rate_limited(err):
+                        rate_limited.set()
+                    raise
+
+        results = await asyncio.gather(
+            *(fetch(handler) for _, handler, _ in due), return_exceptions=True
+        )
+
+        if rate_limited.is_set():
+            _LOGGER.warning(
+                "FusionSolar rate limited account %s, pausing polling for %d seconds",
+                self.key,
+                RATE_LIMIT_PAUSE,
+            )
+            self._paused_until = time.monotonic() + RATE_LIMIT_PAUSE
+
+        now = time.monotonic()
+        for (entry_id, _, coordinator), result in zip(due, results):
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            interval = self._intervals.get(entry_id)
+            if isinstance(result, Exception):
+                if interval is not None:
+                    interval.reset(now)
+                coordinator.async_set_update_error(result)
+            else:
+                if interval is not None:
+                    interval.polled(result, now)
+                coordinator.async_set_updated_data(result)
@@ -0,0 +1,551 @@
+"""Asyncio FusionSolar client used by the Home Assistant coordinators.
+
+Architecture overview for contributors:
+- Authentication stays with the synchronous `FusionSolarClient`. Logging in involves
+  RSA encryption, the multi-region redirect and possibly a captcha, and happens
+  rarely, so it keeps running in an executor thread.
+- All data requests are sent with aiohttp, so coordinators await them on the event
+  loop instead of blocking an executor thread for the duration of a cloud round trip.
+- Both clients share one cookie jar: the jar of the synchronous requests session.
+  Cookies set by aiohttp responses are written back to it.
+- A recording or replaying transport of the synchronous client (`recording.py`) is
+  applied to the requests of this client as well, and so is its base URL override.
+- Device-specific requests live next to their synchronous counterparts as `async_*`
+  functions in the `devices/*_api.py` modules and share their normalization code.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+import logging
+import time
+from functools import partial, wraps
+from typing import Any
+from urllib.parse import urlencode
+
+import aiohttp
+import requests
+from yarl import URL
+
+from .client import (
+    REQUEST_RETRIES,
+    REQUEST_RETRY_DELAY,
+    FusionSolarClient,
+    check_status,
+    invalid_json_error,
+    is_retryable,
+    payload_schema_error,
+)
+from . import json_decoder
+from .metrics import ClientMetrics, request_source
+from .recording import TrafficRecorder, TrafficReplayer
+from .response_cache import ResponseCache
+from .datasets import DatasetCache
+from .exceptions import (
+    FusionSolarException,
+    NetworkException,
+    SessionExpiredException,
+    TransientException,
+)
+from .devices import (
+    inverter_api,
+    battery_api,
+    backupbox_api,
+    powersensor_api,
+    charger_api,
+    plant_api,
+    emma_api,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# headers of the synchronous session that have to be sent along with every request
+FORWARDED_HEADERS = ("User-Agent", "roarand")
+
+
+def async_logged_in(func):
+    """
+    Async counterpart of the `logged_in` decorator of the synchronous client.
+    """
+
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        generation = self.session_generation
+
+        if not self._client._is_session_assumed_valid() and (
+            not await self.is_session_active()
+        ):
+            _LOGGER.debug("No active session. Resetting session and logging in...")
+            await self._async_reset_session(generation)
+            generation = self.session_generation
+
+        try:
+            return await func(self, *args, **kwargs)
+        except SessionExpiredException:
+            _LOGGER.debug(
+                "Session expired during %s. Logging in again...", func.__name__
+            )
+            await self._async_reset_session(generation)
+        except (KeyError, IndexError, TypeError) as e:
+            raise payload_schema_error(func, e) from e
+
+        try:
+            return await func(self, *args, **kwargs)
+        except SessionExpiredException:
+            _LOGGER.error("Login apparently failed. Received invalid response.")
+            raise FusionSolarException("Failed to reset session and login again.")
+        except (KeyError, IndexError, TypeError) as e:
+            raise payload_schema_error(func, e) from e
+
+    return wrapper
+
+
+def _build_query(params: Any) -> list[tuple[str, str]]:
+    """Converts requests-style params into a list of pairs aiohttp accepts.
+
+    requests drops None values and expands list values into repeated keys.
+    """
+    if not params:
+        return []
+
+    items = params.items() if isinstance(params, dict) else params
+    query = []
+    for key, value in items:
+        values = value if isinstance(value, (list, tuple)) else [value]
+        for item in values:
+            if item is not None:
+                query.append((key, str(item)))
+    return query
+
+
+def _request_body(kwargs: dict) -> Any:
+    """Returns the body of a request as the recorder expects it"""
+    if kwargs.get("json") is not None:
+        return json.dumps(kwargs["json"])
+    return kwargs.get("data")
+
+
+class AsyncFusionSolarClient:
+    """Asyncio client for the Fusion Solar API that shares the session of a
+    synchronous FusionSolarClient"""
+
+    _LOGGER = _LOGGER
+
+    def __init__(
+        self, client: FusionSolarClient, session: aiohttp.ClientSession
+    ) -> None:
+        """Initializes a new AsyncFusionSolarClient instance.
+        :param client: The logged-in synchronous client. It performs all logins.
+        :type client: FusionSolarClient
+        :param session: The aiohttp session used to send the requests. Cookies are taken
+                        from the synchronous client, so the session should not keep a
+                        cookie jar of its own (aiohttp.DummyCookieJar).
+        :type session: aiohttp.ClientSession
+        """
+        self._client = client
+        self._http = session
+
+        # only one login per account is handed to the executor at a time, requests
+        # that notice the expired session meanwhile wait for its result
+        self._login_lock = asyncio.Lock()
+
+        # identical GET requests that are in flight at the same time share one request
+        self._in_flight: dict[tuple, list] = {}
+        # number of requests that were answered by a request already in flight
+        self.coalesced_requests = 0
+
+    @property
+    def _huawei_subdomain(self) -> str:
+        return self._client._huawei_subdomain
+
+    @property
+    def _company_id(self) -> str:
+        return self._client._company_id
+
+    @property
+    def response_cache(self) -> ResponseCache:
+        return self._client.response_cache
+
+    @property
+    def metrics(self) -> ClientMetrics:
+        return self._client.metrics
+
+    @property
+    def _battery_modules(self) -> dict:
+        return self._client._battery_modules
+
+    @property
+    def dataset_cache(self) -> DatasetCache:
+        return self._client.dataset_cache
+
+    @property
+    def _pv_strings(self) -> dict:
+        return self._client._pv_strings
+
+    @property
+    def session_generation(self) -> int:
+        return self._client.session_generation
+
+    async def close(self) -> None:
+        """Closes the underlying aiohttp session"""
+        await self._http.close()
+
+    async def _async_reset_session(self, generation: int | None = None) -> None:
+        async with self._login_lock:
+            await asyncio.get_running_loop().run_in_executor(
+                None, partial(self._client.reset_session, generation)
+            )
+
+    def _cookie_header(self, url: str) -> str | None:
+        prepared = requests.Request("GET", url).prepare()
+        return requests.cookies.get_cookie_header(
+            self._client._session.cookies, prepared
+        )
+
+    def _store_cookies(self, response: aiohttp.ClientResponse) -> None:
+        jar = self._client._session.cookies
+        for name, morsel in response.cookies.items():
+            jar.set(
+                name,
+                morsel.value,
+                domain=morsel["domain"] or response.url.host,
+                path=morsel["path"] or "/",
+            )
+
+    async def _request(
+        self, method: str, url: str, params: Any = None, **kwargs
+    ) -> bytes:
+        """Sends a request within the session of the synchronous client.
+
+        Raises a SessionExpiredException if the response shows that the session is no
+        longer valid (the request was redirected to or answered with the login page).
+        Connection errors, timeouts, rate limits, server errors and rejected requests
+        raise the exception of their class, see `exceptions.py`. Only the failed
+        request is repeated after a transient error, the session is left alone.
+        """
+        url = self._client.rewrite_url(url)
+        headers = {
+            key: self._client._session.headers[key]
+            for key in FORWARDED_HEADERS
+            if key in self._client._session.headers
+        }
+        headers.update(kwargs.pop("headers", {}))
+        cookie_header = self._cookie_header(url)
+        if cookie_header:
+            headers["Cookie"] = cookie_header
+
+        retries = REQUEST_RETRIES if is_retryable(method, url) else 0
+        for attempt in range(retries + 1):
+            try:
+                return await self._request_once(method, url, params, headers, **kwargs)
+            except TransientException as err:
+                if attempt == retries:
+                    raise
+                _LOGGER.debug("Request to %s failed, retrying: %s", url, err)
+                source = request_source.get()
+                if source is not None:
+                    self.metrics.record_retry(source)
+                await asyncio.sleep(REQUEST_RETRY_DELAY * (attempt + 1))
+
+    async def _request_once(
+        self, method: str, url: str, params: Any, headers: dict, **kwargs
+    ) -> bytes:
+        start = time.perf_counter()
+        try:
+            if isinstance(self._client.transport, TrafficReplayer):
+                content = await self._replay(method, url, params, **kwargs)
+            else:
+                content = await self._send(method, url, params, headers, **kwargs)
+        except (
+            aiohttp.ClientConnectionError,
+            aiohttp.ClientPayloadError,
+            asyncio.TimeoutError,
+        ) as e:
+            self.metrics.record_request(url, time.perf_counter() - start, error=True)
+            raise NetworkException(f"{type(e).__name__} requesting {url}") from e
+        except Exception:
+            self.metrics.record_request(url, time.perf_counter() - start, error=True)
+            raise
+
+        self.metrics.record_request(url, time.perf_counter() - start, len(content))
+        return content
+
+    async def _send(
+        self, method: str, url: str, params: Any, headers: dict, **kwargs
+    ) -> bytes:
+        start = time.perf_counter()
+        async with self._http.request(
+            method,
+            URL(url),
+            params=_build_query(params),
+            headers=headers,
+            **kwargs,
+        ) as r:
+            self._store_cookies(r)
+            content = await r.read()
+
+            recorder = self._client.transport
+            if isinstance(recorder, TrafficRecorder):
+                # scrubbing, compressing and writing the exchange blocks, so it is
+                # done in the executor instead of the event loop
+                try:
+                    await asyncio.get_running_loop().run_in_executor(
+                        None,
+                        partial(
+                            recorder.record,
+                            method,
+                            str(r.request_info.url),
+                            _request_body(kwargs),
+                            r.status,
+                            r.headers.copy(),
+                            content,
+                            time.perf_counter() - start,
+                        ),
+                    )
+                except Exception as e:
+                    _LOGGER.warning("Failed to record %s: %s", url, e)
+
+            if r.status == 401 or r.history:
+                raise SessionExpiredException(f"Session expired requesting {url}")
+
+            check_status(r.status, url)
+
+            if "text/html" in r.headers.get("Content-Type", ""):
+                raise SessionExpiredException(f"Received login page requesting {url}")
+
+            return content
+
+    async def _replay(self, method: str, url: str, params: Any, **kwargs) -> bytes:
+        """Answers a request from the recordings of the client's TrafficReplayer."""
+        replayer = self._client.transport
+        query = _build_query(params)
+        if query:
+            url = f"{url}{'&' if '?' in url else '?'}{urlencode(query)}"
+
+        exchange = replayer.find(method, url, _request_body(kwargs))
+        latency = replayer.latency(exchange)
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+        if exchange.status == 401 or 300 <= exchange.status < 400:
+            raise SessionExpiredException(f"Session expired requesting {url}")
+        check_status(exchange.status, url)
+        if "text/html" in exchange.headers.get("content-type", ""):
+            raise SessionExpiredException(f"Received login page requesting {url}")
+        return exchange.content
+
+    async def _request_json(
+        self,
+        method: str,
+        url: str,
+        normalize_floats: bool = False,
+        session_probe: bool = False,
+        **kwargs,
+    ) -> Any:
+        """Sends a request and returns the decoded JSON response.
+
+        A decoded response shows that the session is valid, unless the request is a
+        `session_probe`, whose answer tells whether the session is alive. The caller
+        of a probe marks the session as valid itself.
+
+        GET requests for the same URL and parameters (ignoring the `_` cache buster)
+        that are sent while an identical request is in flight wait for that request
+        instead. If a response is shared, every caller receives its own copy of it,
+        as callers are free to modify the decoded response.
+        """
+        cacheable = not normalize_floats and not set(kwargs) - {"params", "json"}
+        if cacheable:
+            hit, data = self.response_cache.get(
+                method, url, kwargs.get("params"), kwargs.get("json")
+            )
+            if hit:
+                return data
+
+        if method != "GET" or session_probe or set(kwargs) - {"params"}:
+            data = await self._fetch_json(
+                method, url, normalize_floats, session_probe, **kwargs
+            )
+        else:
+            data = await self._fetch_coalesced_json(url, normalize_floats, **kwargs)
+
+        if cacheable:
+            self.response_cache.put(
+                method, url, data, kwargs.get("params"), kwargs.get("json")
+            )
+        return data
+
+    async def _fetch_coalesced_json(
+        self, url: str, normalize_floats: bool = False, **kwargs
+    ) -> Any:
+        key = (
+            url,
+            tuple(
+                item for item in _build_query(kwargs.get("params")) if item[0] != "_"
+            ),
+            normalize_floats,
+        )
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced_requests += 1
+            in_flight[1] = True
+            return copy.deepcopy(await asyncio.shield(in_flight[0]))
+
+        in_flight = [None, False]
+        self._in_flight[key] = in_flight
+        in_flight[0] = asyncio.ensure_future(
+            self._fetch_shared_json(key, "GET", url, normalize_floats, **kwargs)
+        )
+        data = await asyncio.shield(in_flight[0])
+        return copy.deepcopy(data) if in_flight[1] else data
+
+    async def _fetch_shared_json(self, key: tuple, *args, **kwargs) -> Any:
+        try:
+            return await self._fetch_json(*args, **kwargs)
+        finally:
+            # nobody may join once the result is handed out
+            del self._in_flight[key]
+
+    async def _fetch_json(
+        self,
+        method: str,
+        url: str,
+        normalize_floats: bool = False,
+        session_probe: bool = False,
+        **kwargs,
+    ) -> Any:
+        content = await self._request(method, url, **kwargs)
+
+        try:
+            data = json_decoder.loads(content, normalize_floats)
+        except json.JSONDecodeError as e:
+            raise invalid_json_error(url, content) from e
+
+        if not session_probe:
+            self._client._mark_session_valid()
+        return data
+
+    async def _get_json(self, url: str, **kwargs) -> Any:
+        """Sends a GET request and returns the decoded JSON response."""
+        return await self._request_json("GET", url, **kwargs)
+
+    async def _post_json(self, url: str, **kwargs) -> Any:
+        """Sends a POST request and returns the decoded JSON response."""
+        return await self._request_json("POST", url, **kwargs)
+
+    async def is_session_active(self) -> bool:
+        """Tests whether the current session is active.
+
+        :return: Indicates whether the current session is active.
+        :rtype: bool
+        """
+        try:
+            response_data = await self._get_json(
+                f"https://{self._huawei_subdomain}.fusionsolar.huawei.com/rest/dpcloud/auth/v1/is-session-alive",
+                session_probe=True,
+            )
+        except SessionExpiredException:
+            return False
+
+        if response_data.get("code") != 0:
+            return False
+        self._client._mark_session_valid()
+        return True
+
+    @async_logged_in
+    async def keep_alive(self):
+        """Async variant of `FusionSolarClient.keep_alive`.
+
+        :return: This function returns the payload returned by the respective call
+        :rtype: str
+        """
+        response_data = await self._get_json(
+            f"https://{self._huawei_subdomain}.fusionsolar.huawei.com/rest/dpcloud/auth/v1/keep-alive",
+            session_probe=True,
+        )
+
+        if "code" not in response_data or response_data["code"] != 0:
+            raise FusionSolarException("Failed to set keep alive.")
+        self._client._mark_session_valid()
+
+        if "payload" in response_data:
+            # save the payload as a session header
+            self._client._session.headers["roarand"] = response_data["payload"]
+            return response_data["payload"]
+
+        return None
+
+    @async_logged_in
+    async def ensure_session(self) -> None:
+        """Logs in again if the session is no longer active. The requests that follow
+        do not check the session again while it is assumed to be valid."""
+
+    @async_logged_in
+    async def get_current_plant_data(
+        self, plant_id: str, intervals: dict[str, float] | None = None
+    ) -> dict:
+        return await plant_api.async_get_current_plant_data(self, plant_id, intervals)
+
+    @async_logged_in
+    async def get_plant_flow(self, plant_id: str) -> dict:
+        return await plant_api.async_get_plant_flow(self, plant_id)
+
+    @async_logged_in
+    async def get_real_time_data(self, device_dn: str = None) -> dict:
+        return await inverter_api.async_get_real_time_data(self, device_dn)
+
+    @async_logged_in
+    async def get_inverter_data(
+        self, device_dn: str, intervals: dict[str, float] | None = None
+    ) -> dict:
+        return await inverter_api.async_get_inverter_data(self, device_dn, intervals)
+
+    @async_logged_in
+    async def get_pv_info(self, device_dn: str = None) -> dict:
+        return await inverter_api.async_get_pv_info(self, device_dn)
+
+    @async_logged_in
+    async def get_optimizer_stats(self, inverter_id: str):
+        return await inverter_api.async_get_optimizer_stats(self, inverter_id)
+
+    @async_logged_in
+    async def get_charger_data(
+        self,
+        device_dn: str = None,
+        dn_ids: list = None,
+        intervals: dict[str, float] | None = None,
+    ) -> dict:
+        return await charger_api.async_get_charger_data(
+            self, device_dn, dn_ids, intervals
+        )
+
+    @async_logged_in
+    async def get_battery_status(self, battery_id: str) -> dict:
+        return await battery_api.async_get_battery_status(self, battery_id)
+
+    @async_logged_in
+    async def get_battery_module_stats(
+        self, battery_id: str, module_id: str = "1", signal_ids: list = None
+    ) -> dict:
+        return await battery_api.async_get_battery_module_stats(
+            self, battery_id, module_id, signal_ids
+        )
+
+    @async_logged_in
+    async def get_battery_data(
+        self, battery_id: str, intervals: dict[str, float] | None = None
+    ) -> dict:
+        return await battery_api.async_get_battery_data(self, battery_id, intervals)
+
+    @async_logged_in
+    async def get_powersensor_data(self, device_dn: str = None) -> dict:
+        return await powersensor_api.async_get_powersensor_data(self, device_dn)
+
+    @async_logged_in
+    async def get_emma_data(self, device_dn: str = None) -> dict:
+        return await emma_api.async_get_emma_data(self, device_dn)
+
+    @async_logged_in
+    async def get_backupbox_data(self, device_dn: str = None) -> dict:
+        return await backupbox_api.async_get_backupbox_data(self, device_dn)
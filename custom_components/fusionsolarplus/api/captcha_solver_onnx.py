@@ -1,18 +1,169 @@
+"""Solvers for the captcha of the FusionSolar login.
+
+Captchas are solved locally by `OnnxSolver` if the user configured a CRNN model in the
+ONNX format, and by public Gradio spaces otherwise. Local solving needs the optional
+packages numpy and onnxruntime, which are not requirements of the integration:
+
+    pip install numpy onnxruntime
+
+If the model can not be loaded, or a local solve fails, the captcha is sent to the
+Gradio spaces instead.
+"""
+
+import os
+import threading
 import time
 import logging
+from io import BytesIO
 
 from .exceptions import FusionSolarException, FusionSolarRateLimit
 
 _LOGGER = logging.getLogger(__name__)
 
+# characters the model was trained on, in the order of its output classes. The CTC
+# blank is the class after the last character.
+CAPTCHA_CHARSET = "23456789ABCDEFGHJKLMNPQRSTUVWXYZ"
+
+# size of the images the model expects
+IMAGE_WIDTH = 200
+IMAGE_HEIGHT = 50
+
+# loaded models are kept for the lifetime of Home Assistant, so that a captcha during
+# a later login is solved without loading the model again
+_MODELS = {}
+_MODELS_LOCK = threading.Lock()
+
+
+class OnnxSolver(object):
+    """Solves captchas locally with a CRNN model run by ONNX Runtime"""
+
+    def __init__(
+        self,
+        model_path: str,
+        device: list = None,
+        charset: str = CAPTCHA_CHARSET,
+    ):
+        """
+        :param model_path: Path to the ONNX model
+        :type model_path: str
+        :param device: Execution providers of ONNX Runtime, the CPU by default
+        :type device: list
+        :param charset: The characters of the output classes of the model
+        :type charset: str
+        """
+        # numpy and onnxruntime are optional, they are only needed for local solving
+        import numpy as np
+        import onnxruntime as ort
+
+        self._np = np
+        self.charset = charset
+        providers = tuple(device or ["CPUExecutionProvider"])
+
+        with _MODELS_LOCK:
+            key = (os.path.abspath(model_path), providers)
+            self.session = _MODELS.get(key)
+            if self.session is None:
+                start = time.perf_counter()
+                self.session = ort.InferenceSession(
+                    model_path, providers=list(providers)
+                )
+                # the first inference initializes the execution provider, do it now
+                # instead of during a login
+                self._run(np.zeros(self._input_shape(), dtype=np.float32))
+                _MODELS[key] = self.session
+                _LOGGER.debug(
+                    "Loaded captcha model %s in %.0f ms",
+                    model_path,
+                    (time.perf_counter() - start) * 1000,
+                )
+
+    def _input_shape(self) -> tuple:
+        """Returns the input shape of the model with the batch size set to 1.
+
+        Models exported from Keras take the image transposed (1, width, height, 1),
+        models exported from PyTorch take it as (1, 1, height, width).
+        """
+        shape = self.session.get_inputs()[0].shape
+        if len(shape) == 4 and shape[1] == IMAGE_WIDTH:
+            return (1, IMAGE_WIDTH, IMAGE_HEIGHT, 1)
+        return (1, 1, IMAGE_HEIGHT, IMAGE_WIDTH)
+
+    def preprocess(self, img_bytes: bytes):
+        """Converts the verifycode image into the input tensor of the model."""
+        from PIL import Image
+
+        np = self._np
+        with Image.open(BytesIO(img_bytes)) as image:
+            image = image.convert("L").resize(
+                (IMAGE_WIDTH, IMAGE_HEIGHT), Image.BILINEAR
+            )
+            pixels = np.asarray(image, dtype=np.float32) / 255.0
+
+        shape = self._input_shape()
+        if shape[1] == IMAGE_WIDTH:
+            pixels = pixels.T
+        return pixels.reshape(shape)
+
+    def _run(self, tensor):
+        return self.session.run(None, {self.session.get_inputs()[0].name: tensor})[0]
+
+    def decode(self, output) -> str:
+        """Greedy CTC decoding of the output of the model (1, time steps, classes)."""
+        best = output[0].argmax(axis=-1)
+        blank = len(self.charset)
+
+        text = []
+        previous = None
+        for index in best:
+            if index != previous and index != blank:
+                text.append(self.charset[index])
+            previous = index
+        return "".join(text)
+
+    def solve_captcha(self, img_bytes: bytes) -> str:
+        return self.decode(self._run(self.preprocess(img_bytes)))
+
 
 class Solver(object):
-    def __init__(self, hass):
-        self.hass = hass
+    """Solves login captchas, locally if a model is configured and remotely otherwise"""
+
+    def __init__(self, model_path=None, device: list = None):
+        """
+        :param model_path: Path to the ONNX model. Without a path (older callers pass
+                           the Home Assistant instance instead) captchas are solved
+                           remotely.
+        :type model_path: str
+        :param device: Execution providers of ONNX Runtime
+        :type device: list
+        """
+        self.model_path = model_path if isinstance(model_path, str) else None
+        self.device = device
         self.last_rate_limit = 0
+        self._local_solver = None
+        self._local_unavailable = False
 
     RATE_LIMIT_COOLDOWN = 2 * 60 * 60  # 2-hour cooldown
 
+    def _get_local_solver(self):
+        if self.model_path is None:
+            return None
+        if self._local_solver is None and not self._local_unavailable:
+            if not os.path.isfile(self.model_path):
+                _LOGGER.warning("No captcha model at %s", self.model_path)
+                self._local_unavailable = True
+                return None
+            try:
+                self._local_solver = OnnxSolver(self.model_path, self.device)
+            except ImportError as e:
+                _LOGGER.warning(
+                    "Local captcha solving requires numpy and onnxruntime: %s", e
+                )
+                self._local_unavailable = True
+            except Exception as e:
+                _LOGGER.warning("Failed to load captcha model: %s", e)
+                self._local_unavailable = True
+        return self._local_solver
+
     def solve_captcha_rest(self, img_bytes: bytes) -> str:
         """Send captcha image bytes to Nischay103/captcha_recognition via gradio_client."""
         try:
@@ -23,7 +174,6 @@ class Solver(object):
             )
 
         import tempfile
-        import os
 
         # Write bytes to a temp file since handle_file expects a path or URL
         with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
@@ -63,6 +213,19 @@ class Solver(object):
             os.remove(tmp_path)
 
     def solve_captcha(self, img_bytes: bytes) -> str:
+        local_solver = self._get_local_solver()
+        if local_solver is not None:
+            # a wrong answer only fails this login, it never disables captcha solving
+            try:
+                result = local_solver.solve_captcha(img_bytes)
+            except Exception as e:
+                _LOGGER.warning("Local captcha solving failed: %s", e)
+            else:
+                if result:
+                    _LOGGER.debug("Captcha solved locally: %s", result)
+                    return result
+                _LOGGER.warning("Local captcha model returned no characters")
+
         if time.time() - self.last_rate_limit < self.RATE_LIMIT_COOLDOWN:
             raise FusionSolarRateLimit(
                 "Captcha solving temporarily disabled due to rate limiting. Try again later."
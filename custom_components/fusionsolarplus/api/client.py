@@ -8,11 +8,11 @@ Architecture overview for contributors:
 """
 
 import logging
+import threading
 import time
 from datetime import datetime
-from decimal import Decimal
 from functools import wraps
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlsplit
 import json
 from typing import Any, Optional
 import re
@@ -21,8 +21,21 @@ import requests
 from .exceptions import (
     AuthenticationException,
     CaptchaRequiredException,
+    ClientErrorException,
     FusionSolarException,
+    FusionSolarRateLimit,
+    LoginCooldownException,
+    NetworkException,
+    PayloadSchemaException,
+    ServerErrorException,
+    SessionExpiredException,
+    TransientException,
 )
+from . import json_decoder
+from .history_data import HistoryData
+from .metrics import ClientMetrics, request_source
+from .response_cache import ResponseCache
+from .datasets import DatasetCache
 from .encryption import encrypt_password, get_secure_random
 from .devices import (
     inverter_api,
@@ -37,21 +50,36 @@ from .devices import (
 # global logger object
 _LOGGER = logging.getLogger(__name__)
 
-DEC_PRECISION = Decimal("1.00000000")
-MAX_JS_NUMBER = Decimal("1.7976931348623157E308")
-
+# time in seconds for which a session is assumed to be valid after the last
+# successful response, before is-session-alive is queried again
+DEFAULT_SESSION_TTL = 300
+
+# after a failed login no new login is attempted for this many seconds. The cooldown
+# doubles with every further failure, up to LOGIN_COOLDOWN_MAX. Repeated logins are
+# what makes FusionSolar ask for a captcha.
+LOGIN_COOLDOWN = 60
+LOGIN_COOLDOWN_MAX = 30 * 60
+
+# a request that failed with a transient error (see `exceptions.py`) is sent again up
+# to this many times, after REQUEST_RETRY_DELAY seconds times the attempt. Only
+# requests that do not change anything are repeated, see `is_retryable`.
+REQUEST_RETRIES = 2
+REQUEST_RETRY_DELAY = 1
+
+# POST endpoints that only query data, they are repeated like GET requests
+READ_ONLY_POSTS = frozenset(
+    {
+        "/rest/pvms/web/station/v1/station/station-list",
+        "/rest/dp/pvms/organization/v1/tree",
+        "/rest/neteco/web/homemgr/v1/device/get-realtime-info",
+        "/rest/pvms/fm/v1/query",
+    }
+)
 
-def _parse_float(value: str) -> float:
-    try:
-        _d = Decimal(value)
-        if _d == MAX_JS_NUMBER:
-            _LOGGER.warning("parsing MAX JS NUMBER returning 0.0: '%s'", value)
-            return 0.0
+# host of every FusionSolar server, whatever the region
+FUSIONSOLAR_DOMAIN = "fusionsolar.huawei.com"
 
-        return float(_d.quantize(DEC_PRECISION))
-    except Exception:
-        _LOGGER.error("cannot parse float from json: '%s'", value, exc_info=True)
-        return 0.0
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
 
 
 class PowerStatus:
@@ -174,27 +202,90 @@ class BatteryStatus:
         )
 
 
+class _BaseUrlSession(requests.Session):
+    """requests session that sends the requests for the FusionSolar servers to
+    another base URL"""
+
+    def __init__(self, rewrite_url):
+        super().__init__()
+        self._rewrite_url = rewrite_url
+
+    def request(self, method, url, *args, **kwargs):
+        return super().request(method, self._rewrite_url(url), *args, **kwargs)
+
+
+def is_retryable(method: str, url: str) -> bool:
+    """Whether a request can be sent again after a transient error."""
+    return method == "GET" or (
+        method == "POST" and urlsplit(url).path in READ_ONLY_POSTS
+    )
+
+
+def check_status(status: int, url: str) -> None:
+    """Raises the classified exception for an error status. An expired session (401)
+    is detected by the callers before."""
+    if status == 429:
+        raise FusionSolarRateLimit(f"Rate limited requesting {url}")
+    if status >= 500:
+        raise ServerErrorException(f"Status {status} requesting {url}", status)
+    if status >= 400:
+        raise ClientErrorException(f"Status {status} requesting {url}", status)
+
+
+def invalid_json_error(url: str, content: bytes) -> FusionSolarException:
+    """Classifies a response that is not valid JSON. A HTML document is the login
+    page the session expired to, anything else is a broken payload."""
+    if content.lstrip()[:1] == b"<":
+        return SessionExpiredException(f"Received HTML instead of JSON from {url}")
+    return PayloadSchemaException(f"Received invalid JSON requesting {url}")
+
+
+def payload_schema_error(func, err: Exception) -> PayloadSchemaException:
+    """Wraps an error an API function raised while reading a response."""
+    return PayloadSchemaException(
+        f"Unexpected response structure in {func.__name__}: {err!r}"
+    )
+
+
 def logged_in(func):
     """
     Decorator to make sure user is logged in.
+
+    The session is assumed to be valid for `session_ttl` seconds after the last
+    successful response. Only after that period the is-session-alive endpoint is
+    queried before the call. An expired session is otherwise detected from the
+    response of the call itself, in which case the client logs in again and the
+    call is replayed once.
     """
 
     @wraps(func)
     def wrapper(self, *args, **kwargs):
-        # use the is-session-alive feature to check whether the session is active
-        if not self.is_session_active():
+        generation = self._session_generation
+
+        # use the is-session-alive feature if no request succeeded recently
+        if not self._is_session_assumed_valid() and not self.is_session_active():
             _LOGGER.debug("No active session. Resetting session and logging in...")
+            self.reset_session(generation)
+            generation = self._session_generation
 
-            # reset the session
-            self._session = requests.Session()
-            self._configure_session()
+        try:
+            return func(self, *args, **kwargs)
+        except SessionExpiredException:
+            _LOGGER.debug(
+                "Session expired during %s. Logging in again...", func.__name__
+            )
+            self.reset_session(generation)
+        except (KeyError, IndexError, TypeError) as e:
+            raise payload_schema_error(func, e) from e
 
         try:
             result = func(self, *args, **kwargs)
-        except json.JSONDecodeError:
+        except SessionExpiredException:
             # this may indicate that the login failed
             _LOGGER.error("Login apparently failed. Received invalid response.")
             raise FusionSolarException("Failed to reset session and login again.")
+        except (KeyError, IndexError, TypeError) as e:
+            raise payload_schema_error(func, e) from e
 
         return result
 
@@ -236,7 +327,6 @@ class FusionSolarClient:
     """The main client to interact with the Fusion Solar API"""
 
     _LOGGER = _LOGGER
-    _parse_float = staticmethod(_parse_float)
 
     def __init__(
         self,
@@ -246,6 +336,10 @@ class FusionSolarClient:
         session: Optional[requests.Session] = None,
         captcha_model_path: Optional[str] = None,
         captcha_device: Optional[Any] = ["CPUExecutionProvider"],
+        session_ttl: float = DEFAULT_SESSION_TTL,
+        session_state: Optional[dict] = None,
+        transport: Optional[Any] = None,
+        base_url: Optional[str] = None,
     ) -> None:
         """Initializes a new FusionSolarClient instance. This is the main
            class to interact with the FusionSolar API.
@@ -264,14 +358,32 @@ class FusionSolarClient:
         :param captcha_device : The device to run the captcha solver on, as list of execution providers. Only required if you want to use the auto captcha solver.
         Please refer to the onnxruntime documentation for more information. https://onnxruntime.ai/docs/execution-providers/
         :type captcha_device: list
+        :param session_ttl: Seconds for which the session is assumed to be valid after the last successful response.
+        :type session_ttl: float
+        :param session_state: The state of an earlier session as returned by `export_session`. If the session is
+                              still alive it is used instead of logging in again.
+        :type session_state: dict
+        :param transport: A `recording.TrafficRecorder` to record all requests, or a
+                          `recording.TrafficReplayer` to answer them from recordings.
+        :type transport: TrafficRecorder | TrafficReplayer
+        :param base_url: Send all requests to this URL instead of the FusionSolar servers, e.g.
+                         `http://127.0.0.1:8080` for the stub server in `scripts/stub_server.py`.
+                         Only applies to the sessions created by the client.
+        :type base_url: str
         """
         self._user = username
         self._password = password
         self._captcha_verify_code = None
+        self.transport = transport
+        self.base_url = base_url.rstrip("/") if base_url else None
+        # the session `renew_session` logs in with, only seen by the renewing thread
+        self._renewal = threading.local()
         if session is None:
-            self._session = requests.Session()
+            self._session = self._new_session()
         else:
             self._session = session
+            if transport is not None:
+                transport.mount(session)
 
         suffix = ".fusionsolar.huawei.com"
 
@@ -294,9 +406,37 @@ class FusionSolarClient:
         self.captcha_device = captcha_device
         self._captcha_solver = None
 
+        # the client may be shared between several config entries that poll from
+        # different executor threads, so re-logins have to be serialized
+        self._login_lock = threading.RLock()
+        self._session_generation = 0
+
+        self._session_ttl = session_ttl
+        self._session_valid_until = 0.0
+        # wall clock time of the login that started the current session
+        self._session_started_at = time.time()
+
+        self._login_failures = 0
+        self._login_blocked_until = 0.0
+        self._last_login_error = None
+
+        # battery id -> (ids of the modules that are installed, time of the next check)
+        self._battery_modules = {}
+        # inverter dn -> the signals of its realtime data
+        self._pv_strings = {}
+        # last responses of the datasets that are not requested on every poll
+        self.dataset_cache = DatasetCache()
+
+        # responses of rarely changing endpoints, shared with the asyncio client
+        self.response_cache = ResponseCache()
+        # requests and logins of both clients
+        self.metrics = ClientMetrics()
+
         # Only login if no session has been provided. The session should hold the cookies for a logged in state
-        if session is None:
-            self._configure_session()
+        if session is None and not (
+            session_state and self.restore_session(session_state)
+        ):
+            self._login_with_metrics("initial")
 
     def log_out(self):
         """Log out from the FusionSolarAPI"""
@@ -362,7 +502,7 @@ class FusionSolarClient:
 
         from .captcha_solver_onnx import Solver
 
-        self._captcha_solver = Solver(self._captcha_model_path)
+        self._captcha_solver = Solver(self._captcha_model_path, self.captcha_device)
 
     def _is_intl_subdomain(self) -> bool:
         """Check if this is the INTL subdomain which uses a different API."""
@@ -575,17 +715,335 @@ class FusionSolarClient:
                 f"Failed to login into FusionSolarAPI: {error}"
             )
 
+    @property
+    def _session(self) -> requests.Session:
+        """The session requests are sent with. While `renew_session` logs in, the
+        renewing thread works on the new session and all other threads keep using the
+        current one."""
+        renewing = getattr(self._renewal, "session", None)
+        return self._current_session if renewing is None else renewing
+
+    @_session.setter
+    def _session(self, session: requests.Session) -> None:
+        if getattr(self._renewal, "session", None) is not None:
+            self._renewal.session = session
+        else:
+            self._current_session = session
+
+    @property
+    def session_generation(self) -> int:
+        """Counter that is increased every time the session is replaced by a new login"""
+        return self._session_generation
+
+    def reset_session(self, generation: Optional[int] = None) -> None:
+        """Drops the current session and logs in again.
+
+        :param generation: The session generation the caller observed before it noticed
+                           the session was gone. If another thread already replaced the
+                           session in the meantime, no second login is performed.
+        :type generation: int
+        :raises LoginCooldownException: A login failed recently, so no login is attempted.
+        """
+        with self._login_lock:
+            if generation is not None and generation != self._session_generation:
+                _LOGGER.debug("Session was already renewed by another caller")
+                return
+
+            self._check_login_cooldown()
+
+            self._session = self._new_session()
+            self._session_valid_until = 0.0
+            try:
+                self._login_with_metrics("expired")
+            except Exception as e:
+                self._start_login_cooldown(e)
+                raise
+
+            self._login_failures = 0
+            self._login_blocked_until = 0.0
+            self._session_generation += 1
+
+    def renew_session(self) -> None:
+        """Logs in with a new session and switches to it once the login succeeded.
+
+        Unlike `reset_session`, the current session keeps serving requests while the
+        login is in progress, so this can be used to replace a session before it
+        expires without delaying any request.
+
+        :raises LoginCooldownException: A login failed recently, so no login is attempted.
+        """
+        with self._login_lock:
+            self._check_login_cooldown()
+
+            # the login marks the session as valid, which must not stick to the
+            # current session if it fails
+            valid_until = self._session_valid_until
+            started_at = self._session_started_at
+            previous = self._current_session
+            self._renewal.session = self._new_session()
+            try:
+                self._login_with_metrics("renewal")
+                session = self._renewal.session
+            except Exception as e:
+                self._session_valid_until = valid_until
+                self._session_started_at = started_at
+                self._start_login_cooldown(e)
+                raise
+            finally:
+                self._renewal.session = None
+
+            self._current_session = session
+            self._mark_session_valid()
+
+            self._login_failures = 0
+            self._login_blocked_until = 0.0
+            self._session_generation += 1
+
+        # requests still in flight on the previous session complete, its idle
+        # connections are closed
+        previous.close()
+
+    @property
+    def session_age(self) -> float:
+        """Seconds since the login that started the current session"""
+        return time.time() - self._session_started_at
+
+    def _check_login_cooldown(self) -> None:
+        remaining = self._login_blocked_until - time.monotonic()
+        if remaining > 0:
+            raise LoginCooldownException(
+                f"Last login failed ({self._last_login_error}). "
+                f"Not logging in again for {remaining:.0f} seconds."
+            )
+
+    def _start_login_cooldown(self, error: Exception) -> None:
+        self._login_failures += 1
+        cooldown = min(
+            LOGIN_COOLDOWN * 2 ** (self._login_failures - 1), LOGIN_COOLDOWN_MAX
+        )
+        self._login_blocked_until = time.monotonic() + cooldown
+        self._last_login_error = error
+        _LOGGER.warning(
+            "Login failed, not trying again for %d seconds: %s", cooldown, error
+        )
+
+    def export_session(self) -> dict:
+        """Returns everything needed to continue the current session in another
+        client instance, e.g. after a restart. See `restore_session`.
+
+        :return: JSON serializable state of the session
+        :rtype: dict
+        """
+        return {
+            "cookies": [
+                {
+                    "name": cookie.name,
+                    "value": cookie.value,
+                    "domain": cookie.domain,
+                    "path": cookie.path,
+                    "secure": cookie.secure,
+                    "expires": cookie.expires,
+                }
+                for cookie in self._session.cookies
+            ],
+            "roarand": self._session.headers.get("roarand"),
+            "company_id": self._company_id,
+            "multi_region_name": getattr(self, "MultiRegionName", None),
+            "started_at": self._session_started_at,
+        }
+
+    def restore_session(self, state: dict) -> bool:
+        """Continues a session exported by `export_session`. The session is validated
+        with a single request, no login is performed.
+
+        :param state: The exported session state
+        :type state: dict
+        :return: Whether the session is still alive and is now used by this client
+        :rtype: bool
+        """
+        with self._login_lock:
+            session = self._new_session()
+            session.headers["User-Agent"] = USER_AGENT
+            if state.get("roarand"):
+                session.headers["roarand"] = state["roarand"]
+            for cookie in state.get("cookies", []):
+                session.cookies.set(**cookie)
+
+            previous_session = self._session
+            self._session = session
+            try:
+                alive = self.is_session_active()
+            except Exception as e:
+                _LOGGER.debug("Failed to validate stored session: %s", e)
+                alive = False
+
+            if not alive or not state.get("company_id"):
+                _LOGGER.debug("Stored session is no longer valid")
+                self._session = previous_session
+                self._session_valid_until = 0.0
+                self.metrics.record_login("restored", False)
+                return False
+
+            _LOGGER.debug("Continuing stored session")
+            self.metrics.record_login("restored", True)
+            self._company_id = state["company_id"]
+            self._session_started_at = state.get("started_at", time.time())
+            if state.get("multi_region_name"):
+                self.MultiRegionName = state["multi_region_name"]
+            self._session_generation += 1
+            return True
+
+    def rewrite_url(self, url: str) -> str:
+        """Returns the URL the request for a FusionSolar URL is sent to, which differs
+        from it if the client was created with a `base_url`."""
+        if self.base_url is None:
+            return url
+        parts = urlsplit(url)
+        host = parts.hostname or ""
+        if host != FUSIONSOLAR_DOMAIN and not host.endswith("." + FUSIONSOLAR_DOMAIN):
+            return url
+        path = parts.path
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        return self.base_url + path
+
+    def _new_session(self) -> requests.Session:
+        if self.base_url is None:
+            session = requests.Session()
+        else:
+            session = _BaseUrlSession(self.rewrite_url)
+        if self.transport is not None:
+            self.transport.mount(session)
+        return session
+
+    def _is_session_assumed_valid(self) -> bool:
+        return time.monotonic() < self._session_valid_until
+
+    def _mark_session_valid(self) -> None:
+        self._session_valid_until = time.monotonic() + self._session_ttl
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Sends a request within the current session.
+
+        Raises a SessionExpiredException if the response shows that the session is no
+        longer valid (the request was redirected to or answered with the login page).
+        Connection errors, timeouts, rate limits, server errors and rejected requests
+        raise the exception of their class, see `exceptions.py`. Requests that do not
+        change anything are repeated after a transient error, the session is left
+        alone.
+        """
+        retries = REQUEST_RETRIES if is_retryable(method, url) else 0
+        for attempt in range(retries + 1):
+            try:
+                return self._request_once(method, url, **kwargs)
+            except TransientException as err:
+                if attempt == retries:
+                    raise
+                _LOGGER.debug("Request to %s failed, retrying: %s", url, err)
+                source = request_source.get()
+                if source is not None:
+                    self.metrics.record_retry(source)
+                time.sleep(REQUEST_RETRY_DELAY * (attempt + 1))
+
+    def _request_once(self, method: str, url: str, **kwargs) -> requests.Response:
+        start = time.perf_counter()
+        r = None
+        try:
+            try:
+                r = self._session.request(method, url, **kwargs)
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as e:
+                raise NetworkException(f"{type(e).__name__} requesting {url}") from e
+
+            if r.status_code == 401 or r.history:
+                raise SessionExpiredException(f"Session expired requesting {url}")
+
+            check_status(r.status_code, url)
+
+            if "text/html" in r.headers.get("Content-Type", ""):
+                raise SessionExpiredException(f"Received login page requesting {url}")
+        except Exception:
+            self.metrics.record_request(
+                url,
+                time.perf_counter() - start,
+                len(r.content) if r is not None else 0,
+                error=True,
+            )
+            raise
+
+        self.metrics.record_request(url, time.perf_counter() - start, len(r.content))
+        return r
+
+    def _request_json(
+        self,
+        method: str,
+        url: str,
+        normalize_floats: bool = False,
+        session_probe: bool = False,
+        **kwargs,
+    ) -> Any:
+        """Sends a request and returns the decoded JSON response.
+
+        With `normalize_floats` all floats of the response are rounded and the
+        MAX_JS_NUMBER sentinel is replaced by 0.0, see `json_decoder.loads`.
+
+        A decoded response shows that the session is valid, unless the request is a
+        `session_probe`, whose answer tells whether the session is alive. The caller
+        of a probe marks the session as valid itself.
+        """
+        cacheable = not normalize_floats and not set(kwargs) - {"params", "json"}
+        if cacheable:
+            hit, data = self.response_cache.get(
+                method, url, kwargs.get("params"), kwargs.get("json")
+            )
+            if hit:
+                return data
+
+        r = self._request(method, url, **kwargs)
+
+        try:
+            data = json_decoder.loads(r.content, normalize_floats)
+        except json.JSONDecodeError as e:
+            raise invalid_json_error(url, r.content) from e
+
+        if not session_probe:
+            self._mark_session_valid()
+        if cacheable:
+            self.response_cache.put(
+                method, url, data, kwargs.get("params"), kwargs.get("json")
+            )
+        return data
+
+    def _get_json(self, url: str, **kwargs) -> Any:
+        """Sends a GET request and returns the decoded JSON response."""
+        return self._request_json("GET", url, **kwargs)
+
+    def _post_json(self, url: str, **kwargs) -> Any:
+        """Sends a POST request and returns the decoded JSON response."""
+        return self._request_json("POST", url, **kwargs)
+
+    def _login_with_metrics(self, reason: str) -> None:
+        """Logs in (see `_configure_session`) and reports the login to the metrics."""
+        try:
+            self._configure_session()
+        except Exception:
+            self.metrics.record_login(reason, False)
+            raise
+        self.metrics.record_login(reason, True)
+
     def _configure_session(self):
         """Logs into the Fusion Solar API. Raises an exception if the login fails."""
         # check the login credentials right away
         _LOGGER.debug("Logging into Huawei Fusion Solar API")
 
         # set the user agent
-        self._session.headers["User-Agent"] = (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
-        )
+        self._session.headers["User-Agent"] = USER_AGENT
 
         self._login()
+        self._mark_session_valid()
+        self._session_started_at = time.time()
 
         # get the payload
         payload = self.keep_alive()
@@ -660,6 +1118,7 @@ class FusionSolarClient:
         if "code" not in response_data or response_data["code"] != 0:
             return False
         else:
+            self._mark_session_valid()
             return True
 
     @logged_in
@@ -671,15 +1130,14 @@ class FusionSolarClient:
         :return: This function returns the payload returned by the respective call
         :rtype: str
         """
-        r = self._session.get(
-            f"https://{self._huawei_subdomain}.fusionsolar.huawei.com/rest/dpcloud/auth/v1/keep-alive"
+        response_data = self._get_json(
+            f"https://{self._huawei_subdomain}.fusionsolar.huawei.com/rest/dpcloud/auth/v1/keep-alive",
+            session_probe=True,
         )
-        r.raise_for_status()
-
-        response_data = r.json()
 
         if "code" not in response_data or response_data["code"] != 0:
             raise FusionSolarException("Failed to set keep alive.")
+        self._mark_session_valid()
 
         # get the payload
         if "payload" in response_data:
@@ -696,9 +1154,7 @@ class FusionSolarClient:
         # Get randomVal
         url = f"https://{self._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/management/v1/config/change_Pwd"
         payload = {"pwdCode": password}
-        r = self._session.post(url, json=payload)
-        r.raise_for_status()
-        data = r.json()
+        data = self._post_json(url, json=payload)
         random_val = data["data"]["check"]
 
         # Prepare control command
@@ -711,10 +1167,7 @@ class FusionSolarClient:
         encoded = urlencode(params)
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
 
-        r = self._session.post(url, data=encoded, headers=headers)
-
-        r.raise_for_status()
-        return r.json()
+        return self._post_json(url, data=encoded, headers=headers)
 
     @logged_in
     def get_power_status(self) -> PowerStatus:
@@ -730,12 +1183,9 @@ class FusionSolarClient:
             "_": round(time.time() * 1000),
         }
 
-        r = self._session.get(url=url, params=params)
-        r.raise_for_status()
-
         # errors in decoding the object generally mean that the login expired
         # this is handled by @logged_in
-        power_obj = r.json()
+        power_obj = self._get_json(url=url, params=params)
 
         power_status = PowerStatus(
             current_power_kw=float(power_obj["data"]["currentPower"]),
@@ -767,9 +1217,7 @@ class FusionSolarClient:
             "conditionParams.mocTypes": "20815,20816,20819,20822,50017,60066,60014,60015,23037,60080,20817,20851",  # specifies the types of devices | 20814 for optimizers, 60080 for chargers, 20817 for backupbox, 20851 for emma
             "_": round(time.time() * 1000),
         }
-        r = self._session.get(url=url, params=params)
-        r.raise_for_status()
-        device_data = r.json()
+        device_data = self._get_json(url=url, params=params)
 
         devices = []
         for device in device_data["data"]:
@@ -783,8 +1231,17 @@ class FusionSolarClient:
         signal_ids: list[str] = ["30014", "30016", "30017"],
         device_dn: str = None,
         date: datetime = datetime.now(),
-    ) -> dict:
-        return inverter_api.get_historical_data(self, signal_ids, device_dn, date)
+        columnar: bool = False,
+    ) -> dict | HistoryData:
+        """Retrieves the history of the given signals of a device for one day.
+
+        :param columnar: Return a `HistoryData` with one numpy array per signal instead
+                         of the response. Requires numpy.
+        :type columnar: bool
+        """
+        return inverter_api.get_historical_data(
+            self, signal_ids, device_dn, date, columnar
+        )
 
     @logged_in
     def get_real_time_data(self, device_dn: str = None) -> dict:
@@ -795,8 +1252,13 @@ class FusionSolarClient:
         return inverter_api.get_inverter_data(self, device_dn)
 
     @logged_in
-    def get_charger_data(self, device_dn: str = None) -> dict:
-        return charger_api.get_charger_data(self, device_dn)
+    def get_charger_data(
+        self,
+        device_dn: str = None,
+        dn_ids: list = None,
+        intervals: dict[str, float] | None = None,
+    ) -> dict:
+        return charger_api.get_charger_data(self, device_dn, dn_ids, intervals)
 
     @logged_in
     def get_pv_info(
@@ -820,10 +1282,7 @@ class FusionSolarClient:
             "pageSize": 10,
             "nativeMeDn": device_dn,
         }
-        r = self._session.post(url=url, json=request_data)
-        r.raise_for_status()
-
-        return r.json()
+        return self._post_json(url=url, json=request_data)
 
     @logged_in
     def get_battery_ids(self, plant_id) -> list:
@@ -857,8 +1316,16 @@ class FusionSolarClient:
         return battery_status
 
     @logged_in
-    def get_battery_day_stats(self, battery_id: str, query_time: int = None) -> dict:
-        return battery_api.get_battery_day_stats(self, battery_id, query_time)
+    def get_battery_day_stats(
+        self, battery_id: str, query_time: int = None, columnar: bool = False
+    ) -> dict | HistoryData:
+        """Retrieves the charge/discharge power and SOC history of a battery.
+
+        :param columnar: Return a `HistoryData` with one numpy array per signal instead
+                         of the signals. Requires numpy.
+        :type columnar: bool
+        """
+        return battery_api.get_battery_day_stats(self, battery_id, query_time, columnar)
 
     @logged_in
     def get_battery_module_stats(
@@ -901,8 +1368,7 @@ class FusionSolarClient:
             "changeValues": f'[{{"id":"230190032","value":"{power_setting_options[power_setting]}"}}]',
         }
 
-        r = self._session.post(url, data=data)
-        r.raise_for_status()
+        self._request("POST", url, data=data)
 
     @logged_in
     def get_plant_flow(self, plant_id: str) -> dict:
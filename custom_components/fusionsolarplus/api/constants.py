@@ -208,3 +208,59 @@ MODULE_SIGNALS = {
         "230320509",
     ],
 }
+
+
+# serial numbers and software versions of the modules and their battery packs, which
+# practically never change
+MODULE_INFO_SIGNALS = {
+    "1": [
+        "230320275",
+        "230320146",
+        "230320148",
+        "230320165",
+        "230320181",
+        "230320147",
+        "230320164",
+        "230320180",
+    ],
+    "2": [
+        "230320276",
+        "230320145",
+        "230320196",
+        "230320211",
+        "230320226",
+        "230320195",
+        "230320210",
+        "230320225",
+    ],
+    "3": [
+        "230320536",
+        "230320542",
+        "230320544",
+        "230320555",
+        "230320566",
+        "230320543",
+        "230320554",
+        "230320565",
+    ],
+    "4": [
+        "230320593",
+        "230320599",
+        "230320601",
+        "230320612",
+        "230320623",
+        "230320600",
+        "230320611",
+        "230320622",
+    ],
+}
+
+# the signals of every module that change while the battery is in use
+MODULE_VALUE_SIGNALS = {
+    module_id: [
+        signal_id
+        for signal_id in signal_ids
+        if signal_id not in MODULE_INFO_SIGNALS[module_id]
+    ]
+    for module_id, signal_ids in MODULE_SIGNALS.items()
+}
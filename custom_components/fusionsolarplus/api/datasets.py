@@ -0,0 +1,107 @@
+"""Refresh tiers of the datasets a device payload is built from.
+
+Architecture overview for contributors:
+- A device payload combines several datasets, one request each. Their data changes at
+  very different rates: the active power every few seconds, the optimizer totals
+  every few minutes, serial numbers and software versions practically never.
+- Every dataset belongs to a tier: `TIER_REALTIME`, `TIER_SLOW` or `TIER_STATIC`. The
+  device handlers declare the tiers of their datasets, the intervals of the tiers are
+  options of the config entries.
+- The API functions take the refresh interval of every dataset. A dataset is only
+  requested once its interval has passed, until then its last response is taken from
+  the client's `DatasetCache`. Datasets without an interval are requested on every
+  poll.
+- Daily datasets hold the totals of the current day. Their intervals can be longer
+  than the rest of the day, so they are also due once the local date changed since
+  their last request, the totals of yesterday are never shown as today's. The local
+  date is that of the host, Home Assistant sets the date of its configured time zone
+  with `DatasetCache.today`.
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import date
+from typing import Any, Awaitable, Callable
+
+TIER_REALTIME = "realtime"
+TIER_SLOW = "slow"
+TIER_STATIC = "static"
+
+# polls are not perfectly periodic, allow a dataset to be refreshed a bit early so it
+# is not skipped for a whole extra poll
+DATASET_SLACK = 2
+
+
+class DatasetCache:
+    """Last valid response of every dataset of every device, with its age"""
+
+    def __init__(self, today: Callable[[], date] = date.today):
+        """
+        :param today: Returns the local date, the daily datasets are due once it
+                      changed
+        """
+        self.today = today
+        # (device, dataset) -> (response, time.monotonic() and local date of the
+        # request)
+        self._datasets: dict[tuple[str, str], tuple[Any, float, date]] = {}
+
+    def fresh(
+        self, device: str, name: str, interval: float | None, daily: bool = False
+    ) -> Any | None:
+        """Returns the cached response of a dataset if it is not due yet.
+
+        :param interval: Refresh interval of the dataset, None if it is requested on
+                         every poll
+        :param daily: The dataset holds the totals of the current day, it is also due
+                      once the local date changed since its request
+        """
+        if interval is None:
+            return None
+        cached = self._datasets.get((device, name))
+        if cached is None or time.monotonic() - cached[1] >= interval - DATASET_SLACK:
+            return None
+        if daily and cached[2] != self.today():
+            return None
+        return cached[0]
+
+    def latest(self, device: str, name: str) -> Any | None:
+        """Returns the cached response of a dataset regardless of its age."""
+        cached = self._datasets.get((device, name))
+        return None if cached is None else cached[0]
+
+    def put(self, device: str, name: str, response: Any) -> None:
+        self._datasets[(device, name)] = (response, time.monotonic(), self.today())
+
+    def invalidate(self, device: str, name: str) -> None:
+        self._datasets.pop((device, name), None)
+
+
+def get_dataset(
+    client: Any,
+    device: str,
+    name: str,
+    interval: float | None,
+    fetch: Callable[[], Any],
+) -> Any:
+    """Returns the cached response of a dataset, or fetches it if it is due."""
+    data = client.dataset_cache.fresh(device, name, interval)
+    if data is None:
+        data = fetch()
+        client.dataset_cache.put(device, name, data)
+    return data
+
+
+async def async_get_dataset(
+    client: Any,
+    device: str,
+    name: str,
+    interval: float | None,
+    fetch: Callable[[], Awaitable[Any]],
+) -> Any:
+    """Async variant of `get_dataset`."""
+    data = client.dataset_cache.fresh(device, name, interval)
+    if data is None:
+        data = await fetch()
+        client.dataset_cache.put(device, name, data)
+    return data
@@ -9,6 +9,15 @@ from custom_components.fusionsolarplus.api.devices import inverter_api
 
 def get_backupbox_data(client: Any, device_dn: str | None = None) -> dict:
     raw_data = inverter_api.get_real_time_data(client, device_dn)
+    return _build_value_map(raw_data)
+
+
+async def async_get_backupbox_data(client: Any, device_dn: str | None = None) -> dict:
+    raw_data = await inverter_api.async_get_real_time_data(client, device_dn)
+    return _build_value_map(raw_data)
+
+
+def _build_value_map(raw_data: dict) -> dict:
     value_map: dict[int, Any] = {}
     for group in raw_data.get("data", []):
         for signal in group.get("signals", []):
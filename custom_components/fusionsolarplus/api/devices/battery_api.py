@@ -2,12 +2,25 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import time
 from typing import Any
 
-from custom_components.fusionsolarplus.api.constants import MODULE_SIGNALS
+from custom_components.fusionsolarplus.api.constants import (
+    MODULE_INFO_SIGNALS,
+    MODULE_SIGNALS,
+    MODULE_VALUE_SIGNALS,
+)
+from custom_components.fusionsolarplus.api.datasets import async_get_dataset
 from custom_components.fusionsolarplus.api.exceptions import FusionSolarException
+from custom_components.fusionsolarplus.api.history_data import HistoryData
+
+_LOGGER = logging.getLogger(__name__)
+
+# how long the detected set of battery modules is trusted before all modules are
+# queried again, so that modules added later on are picked up
+MODULE_PRESENCE_TTL = 6 * 60 * 60
 
 
 def get_battery_ids(client: Any, plant_id) -> list:
@@ -18,12 +31,12 @@ def get_battery_ids(client: Any, plant_id) -> list:
     for node in nodes:
         name = node.get("name", "")
         dev_ids = node.get("devIds")
-        logging.debug("Processing node: name=%r devIds=%r", name, dev_ids)
+        _LOGGER.debug("Processing node: name=%r devIds=%r", name, dev_ids)
         if "energy_store" in name:
             if isinstance(dev_ids, list) and dev_ids:
                 battery_ids.extend(dev_ids)
             else:
-                logging.warning(
+                _LOGGER.warning(
                     "Node with 'energy_store' in name but devIds is not a non-empty list: %r",
                     node,
                 )
@@ -31,12 +44,15 @@ def get_battery_ids(client: Any, plant_id) -> list:
 
 
 def get_battery_day_stats(
-    client: Any, battery_id: str, query_time: int | None = None
-) -> dict:
+    client: Any,
+    battery_id: str,
+    query_time: int | None = None,
+    columnar: bool = False,
+) -> dict | HistoryData:
     current_time = round(time.time() * 1000)
     if query_time is not None:
         current_time = query_time
-    r = client._session.get(
+    battery_data = client._get_json(
         url=f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/device-history-data",
         params={
             "signalIds": ["30005", "30007"],
@@ -45,68 +61,196 @@ def get_battery_day_stats(
             "_": current_time,
         },
     )
-    r.raise_for_status()
-    battery_data = r.json()
     if not battery_data["success"] or "data" not in battery_data:
         raise FusionSolarException(
             f"Failed to retrieve battery day stats for {battery_id}"
         )
     battery_data["data"]["30005"]["name"] = "Charge/Discharge power"
     battery_data["data"]["30007"]["name"] = "SOC"
+    if columnar:
+        return HistoryData.from_response(battery_data["data"])
     return battery_data["data"]
 
 
 def get_battery_module_stats(
     client: Any, battery_id: str, module_id: str = "1", signal_ids: list | None = None
+) -> dict:
+    battery_data = client._get_json(
+        url=f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/query-battery-dc",
+        params=_module_stats_params(battery_id, module_id, signal_ids),
+    )
+    return _check_battery_data(battery_data, battery_id)
+
+
+async def async_get_battery_module_stats(
+    client: Any, battery_id: str, module_id: str = "1", signal_ids: list | None = None
+) -> dict:
+    battery_data = await client._get_json(
+        url=f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/query-battery-dc",
+        params=_module_stats_params(battery_id, module_id, signal_ids),
+    )
+    return _check_battery_data(battery_data, battery_id)
+
+
+def _module_stats_params(
+    battery_id: str, module_id: str, signal_ids: list | None
 ) -> dict:
     if signal_ids is None:
         signal_ids = MODULE_SIGNALS[module_id]
     elif not all(signal_id in MODULE_SIGNALS[module_id] for signal_id in signal_ids):
         raise ValueError(f"One or more unknown signal ids for module {module_id}")
 
-    signal_ids_str = ",".join(signal_ids)
-    r = client._session.get(
-        url=f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/query-battery-dc",
-        params={
-            "sigids": signal_ids_str,
-            "dn": battery_id,
-            "moduleId": module_id,
-            "_": round(time.time() * 1000),
-        },
-    )
-    r.raise_for_status()
-    battery_data = r.json()
-    if not battery_data["success"] or "data" not in battery_data:
-        raise FusionSolarException(
-            f"Failed to retrieve battery status for {battery_id}"
-        )
-    return battery_data["data"]
+    return {
+        "sigids": ",".join(signal_ids),
+        "dn": battery_id,
+        "moduleId": module_id,
+        "_": round(time.time() * 1000),
+    }
 
 
 def get_battery_status(client: Any, battery_id: str) -> dict:
-    r = client._session.get(
+    battery_data = client._get_json(
+        url=f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/device-realtime-data",
+        params={"deviceDn": battery_id, "_": round(time.time() * 1000)},
+    )
+    return _check_battery_data(battery_data, battery_id)[1]["signals"]
+
+
+async def async_get_battery_status(client: Any, battery_id: str) -> dict:
+    battery_data = await client._get_json(
         url=f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/device-realtime-data",
         params={"deviceDn": battery_id, "_": round(time.time() * 1000)},
     )
-    r.raise_for_status()
-    battery_data = r.json()
+    return _check_battery_data(battery_data, battery_id)[1]["signals"]
+
+
+def _check_battery_data(battery_data: dict, battery_id: str):
     if not battery_data["success"] or "data" not in battery_data:
         raise FusionSolarException(
             f"Failed to retrieve battery status for {battery_id}"
         )
-    return battery_data["data"][1]["signals"]
+    return battery_data["data"]
 
 
 def get_battery_data(client: Any, battery_id: str) -> dict:
     """Fetch and normalize battery status plus module-level values."""
     battery_signals = get_battery_status(client, battery_id)
-    modules: dict[str, list[dict]] = {}
-    module_values: dict[str, dict[int, Any]] = {}
-    for module_id in ["1", "2", "3", "4"]:
-        module_signals = get_battery_module_stats(client, battery_id, module_id)
-        modules[module_id] = module_signals
-        module_values[module_id] = _signals_to_value_map(module_signals)
+    module_ids = _modules_to_fetch(client, battery_id)
+    modules = {
+        module_id: get_battery_module_stats(client, battery_id, module_id)
+        for module_id in module_ids
+    }
+    return _build_battery_payload(
+        battery_signals, _update_module_presence(client, battery_id, modules)
+    )
+
+
+async def async_get_battery_data(
+    client: Any, battery_id: str, intervals: dict[str, float] | None = None
+) -> dict:
+    """Async variant of `get_battery_data`.
+
+    The status and the module requests are sent concurrently.
+
+    :param intervals: Refresh interval of the "module_info" dataset (serial numbers and
+                      versions of the modules). If it is set, these signals are
+                      requested separately and only once the interval has passed.
+    """
+    info_interval = (intervals or {}).get("module_info")
+    module_ids = _modules_to_fetch(client, battery_id)
+    battery_signals, *module_stats = await asyncio.gather(
+        async_get_battery_status(client, battery_id),
+        *(
+            async_get_battery_module_stats(client, battery_id, module_id)
+            if info_interval is None
+            else _async_get_module_values_and_info(
+                client, battery_id, module_id, info_interval
+            )
+            for module_id in module_ids
+        ),
+    )
+    modules = dict(zip(module_ids, module_stats))
+    return _build_battery_payload(
+        battery_signals, _update_module_presence(client, battery_id, modules)
+    )
+
+
+async def _async_get_module_values_and_info(
+    client: Any, battery_id: str, module_id: str, info_interval: float
+) -> list[dict]:
+    values, info = await asyncio.gather(
+        async_get_battery_module_stats(
+            client, battery_id, module_id, MODULE_VALUE_SIGNALS[module_id]
+        ),
+        async_get_dataset(
+            client,
+            battery_id,
+            f"module_info_{module_id}",
+            info_interval,
+            lambda: async_get_battery_module_stats(
+                client, battery_id, module_id, MODULE_INFO_SIGNALS[module_id]
+            ),
+        ),
+    )
+    return values + info
 
+
+def _modules_to_fetch(client: Any, battery_id: str) -> list[str]:
+    """Returns the modules that are known to be installed, or all of them if the
+    presence of the modules has to be (re)discovered."""
+    cached = client._battery_modules.get(battery_id)
+    if cached is None or time.monotonic() >= cached[1]:
+        return list(MODULE_SIGNALS)
+    return cached[0]
+
+
+def _update_module_presence(
+    client: Any, battery_id: str, modules: dict[str, list[dict]]
+) -> dict[str, list[dict]]:
+    """Updates the cached module presence and fills in the modules that were not
+    fetched, so the payload always holds every module.
+
+    An empty result is not cached: a battery that reports no value for any module is
+    queried in full again during the next poll.
+    """
+    present = [
+        module_id
+        for module_id, signals in modules.items()
+        if _is_module_present(module_id, signals)
+    ]
+
+    for module_id in modules.keys() - set(present):
+        # the serial number and versions of a module that stopped reporting are not
+        # kept, they are requested again once it is back
+        client.dataset_cache.invalidate(battery_id, f"module_info_{module_id}")
+
+    if len(modules) == len(MODULE_SIGNALS) and present:
+        _LOGGER.debug("Battery %s has modules %s installed", battery_id, present)
+        client._battery_modules[battery_id] = (
+            present,
+            time.monotonic() + MODULE_PRESENCE_TTL,
+        )
+    elif len(present) != len(modules):
+        # a module disappeared: check all modules again during the next poll
+        client._battery_modules.pop(battery_id, None)
+
+    return {module_id: modules.get(module_id, []) for module_id in MODULE_SIGNALS}
+
+
+def _is_module_present(module_id: str, signals: list[dict]) -> bool:
+    """A module is present if it reports any measured value. Its info signals (serial
+    number, versions) can be taken from the cache and are not considered."""
+    value_signals = MODULE_VALUE_SIGNALS[module_id]
+    return any(
+        str(signal.get("id")) in value_signals
+        and signal.get("realValue") not in (None, "", "-", "N/A", "n/a")
+        for signal in signals or []
+    )
+
+
+def _build_battery_payload(
+    battery_signals: list[dict], modules: dict[str, list[dict]]
+) -> dict:
     return {
         "battery": battery_signals,
         "modules": modules,
@@ -2,46 +2,161 @@
 
 from __future__ import annotations
 
+import asyncio
+import logging
 import time
 from typing import Any
 
+_LOGGER = logging.getLogger(__name__)
 
-def get_charger_data(client: Any, device_dn: str | None = None) -> dict:
-    client.keep_alive()
+# seconds between two lookups of the dnIds of a charger whose realtime data stays
+# empty, used if no interval is passed. An offline charger answers with empty data as
+# well, so its dnIds are not looked up again on every poll.
+CHARGER_DATASET_INTERVALS = {
+    "dn_ids": 5 * 60,
+}
 
+
+def get_charger_data(
+    client: Any,
+    device_dn: str | None = None,
+    dn_ids: list[str] | None = None,
+    intervals: dict[str, float] | None = None,
+) -> dict:
+    """Fetch and normalize the realtime data of a charger.
+
+    `dn_ids` are the ids returned in the payload of an earlier call. They never change
+    for a charger, so passing them saves looking them up on every poll. They are only
+    looked up again if the realtime data can not be retrieved with them, at most once
+    per "dn_ids" interval.
+
+    :param intervals: Minimum time between two lookups of the dnIds, see
+                      CHARGER_DATASET_INTERVALS
+    """
+    url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/neteco/web/homemgr/v1/device/get-realtime-info"
+
+    if dn_ids:
+        raw_data = client._post_json(url=url, json=_realtime_info_payload(*dn_ids))
+        if _has_signals(raw_data) or not _lookup_due(client, device_dn, intervals):
+            return _normalize_charger_payload(raw_data, dn_ids)
+        _LOGGER.debug("Unknown dnIds %s for charger %s", dn_ids, device_dn)
+        _invalidate_dn_id_lookups(client, device_dn)
+
+    dn_ids = [_get_tree_dn_id(client, device_dn), _get_mo_dn_id(client, device_dn)]
+    client.dataset_cache.put(device_dn, "dn_ids", dn_ids)
+    raw_data = client._post_json(url=url, json=_realtime_info_payload(*dn_ids))
+    return _normalize_charger_payload(raw_data, dn_ids)
+
+
+async def async_get_charger_data(
+    client: Any,
+    device_dn: str | None = None,
+    dn_ids: list[str] | None = None,
+    intervals: dict[str, float] | None = None,
+) -> dict:
+    """Async variant of `get_charger_data`."""
+    url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/neteco/web/homemgr/v1/device/get-realtime-info"
+
+    if dn_ids:
+        raw_data = await client._post_json(
+            url=url, json=_realtime_info_payload(*dn_ids)
+        )
+        if _has_signals(raw_data) or not _lookup_due(client, device_dn, intervals):
+            return _normalize_charger_payload(raw_data, dn_ids)
+        _LOGGER.debug("Unknown dnIds %s for charger %s", dn_ids, device_dn)
+        _invalidate_dn_id_lookups(client, device_dn)
+
+    dn_ids = list(
+        await asyncio.gather(
+            _async_get_tree_dn_id(client, device_dn),
+            _async_get_mo_dn_id(client, device_dn),
+        )
+    )
+    client.dataset_cache.put(device_dn, "dn_ids", dn_ids)
+    raw_data = await client._post_json(url=url, json=_realtime_info_payload(*dn_ids))
+    return _normalize_charger_payload(raw_data, dn_ids)
+
+
+def _get_tree_dn_id(client: Any, device_dn: str | None) -> str:
     url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/dp/pvms/organization/v1/tree"
-    payload = {
+    response = client._post_json(url=url, json=_tree_payload(device_dn))
+    return response["childList"][0]["elementId"]
+
+
+async def _async_get_tree_dn_id(client: Any, device_dn: str | None) -> str:
+    url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/dp/pvms/organization/v1/tree"
+    response = await client._post_json(url=url, json=_tree_payload(device_dn))
+    return response["childList"][0]["elementId"]
+
+
+def _get_mo_dn_id(client: Any, device_dn: str | None) -> str:
+    url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/mo-details"
+    params = _mo_details_params(device_dn)
+    response = client._get_json(url=url, params=params)
+    return str(response.get("data", {}).get("mo", {}).get("dnId"))
+
+
+async def _async_get_mo_dn_id(client: Any, device_dn: str | None) -> str:
+    url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/mo-details"
+    params = _mo_details_params(device_dn)
+    response = await client._get_json(url=url, params=params)
+    return str(response.get("data", {}).get("mo", {}).get("dnId"))
+
+
+def _lookup_due(
+    client: Any, device_dn: str | None, intervals: dict[str, float] | None
+) -> bool:
+    """Whether the dnIds of a charger whose realtime data is empty are looked up
+    again. Until then the charger is taken as offline."""
+    if intervals is None:
+        intervals = CHARGER_DATASET_INTERVALS
+    interval = intervals.get("dn_ids", CHARGER_DATASET_INTERVALS["dn_ids"])
+    return client.dataset_cache.fresh(device_dn, "dn_ids", interval) is None
+
+
+def _invalidate_dn_id_lookups(client: Any, device_dn: str | None) -> None:
+    """Drops the cached lookups of this charger, those of the other devices of the
+    account are kept."""
+    client.response_cache.invalidate_request(
+        "POST",
+        "/rest/dp/pvms/organization/v1/tree",
+        json_body=_tree_payload(device_dn),
+    )
+    client.response_cache.invalidate_request(
+        "GET",
+        "/rest/pvms/web/device/v1/mo-details",
+        params=_mo_details_params(device_dn),
+    )
+
+
+def _has_signals(raw_data: dict) -> bool:
+    return any(isinstance(signals, list) and signals for signals in raw_data.values())
+
+
+def _mo_details_params(device_dn: str | None) -> tuple:
+    return (("dn", device_dn), ("_", round(time.time() * 1000)))
+
+
+def _tree_payload(device_dn: str | None) -> dict:
+    return {
         "parentDn": device_dn,
         "treeDepth": "device",
         "pageParam": {"needPage": True},
         "filterCond": {"nameType": "device", "mocIdInclude": [60081]},
         "displayCond": {"self": False, "status": True},
     }
-    r = client._session.post(url=url, json=payload)
-    r.raise_for_status()
-    response = r.json()
-    dn_id_1 = response["childList"][0]["elementId"]
 
-    url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/mo-details"
-    params = (("dn", device_dn), ("_", round(time.time() * 1000)))
-    r = client._session.get(url=url, params=params)
-    r.raise_for_status()
-    response = r.json()
-    dn_id_2 = str(response.get("data", {}).get("mo", {}).get("dnId"))
 
-    url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/neteco/web/homemgr/v1/device/get-realtime-info"
-    payload = {
+def _realtime_info_payload(dn_id_1: str, dn_id_2: str) -> dict:
+    return {
         "conditions": [
             {"dnId": dn_id_1, "queryAll": True},
             {"dnId": dn_id_2, "queryAll": True},
         ]
     }
-    r = client._session.post(url=url, json=payload)
-    r.raise_for_status()
-    return _normalize_charger_payload(r.json())
 
 
-def _normalize_charger_payload(raw_data: dict) -> dict:
+def _normalize_charger_payload(raw_data: dict, dn_ids: list[str]) -> dict:
     value_map: dict[tuple[str, int], Any] = {}
     for signal_type_id, signals_list in raw_data.items():
         if not isinstance(signals_list, list):
@@ -58,4 +173,4 @@ def _normalize_charger_payload(raw_data: dict) -> dict:
                 value_map[(signal_type_id, int(signal_id))] = float(raw_value)
             except (TypeError, ValueError):
                 value_map[(signal_type_id, int(signal_id))] = raw_value
-    return {"raw_data": raw_data, "value_map": value_map}
+    return {"raw_data": raw_data, "value_map": value_map, "dn_ids": dn_ids}
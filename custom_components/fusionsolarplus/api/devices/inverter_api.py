@@ -7,11 +7,20 @@ pre-normalized values from the coordinator payload instead of parsing raw API da
 
 from __future__ import annotations
 
+import asyncio
+import logging
 import re
 import time
 from typing import Any
 
+from custom_components.fusionsolarplus.api.datasets import (
+    async_get_dataset,
+    get_dataset,
+)
 from custom_components.fusionsolarplus.api.exceptions import FusionSolarException
+from custom_components.fusionsolarplus.api.history_data import HistoryData
+
+_LOGGER = logging.getLogger(__name__)
 
 
 def get_historical_data(
@@ -19,7 +28,8 @@ def get_historical_data(
     signal_ids: list[str],
     device_dn: str | None = None,
     date=None,
-) -> dict:
+    columnar: bool = False,
+) -> dict | HistoryData:
     if date is None:
         date = time.localtime()
         timestamp_ms = int(time.mktime(date) * 1000)
@@ -35,24 +45,130 @@ def get_historical_data(
         ("date", timestamp_ms),
         ("_", round(time.time() * 1000)),
     )
-    r = client._session.get(url=url, params=params)
-    r.raise_for_status()
-    return r.json(parse_float=client._parse_float)
+    history = client._get_json(url=url, params=params, normalize_floats=True)
+    if columnar:
+        return HistoryData.from_response(history.get("data") or {})
+    return history
+
+
+PV_SIGNAL_MAP = {
+    "PV1": [("11001", "11002", "11003")],
+    "PV2": [("11004", "11005", "11006")],
+    "PV3": [("11007", "11008", "11009")],
+    "PV4": [("11010", "11011", "11012")],
+    "PV5": [("11013", "11014", "11015")],
+    "PV6": [("11016", "11017", "11018")],
+    "PV7": [("11019", "11020", "11021")],
+    "PV8": [("11022", "11023", "11024")],
+    "PV9": [("11025", "11026", "11027")],
+    "PV10": [("11028", "11029", "11030")],
+    "PV11": [("11031", "11032", "11033")],
+    "PV12": [("11034", "11035", "11036")],
+    "PV13": [("11037", "11038", "11039")],
+    "PV14": [("11040", "11041", "11042")],
+    "PV15": [("11043", "11044", "11045")],
+    "PV16": [("11046", "11047", "11048")],
+    "PV17": [("11049", "11050", "11051")],
+    "PV18": [("11052", "11053", "11054")],
+    "PV19": [("11055", "11056", "11057")],
+    "PV20": [("11058", "11059", "11060")],
+}
+
+# voltage and current signal ids requested from device-real-kpi for every PV string
+PV_KPI_SIGNAL_IDS = {
+    pv: [
+        signal_id
+        for voltage_id, current_id, _ in pairs
+        for signal_id in (voltage_id, current_id)
+    ]
+    for pv, pairs in PV_SIGNAL_MAP.items()
+}
+
+# the PV strings connected to an inverter hardly ever change. They are discovered again
+# after this many seconds, or earlier if the realtime data of the inverter changes shape.
+PV_DISCOVERY_TTL = 24 * 60 * 60
+
+# datasets of the inverter payload: "realtime", "pv", "optimizers" and "pv_strings"
+# (the discovery of the PV strings). Refresh intervals used if none are passed.
+INVERTER_DATASET_INTERVALS = {"pv_strings": PV_DISCOVERY_TTL}
 
 
 def get_real_time_data(client: Any, device_dn: str | None = None) -> dict:
     url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/device-realtime-data"
     params = (("deviceDn", device_dn), ("_", round(time.time() * 1000)))
-    r = client._session.get(url=url, params=params)
-    r.raise_for_status()
-    return r.json()
+    return client._get_json(url=url, params=params)
+
+
+async def async_get_real_time_data(client: Any, device_dn: str | None = None) -> dict:
+    url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/device-realtime-data"
+    params = (("deviceDn", device_dn), ("_", round(time.time() * 1000)))
+    return await client._get_json(url=url, params=params)
 
 
-def get_inverter_data(client: Any, device_dn: str) -> dict:
-    """Fetch and normalize all inverter datasets used by Home Assistant."""
+def get_inverter_data(
+    client: Any, device_dn: str, intervals: dict[str, float] | None = None
+) -> dict:
+    """Fetch and normalize all inverter datasets used by Home Assistant.
+
+    :param intervals: Refresh interval of every dataset that is not requested on every
+                      call, see INVERTER_DATASET_INTERVALS
+    """
+    if intervals is None:
+        intervals = INVERTER_DATASET_INTERVALS
     realtime_data = get_real_time_data(client, device_dn)
-    pv_data = get_pv_info(client, device_dn)
-    optimizer_data = get_optimizer_stats(client, device_dn)
+    _track_realtime_shape(client, device_dn, realtime_data)
+    pv_data = get_dataset(
+        client,
+        device_dn,
+        "pv",
+        intervals.get("pv"),
+        lambda: get_pv_info(client, device_dn, intervals.get("pv_strings")),
+    )
+    optimizer_data = get_dataset(
+        client,
+        device_dn,
+        "optimizers",
+        intervals.get("optimizers"),
+        lambda: get_optimizer_stats(client, device_dn),
+    )
+    return _build_inverter_payload(realtime_data, pv_data, optimizer_data)
+
+
+async def async_get_inverter_data(
+    client: Any, device_dn: str, intervals: dict[str, float] | None = None
+) -> dict:
+    """Async variant of `get_inverter_data`.
+
+    The realtime, PV and optimizer requests do not depend on each other, so they are
+    sent concurrently and a poll takes as long as the slowest of them. A change in the
+    shape of the realtime data therefore refreshes the PV strings during the next poll.
+    """
+    if intervals is None:
+        intervals = INVERTER_DATASET_INTERVALS
+    realtime_data, pv_data, optimizer_data = await asyncio.gather(
+        async_get_real_time_data(client, device_dn),
+        async_get_dataset(
+            client,
+            device_dn,
+            "pv",
+            intervals.get("pv"),
+            lambda: async_get_pv_info(client, device_dn, intervals.get("pv_strings")),
+        ),
+        async_get_dataset(
+            client,
+            device_dn,
+            "optimizers",
+            intervals.get("optimizers"),
+            lambda: async_get_optimizer_stats(client, device_dn),
+        ),
+    )
+    _track_realtime_shape(client, device_dn, realtime_data)
+    return _build_inverter_payload(realtime_data, pv_data, optimizer_data)
+
+
+def _build_inverter_payload(
+    realtime_data: dict, pv_data: dict, optimizer_data: list[dict]
+) -> dict:
     return {
         "raw_realtime_data": realtime_data,
         "raw_pv_data": pv_data,
@@ -63,13 +179,73 @@ def get_inverter_data(client: Any, device_dn: str) -> dict:
     }
 
 
-def get_pv_info(client: Any, device_dn: str | None = None) -> dict:
-    avail_url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/device-statistics-signal"
-    avail_params = {"deviceDn": device_dn, "_": round(time.time() * 1000)}
-    r_avail = client._session.get(url=avail_url, params=avail_params)
-    r_avail.raise_for_status()
-    avail_data = r_avail.json()
+def get_pv_info(
+    client: Any, device_dn: str | None = None, discovery_interval=PV_DISCOVERY_TTL
+) -> dict:
+    def discover():
+        avail_url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/device-statistics-signal"
+        avail_params = _statistics_signal_params(device_dn)
+        return _extract_available_pvs(
+            client._get_json(url=avail_url, params=avail_params)
+        )
+
+    available_pvs = get_dataset(
+        client, device_dn, "pv_strings", discovery_interval, discover
+    )
+
+    url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/device-real-kpi"
+    data = client._get_json(url=url, params=_pv_kpi_params(available_pvs, device_dn))
+    return _build_pv_info(data, available_pvs)
 
+
+async def async_get_pv_info(
+    client: Any, device_dn: str | None = None, discovery_interval=PV_DISCOVERY_TTL
+) -> dict:
+    async def discover():
+        avail_url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/device-statistics-signal"
+        avail_params = _statistics_signal_params(device_dn)
+        avail_data = await client._get_json(url=avail_url, params=avail_params)
+        return _extract_available_pvs(avail_data)
+
+    available_pvs = await async_get_dataset(
+        client, device_dn, "pv_strings", discovery_interval, discover
+    )
+
+    url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/device-real-kpi"
+    data = await client._get_json(
+        url=url, params=_pv_kpi_params(available_pvs, device_dn)
+    )
+    return _build_pv_info(data, available_pvs)
+
+
+def _track_realtime_shape(
+    client: Any, device_dn: str | None, realtime_data: dict
+) -> None:
+    """Forgets the PV strings of an inverter once its realtime data has a different set
+    of signals, e.g. after a firmware update or after strings were (dis)connected."""
+    shape = frozenset(
+        signal.get("id")
+        for group in realtime_data.get("data", [])
+        for signal in group.get("signals", [])
+    )
+    cached = client._pv_strings.setdefault(device_dn, {})
+    previous = cached.get("realtime_shape")
+    if previous is not None and previous != shape:
+        _LOGGER.debug("Realtime data of %s changed, discovering PV strings", device_dn)
+        client.dataset_cache.invalidate(device_dn, "pv_strings")
+        client.response_cache.invalidate_request(
+            "GET",
+            "/rest/pvms/web/device/v1/device-statistics-signal",
+            params=_statistics_signal_params(device_dn),
+        )
+    cached["realtime_shape"] = shape
+
+
+def _statistics_signal_params(device_dn: str | None) -> dict:
+    return {"deviceDn": device_dn, "_": round(time.time() * 1000)}
+
+
+def _extract_available_pvs(avail_data: dict) -> list[str]:
     available_pvs = []
     for signal in avail_data.get("data", {}).get("signalList", []):
         name = signal.get("name", "")
@@ -78,50 +254,26 @@ def get_pv_info(client: Any, device_dn: str | None = None) -> dict:
             pv_id = match.group(0)
             if pv_id not in available_pvs:
                 available_pvs.append(pv_id)
+    return available_pvs
 
-    pv_signal_map = {
-        "PV1": [("11001", "11002", "11003")],
-        "PV2": [("11004", "11005", "11006")],
-        "PV3": [("11007", "11008", "11009")],
-        "PV4": [("11010", "11011", "11012")],
-        "PV5": [("11013", "11014", "11015")],
-        "PV6": [("11016", "11017", "11018")],
-        "PV7": [("11019", "11020", "11021")],
-        "PV8": [("11022", "11023", "11024")],
-        "PV9": [("11025", "11026", "11027")],
-        "PV10": [("11028", "11029", "11030")],
-        "PV11": [("11031", "11032", "11033")],
-        "PV12": [("11034", "11035", "11036")],
-        "PV13": [("11037", "11038", "11039")],
-        "PV14": [("11040", "11041", "11042")],
-        "PV15": [("11043", "11044", "11045")],
-        "PV16": [("11046", "11047", "11048")],
-        "PV17": [("11049", "11050", "11051")],
-        "PV18": [("11052", "11053", "11054")],
-        "PV19": [("11055", "11056", "11057")],
-        "PV20": [("11058", "11059", "11060")],
-    }
-
-    signal_ids = []
-    for pv in available_pvs:
-        pairs = pv_signal_map.get(pv)
-        if pairs:
-            for voltage_id, current_id, _ in pairs:
-                signal_ids.extend([voltage_id, current_id])
 
-    params = [("signalIds", sid) for sid in signal_ids]
+def _pv_kpi_params(available_pvs: list[str], device_dn: str | None) -> list[tuple]:
+    params = [
+        ("signalIds", sid)
+        for pv in available_pvs
+        for sid in PV_KPI_SIGNAL_IDS.get(pv, ())
+    ]
     params.append(("deviceDn", device_dn))
     params.append(("_", round(time.time() * 1000)))
+    return params
 
-    url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/device/v1/device-real-kpi"
-    r = client._session.get(url=url, params=params)
-    r.raise_for_status()
-    data = r.json()
+
+def _build_pv_info(data: dict, available_pvs: list[str]) -> dict:
     signals = data.get("data", {}).get("signals", {})
 
     latest_time = int(time.time())
     for pv in available_pvs:
-        pairs = pv_signal_map.get(pv)
+        pairs = PV_SIGNAL_MAP.get(pv)
         if pairs:
             for voltage_id, current_id, power_id in pairs:
                 val1 = signals.get(voltage_id, {}).get("realValue")
@@ -138,7 +290,7 @@ def get_pv_info(client: Any, device_dn: str | None = None) -> dict:
 
     filtered_signals = {}
     for pv in available_pvs:
-        pairs = pv_signal_map.get(pv)
+        pairs = PV_SIGNAL_MAP.get(pv)
         if pairs:
             for voltage_id, current_id, power_id in pairs:
                 for sid in (voltage_id, current_id, power_id):
@@ -148,7 +300,7 @@ def get_pv_info(client: Any, device_dn: str | None = None) -> dict:
     if not filtered_signals:
         latest_time = int(time.time())
         for pv in available_pvs:
-            pairs = pv_signal_map.get(pv)
+            pairs = PV_SIGNAL_MAP.get(pv)
             if pairs:
                 for voltage_id, current_id, power_id in pairs:
                     for sid in (voltage_id, current_id, power_id):
@@ -162,12 +314,22 @@ def get_pv_info(client: Any, device_dn: str | None = None) -> dict:
 
 
 def get_optimizer_stats(client: Any, inverter_id: str):
-    r = client._session.get(
+    optimizer_data = client._get_json(
         url=f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/station/v1/layout/optimizer-info",
         params={"inverterDn": inverter_id, "_": round(time.time() * 1000)},
     )
-    r.raise_for_status()
-    optimizer_data = r.json()
+    return _check_optimizer_data(optimizer_data, inverter_id)
+
+
+async def async_get_optimizer_stats(client: Any, inverter_id: str):
+    optimizer_data = await client._get_json(
+        url=f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/station/v1/layout/optimizer-info",
+        params={"inverterDn": inverter_id, "_": round(time.time() * 1000)},
+    )
+    return _check_optimizer_data(optimizer_data, inverter_id)
+
+
+def _check_optimizer_data(optimizer_data: dict, inverter_id: str):
     if "exceptionType" in optimizer_data:
         return []
     if not optimizer_data["success"] or "data" not in optimizer_data:
@@ -2,63 +2,147 @@
 
 from __future__ import annotations
 
+import asyncio
+import logging
 import time
 from datetime import datetime, timezone
 from typing import Any
 
 from custom_components.fusionsolarplus.api.exceptions import FusionSolarException
 
+_LOGGER = logging.getLogger(__name__)
 
-def get_current_plant_data(client: Any, plant_id: str) -> dict:
-    """Retrieve current plant KPI and energy flow data."""
+
+# refresh interval of every dataset of the current plant data in seconds, used if none
+# are passed. Each poll only requests the datasets that are due, the others are taken
+# from the last response.
+PLANT_DATASET_INTERVALS = {
+    "flow": 15,
+    "kpi": 60,
+    "energy_balance": 300,
+}
+
+# datasets that hold the totals of the current day, they are refreshed as soon as the
+# local date changes, whatever their interval
+DAILY_PLANT_DATASETS = frozenset({"kpi", "energy_balance"})
+
+
+def get_current_plant_data(
+    client: Any, plant_id: str, intervals: dict[str, float] | None = None
+) -> dict:
+    """Retrieve current plant KPI and energy flow data.
+
+    :param intervals: Refresh interval of every dataset that is not requested on every
+                      call, see PLANT_DATASET_INTERVALS
+    """
+    requests = _due_plant_requests(client, plant_id, intervals)
+    responses = {
+        name: client._get_json(url=url, params=params)
+        for name, (url, params) in requests.items()
+    }
+    return _merge_plant_datasets(client, plant_id, responses)
+
+
+async def async_get_current_plant_data(
+    client: Any, plant_id: str, intervals: dict[str, float] | None = None
+) -> dict:
+    """Async variant of `get_current_plant_data`.
+
+    The datasets that are due are requested concurrently.
+    """
+    requests = _due_plant_requests(client, plant_id, intervals)
+    results = await asyncio.gather(
+        *(client._get_json(url=url, params=params) for url, params in requests.values())
+    )
+    return _merge_plant_datasets(client, plant_id, dict(zip(requests, results)))
+
+
+def _due_plant_requests(
+    client: Any, plant_id: str, intervals: dict[str, float] | None
+) -> dict[str, tuple[str, dict]]:
+    """Returns the (url, params) of the datasets that have to be refreshed."""
+    if intervals is None:
+        intervals = PLANT_DATASET_INTERVALS
     ts = round(time.time() * 1000)
+    base_url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/station"
+    requests = {
+        "kpi": (
+            f"{base_url}/v1/overview/station-real-kpi",
+            _station_kpi_params(plant_id, ts),
+        ),
+        "energy_balance": (
+            f"{base_url}/v3/overview/energy-balance",
+            _energy_balance_params(plant_id, ts),
+        ),
+        "flow": (
+            f"{base_url}/v3/overview/energy-flow",
+            {"stationDn": plant_id, "featureId": "aifc", "_": ts},
+        ),
+    }
 
-    url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/station/v1/overview/station-real-kpi"
-    params = {
+    return {
+        name: request
+        for name, request in requests.items()
+        if client.dataset_cache.fresh(
+            plant_id, name, intervals.get(name), daily=name in DAILY_PLANT_DATASETS
+        )
+        is None
+    }
+
+
+def _merge_plant_datasets(client: Any, plant_id: str, responses: dict) -> dict:
+    for name, response in responses.items():
+        # invalid responses are not kept, so they are requested again next poll
+        if "data" in response:
+            client.dataset_cache.put(plant_id, name, response)
+
+    datasets = {
+        name: responses[name]
+        if name in responses
+        else client.dataset_cache.latest(plant_id, name)
+        for name in PLANT_DATASET_INTERVALS
+    }
+    return _normalize_plant_data(
+        datasets["kpi"], datasets["energy_balance"], datasets["flow"]
+    )
+
+
+def _station_kpi_params(plant_id: str, ts: int) -> dict:
+    return {
         "stationDn": plant_id,
         "clientTime": ts,
         "timeZone": 1,
         "_": ts,
     }
-    r = client._session.get(url=url, params=params)
-    r.raise_for_status()
-    power_obj = r.json()
 
-    if "data" not in power_obj:
-        raise FusionSolarException("Failed to retrieve plant KPI data.")
 
+def _energy_balance_params(plant_id: str, ts: int) -> dict:
     today = datetime.now(timezone.utc).astimezone()
     query_time = int(
         today.replace(hour=0, minute=0, second=0, microsecond=0).timestamp() * 1000
     )
-    date_str = today.strftime("%Y-%m-%d 00:00:00")
-
-    url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/station/v3/overview/energy-balance"
-    params = {
+    return {
         "stationDn": plant_id,
         "timeDim": 2,
         "timeZone": 1.0,
         "timeZoneStr": today.tzname(),
         "queryTime": query_time,
-        "dateStr": date_str,
+        "dateStr": today.strftime("%Y-%m-%d 00:00:00"),
         "_": ts,
     }
-    r = client._session.get(url=url, params=params)
-    r.raise_for_status()
-    energy_obj = r.json()
+
+
+def _normalize_plant_data(power_obj: dict, energy_obj: dict, flow_data: dict) -> dict:
+    if "data" not in power_obj:
+        raise FusionSolarException("Failed to retrieve plant KPI data.")
 
     if "data" not in energy_obj:
         raise FusionSolarException("Failed to retrieve plant energy balance data.")
 
-    data = power_obj["data"]
+    # the responses may be reused by later polls, so they must not be modified
+    data = dict(power_obj["data"])
     energy = energy_obj["data"]
 
-    url = f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/station/v3/overview/energy-flow"
-    params = {"stationDn": plant_id, "featureId": "aifc", "_": ts}
-    r = client._session.get(url=url, params=params)
-    r.raise_for_status()
-    flow_data = r.json()
-
     if "data" in flow_data and "flow" in flow_data["data"]:
         flow = flow_data["data"]["flow"]
         nodes = flow.get("nodes", [])
@@ -174,7 +258,7 @@ def get_plant_ids(client: Any) -> list:
 
 
 def get_station_list(client: Any) -> list:
-    r = client._session.post(
+    obj_tree = client._post_json(
         url=f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/station/v1/station/station-list",
         json={
             "curPage": 1,
@@ -187,20 +271,28 @@ def get_station_list(client: Any) -> list:
             "locale": "en_US",
         },
     )
-    r.raise_for_status()
-    obj_tree = r.json()
     if not obj_tree["success"]:
         raise FusionSolarException("Failed to retrieve station list")
     return obj_tree["data"]["list"]
 
 
 def get_plant_flow(client: Any, plant_id: str) -> dict:
-    r = client._session.get(
+    flow_data = client._get_json(
         url=f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/station/v1/overview/energy-flow",
         params={"stationDn": plant_id, "_": round(time.time() * 1000)},
     )
-    r.raise_for_status()
-    flow_data = r.json()
+    return _check_plant_flow(flow_data, plant_id)
+
+
+async def async_get_plant_flow(client: Any, plant_id: str) -> dict:
+    flow_data = await client._get_json(
+        url=f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/station/v1/overview/energy-flow",
+        params={"stationDn": plant_id, "_": round(time.time() * 1000)},
+    )
+    return _check_plant_flow(flow_data, plant_id)
+
+
+def _check_plant_flow(flow_data: dict, plant_id: str) -> dict:
     if not flow_data["success"] or "data" not in flow_data:
         raise FusionSolarException(f"Failed to retrieve plant flow for {plant_id}")
     return flow_data
@@ -210,7 +302,7 @@ def get_plant_stats(client: Any, plant_id: str, query_time: int | None = None) -
     if not query_time:
         query_time = get_day_start_sec()
 
-    r = client._session.get(
+    plant_data = client._get_json(
         url=f"https://{client._huawei_subdomain}.fusionsolar.huawei.com/rest/pvms/web/station/v1/overview/energy-balance",
         params={
             "stationDn": plant_id,
@@ -221,8 +313,6 @@ def get_plant_stats(client: Any, plant_id: str, query_time: int | None = None) -
             "_": round(time.time() * 1000),
         },
     )
-    r.raise_for_status()
-    plant_data = r.json()
     if not plant_data["success"] or "data" not in plant_data:
         raise FusionSolarException(f"Failed to retrieve plant status for {plant_id}")
     return plant_data["data"]
@@ -248,20 +338,16 @@ def get_last_plant_data(client: Any, plant_data: dict) -> dict:
             else:
                 extracted_data[key_name] = float(key_value)
         except Exception:
-            client._LOGGER.debug("Failed to parse %s = %s", key_name, key_value)
+            _LOGGER.debug("Failed to parse %s = %s", key_name, key_value)
             extracted_data[key_name] = None
     return extracted_data
 
 
 def get_last_value(values: list, measurement_times: list) -> dict:
-    found_values = []
-    for index, value in enumerate(values):
-        if value != "--":
-            found_values.append(
-                {"time": measurement_times[index], "value": float(values[index])}
-            )
-    if found_values:
-        return found_values[-1]
+    # the series ends with "--" for the rest of the day, scan it from the end
+    for index in range(len(values) - 1, -1, -1):
+        if values[index] != "--":
+            return {"time": measurement_times[index], "value": float(values[index])}
     return {"time": datetime.now().strftime("%Y-%m-%d %H:%M"), "value": None}
 
 
@@ -9,6 +9,15 @@ from custom_components.fusionsolarplus.api.devices import inverter_api
 
 def get_powersensor_data(client: Any, device_dn: str | None = None) -> dict:
     raw_data = inverter_api.get_real_time_data(client, device_dn)
+    return _normalize_powersensor_payload(raw_data)
+
+
+async def async_get_powersensor_data(client: Any, device_dn: str | None = None) -> dict:
+    raw_data = await inverter_api.async_get_real_time_data(client, device_dn)
+    return _normalize_powersensor_payload(raw_data)
+
+
+def _normalize_powersensor_payload(raw_data: dict) -> dict:
     value_map: dict[int, Any] = {}
     all_signal_ids: set[int] = set()
 
@@ -1,4 +1,13 @@
-"""Collection of Exception classes used by the FusionSolar package"""
+"""Collection of Exception classes used by the FusionSolar package
+
+Errors of requests are classified by what helps against them:
+- TransientException (NetworkException, ServerErrorException): repeating the request
+- FusionSolarRateLimit: waiting before sending any further request
+- SessionExpiredException: logging in again, then repeating the request
+- AuthenticationException: nothing but new credentials
+- PayloadSchemaException: nothing, the response is not what the API module expects
+- ClientErrorException: nothing, FusionSolar rejected the request itself (HTTP 4xx)
+"""
 
 
 class FusionSolarException(Exception):
@@ -13,6 +22,18 @@ class AuthenticationException(FusionSolarException):
     pass
 
 
+class SessionExpiredException(FusionSolarException):
+    """The session is no longer valid and a new login is required"""
+
+    pass
+
+
+class LoginCooldownException(FusionSolarException):
+    """A recent login failed, no new login is attempted until the cooldown is over"""
+
+    pass
+
+
 class CaptchaRequiredException(FusionSolarException):
     """A captcha is required for the login flow to proceed"""
 
@@ -20,6 +41,40 @@ class CaptchaRequiredException(FusionSolarException):
 
 
 class FusionSolarRateLimit(FusionSolarException):
-    """Exception raised when the rate limit exceeded"""
+    """Exception raised when the rate limit exceeded (also HTTP 429)"""
 
     pass
+
+
+class TransientException(FusionSolarException):
+    """A request failed for a reason that usually passes, it can be sent again"""
+
+    pass
+
+
+class NetworkException(TransientException):
+    """No response was received: connection errors and timeouts"""
+
+    pass
+
+
+class ServerErrorException(TransientException):
+    """FusionSolar answered with a server error (HTTP 5xx)"""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+class PayloadSchemaException(FusionSolarException):
+    """A response does not have the structure the API module expects"""
+
+    pass
+
+
+class ClientErrorException(FusionSolarException):
+    """FusionSolar rejected the request (HTTP 4xx other than 401 and 429)"""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
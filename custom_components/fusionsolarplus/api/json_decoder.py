@@ -0,0 +1,74 @@
+"""JSON decoding of FusionSolar responses.
+
+Architecture overview for contributors:
+- `loads` uses orjson when it is installed (Home Assistant ships it) and the standard
+  library otherwise.
+- History responses used to be decoded with a `parse_float` hook that built a Decimal
+  for every number, to replace the MAX_JS_NUMBER sentinel with 0.0 and round to
+  8 decimals. `loads(..., normalize_floats=True)` decodes the document first and then
+  fixes all floats in one pass over the decoded containers, in place.
+- Nearly all values FusionSolar sends have at most 3 decimals. They are recognized with
+  a multiplication and left alone, only the rare longer values pay for `round`.
+  Rounding the float instead of its decimal string only differs from the Decimal hook
+  for values that end in an exact tie at the 9th decimal.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sys
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+_LOGGER = logging.getLogger(__name__)
+
+FLOAT_DECIMALS = 8
+_FLOAT_SCALE = 10.0**FLOAT_DECIMALS
+# largest number of JavaScript, FusionSolar sends it for missing values
+MAX_JS_NUMBER = sys.float_info.max
+
+
+def _normalize_floats(container: dict | list) -> int:
+    """Rounds all floats in the container and its children, replaces MAX_JS_NUMBER.
+
+    Returns the number of replaced MAX_JS_NUMBER values.
+    """
+    replaced = 0
+    items = container.items() if type(container) is dict else enumerate(container)
+    for key, value in items:
+        value_type = type(value)
+        if value_type is float:
+            if value == MAX_JS_NUMBER:
+                container[key] = 0.0
+                replaced += 1
+            elif not (value * _FLOAT_SCALE).is_integer():
+                container[key] = round(value, FLOAT_DECIMALS)
+        elif value_type is dict or value_type is list:
+            replaced += _normalize_floats(value)
+    return replaced
+
+
+def loads(content: bytes | str, normalize_floats: bool = False) -> Any:
+    """Decodes a JSON document. Raises json.JSONDecodeError for invalid documents.
+
+    :param content: The JSON document
+    :type content: bytes
+    :param normalize_floats: Replace the MAX_JS_NUMBER sentinel with 0.0 and round all
+                             floats to 8 decimals
+    :type normalize_floats: bool
+    """
+    data = orjson.loads(content) if orjson is not None else json.loads(content)
+
+    if normalize_floats:
+        if type(data) is float:
+            return 0.0 if data == MAX_JS_NUMBER else round(data, FLOAT_DECIMALS)
+        if type(data) is dict or type(data) is list:
+            replaced = _normalize_floats(data)
+            if replaced:
+                _LOGGER.warning("replaced %d MAX JS NUMBER values with 0.0", replaced)
+    return data
@@ -0,0 +1,282 @@
+"""Request metrics of a FusionSolar account.
+
+Architecture overview for contributors:
+- Both clients report every request they send to the `ClientMetrics` of the
+  synchronous client: the endpoint (URL path), its latency, the size of the response
+  and whether it failed. Responses served by the response cache or shared by an
+  identical request in flight are no requests and are not reported.
+- Latencies are counted in fixed, logarithmically spaced buckets. Recording a request
+  is a dictionary lookup, a bisect and a few additions under a lock; percentiles are
+  estimated from the buckets when they are read.
+- Requests are attributed to the config entry whose update started them through the
+  `request_source` context variable. asyncio tasks inherit it, executor threads do
+  not, so requests of the synchronous client only count for the account.
+- Logins are reported with their reason. Retries are counted once, by the layer that
+  retries: single requests retried by the asyncio client (`retries`), and whole
+  coordinator updates retried by the device handler (`update_retries`).
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any
+from urllib.parse import urlsplit
+
+# config entry whose update is sending the current requests
+request_source: ContextVar[str | None] = ContextVar(
+    "fusionsolar_request_source", default=None
+)
+
+# upper bounds of the latency buckets in seconds, from 10ms to about 90s (factor 1.25)
+LATENCY_BUCKETS = tuple(0.01 * 1.25**index for index in range(42))
+
+LOGIN_REASONS = ("initial", "restored", "expired", "renewal")
+
+
+def _latency_percentile(buckets: list[int], pct: float) -> float | None:
+    """Estimates a percentile from bucket counts, as the upper bound of its bucket."""
+    total = sum(buckets)
+    if not total:
+        return None
+    rank = pct / 100 * total
+    seen = 0
+    for index, count in enumerate(buckets):
+        seen += count
+        if seen >= rank:
+            break
+    # the last bucket counts everything slower than the largest bound
+    return LATENCY_BUCKETS[min(index, len(LATENCY_BUCKETS) - 1)]
+
+
+class _HourlyCounter:
+    """Counts events of the last hour in 60 buckets of one minute"""
+
+    __slots__ = ("minutes", "counts")
+
+    def __init__(self):
+        self.minutes = [-1] * 60
+        self.counts = [0] * 60
+
+    def add(self, now: float) -> None:
+        minute = int(now // 60)
+        slot = minute % 60
+        if self.minutes[slot] != minute:
+            self.minutes[slot] = minute
+            self.counts[slot] = 0
+        self.counts[slot] += 1
+
+    def total(self, now: float) -> int:
+        oldest = int(now // 60) - 59
+        return sum(
+            count
+            for minute, count in zip(self.minutes, self.counts)
+            if minute >= oldest
+        )
+
+
+class _EndpointStats:
+    __slots__ = ("requests", "errors", "bytes", "latency_sum", "latency_max", "buckets")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+class _SourceStats:
+    __slots__ = ("requests", "retries", "update_retries", "last_hour")
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.update_retries = 0
+        self.last_hour = _HourlyCounter()
+
+
+class ClientMetrics:
+    """Request counts, latencies, response sizes, retries and logins of one account"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self._endpoints: dict[str, _EndpointStats] = {}
+        self._sources: dict[str, _SourceStats] = {}
+        self._last_hour = _HourlyCounter()
+        self._logins = {
+            reason: {"succeeded": 0, "failed": 0} for reason in LOGIN_REASONS
+        }
+        self._last_login: dict[str, Any] | None = None
+
+    def record_request(
+        self, url: str, duration: float, size: int = 0, error: bool = False
+    ) -> None:
+        """Reports a request that was sent.
+
+        :param url: URL of the request, only its path is kept
+        :type url: str
+        :param duration: Seconds until the response was read or the request failed
+        :type duration: float
+        :param size: Bytes of the response body
+        :type size: int
+        :param error: Whether the request failed
+        :type error: bool
+        """
+        path = urlsplit(url).path
+        source = request_source.get()
+        now = time.time()
+        with self._lock:
+            stats = self._endpoints.get(path)
+            if stats is None:
+                stats = self._endpoints[path] = _EndpointStats()
+            stats.requests += 1
+            stats.errors += error
+            stats.bytes += size
+            stats.latency_sum += duration
+            if duration > stats.latency_max:
+                stats.latency_max = duration
+            stats.buckets[bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+            self._last_hour.add(now)
+
+            if source is not None:
+                source_stats = self._source(source)
+                source_stats.requests += 1
+                source_stats.last_hour.add(now)
+
+    def record_retry(self, source: str) -> None:
+        """Reports that a request of a config entry is sent again after a failure."""
+        with self._lock:
+            self._source(source).retries += 1
+
+    def record_update_retry(self, source: str) -> None:
+        """Reports that an update of a config entry is retried after a failure."""
+        with self._lock:
+            self._source(source).update_retries += 1
+
+    def record_login(self, reason: str, succeeded: bool) -> None:
+        """Reports a login, or the restore of a stored session.
+
+        :param reason: One of LOGIN_REASONS
+        :type reason: str
+        """
+        with self._lock:
+            self._logins[reason]["succeeded" if succeeded else "failed"] += 1
+            self._last_login = {
+                "reason": reason,
+                "succeeded": succeeded,
+                "time": time.time(),
+            }
+
+    def _source(self, source: str) -> _SourceStats:
+        stats = self._sources.get(source)
+        if stats is None:
+            stats = self._sources[source] = _SourceStats()
+        return stats
+
+    def requests_last_hour(self, source: str | None = None) -> int:
+        """Requests of the last hour, of the account or of one config entry"""
+        now = time.time()
+        with self._lock:
+            if source is None:
+                return self._last_hour.total(now)
+            stats = self._sources.get(source)
+            return stats.last_hour.total(now) if stats else 0
+
+    def retries(self, source: str) -> int:
+        with self._lock:
+            stats = self._sources.get(source)
+            return stats.retries if stats else 0
+
+    def update_retries(self, source: str) -> int:
+        with self._lock:
+            stats = self._sources.get(source)
+            return stats.update_retries if stats else 0
+
+    def latency_percentile(
+        self, pct: float, endpoint: str | None = None
+    ) -> float | None:
+        """Estimated latency percentile in seconds, of one endpoint or of all requests
+
+        :param endpoint: URL or path of the endpoint. None combines all endpoints.
+        :type endpoint: str
+        """
+        with self._lock:
+            if endpoint is not None:
+                stats = self._endpoints.get(urlsplit(endpoint).path)
+                buckets = list(stats.buckets) if stats else []
+            else:
+                buckets = [
+                    sum(column)
+                    for column in zip(
+                        *(stats.buckets for stats in self._endpoints.values())
+                    )
+                ]
+        return _latency_percentile(buckets, pct)
+
+    @property
+    def requests(self) -> int:
+        with self._lock:
+            return sum(stats.requests for stats in self._endpoints.values())
+
+    @property
+    def errors(self) -> int:
+        with self._lock:
+            return sum(stats.errors for stats in self._endpoints.values())
+
+    @property
+    def bytes_received(self) -> int:
+        with self._lock:
+            return sum(stats.bytes for stats in self._endpoints.values())
+
+    @property
+    def logins(self) -> int:
+        """Logins that were attempted, without restored sessions"""
+        with self._lock:
+            return sum(
+                counts["succeeded"] + counts["failed"]
+                for reason, counts in self._logins.items()
+                if reason != "restored"
+            )
+
+    def snapshot(self) -> dict[str, Any]:
+        """Returns all metrics as a JSON serializable dict, e.g. for diagnostics."""
+        now = time.time()
+        with self._lock:
+            endpoints = {
+                path: {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "bytes": stats.bytes,
+                    "latency_mean": stats.latency_sum / stats.requests,
+                    "latency_max": stats.latency_max,
+                    "latency_p50": _latency_percentile(stats.buckets, 50),
+                    "latency_p95": _latency_percentile(stats.buckets, 95),
+                    "latency_p99": _latency_percentile(stats.buckets, 99),
+                }
+                for path, stats in sorted(self._endpoints.items())
+                if stats.requests
+            }
+            sources = {
+                source: {
+                    "requests": stats.requests,
+                    "requests_last_hour": stats.last_hour.total(now),
+                    "retries": stats.retries,
+                    "update_retries": stats.update_retries,
+                }
+                for source, stats in self._sources.items()
+            }
+            return {
+                "since": self.started_at,
+                "requests_last_hour": self._last_hour.total(now),
+                "endpoints": endpoints,
+                "config_entries": sources,
+                "logins": {
+                    reason: dict(counts) for reason, counts in self._logins.items()
+                },
+                "last_login": dict(self._last_login) if self._last_login else None,
+            }
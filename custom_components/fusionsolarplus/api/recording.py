@@ -0,0 +1,420 @@
+"""Recording and replay of the HTTP traffic of a FusionSolar account.
+
+Architecture overview for contributors:
+- A transport is passed to `FusionSolarClient(transport=...)`. The client mounts it on
+  every requests session it creates, and the asyncio client consults it for every
+  request it sends, so both clients are covered.
+- `TrafficRecorder` writes every request/response pair to gzip compressed JSON lines
+  files in a directory. The files form a ring buffer: a new file is started after
+  `segment_records` exchanges and the oldest file is deleted once there are more than
+  `max_segments`.
+- Before anything is written, credentials are scrubbed: cookies, the roarand token,
+  user names, passwords, verification codes and login tickets, wherever they appear
+  (headers, query, request body, JSON response). Fields are scrubbed by their name,
+  and inside any other text (e.g. a redirect URL in a login response) the values of
+  `name=value` pairs with such a name and CAS service tickets are replaced. HTML
+  responses (login pages) are not stored at all, only their status and headers.
+- `TrafficReplayer` serves the recordings of a directory instead of sending requests.
+  A request is answered with the next recording of the same method, path, query
+  (without the `_` cache buster) and body. If there is none, recordings of the same
+  method and path are used, so requests for other dates or devices still get a
+  realistic answer. Recordings are served in order and start over at the end.
+- Replayed responses take as long as the recorded ones, multiplied by `latency_scale`
+  (0 serves them immediately).
+"""
+
+from __future__ import annotations
+
+import base64
+import glob
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+from http import HTTPStatus
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .exceptions import FusionSolarException
+
+_LOGGER = logging.getLogger(__name__)
+
+SCRUBBED = "<scrubbed>"
+
+# headers that carry the session
+SCRUBBED_HEADERS = {"cookie", "set-cookie", "roarand", "authorization"}
+# response headers that are kept, everything else is dropped
+RECORDED_HEADERS = {"content-type", "location"}
+
+# names (lower case) of query parameters, form fields and JSON keys with credentials.
+# The keep-alive response carries the roarand token as its payload.
+SCRUBBED_FIELDS = {
+    "username",
+    "password",
+    "verifycode",
+    "loginname",
+    "ticket",
+    "token",
+    "roarand",
+    "payload",
+    "email",
+    "phone",
+    "mobile",
+}
+
+# `name=value` pairs of credential fields within text (any name ending in ticket or
+# token), also if the text is a URL that is percent-encoded in the query of another URL
+_SCRUBBED_PAIR = re.compile(
+    r"(?i)(?:(?<![\w-])|(?<=%3F)|(?<=%26))("
+    + "|".join(sorted(SCRUBBED_FIELDS - {"ticket", "token"}))
+    + r"|[\w-]*ticket|[\w-]*token)(=|%3D)[^&#\s\"'<>]+"
+)
+# CAS service tickets, e.g. ST-1234-aBcD-sso
+_SERVICE_TICKET = re.compile(r"\bST-\d+-[\w.-]+")
+
+SEGMENT_PATTERN = "traffic-*.jsonl.gz"
+_SEGMENT_INDEX = re.compile(r"traffic-(\d+)\.jsonl\.gz$")
+
+
+def scrub_text(text: str) -> str:
+    """Returns the text with credentials in `name=value` pairs and service tickets
+    replaced"""
+    if "=" not in text and "%3" not in text and "ST-" not in text:
+        return text
+    text = _SCRUBBED_PAIR.sub(lambda match: match[1] + match[2] + SCRUBBED, text)
+    return _SERVICE_TICKET.sub(SCRUBBED, text)
+
+
+def _scrub_pairs(pairs: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    return [
+        (key, SCRUBBED if key.lower() in SCRUBBED_FIELDS else scrub_text(value))
+        for key, value in pairs
+    ]
+
+
+def scrub_url(url: str) -> str:
+    """Returns the URL with the values of credential query parameters replaced"""
+    parts = urlsplit(url)
+    if not parts.query:
+        return url
+    query = urlencode(_scrub_pairs(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit(parts._replace(query=query))
+
+
+def scrub_json(value: Any) -> Any:
+    """Returns a copy of a decoded JSON document with credential values replaced"""
+    if isinstance(value, dict):
+        return {
+            key: SCRUBBED
+            if isinstance(key, str) and key.lower() in SCRUBBED_FIELDS
+            else scrub_json(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [scrub_json(item) for item in value]
+    if isinstance(value, str):
+        return scrub_text(value)
+    return value
+
+
+def scrub_body(body: Any) -> str | None:
+    """Returns a request body (JSON, form data or a dict of fields) as scrubbed text"""
+    if body is None:
+        return None
+    if isinstance(body, dict):
+        return urlencode(
+            _scrub_pairs([(key, str(value)) for key, value in body.items()])
+        )
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", "replace")
+    try:
+        return json.dumps(scrub_json(json.loads(body)), sort_keys=True)
+    except ValueError:
+        pass
+    if "=" in body:
+        return urlencode(_scrub_pairs(parse_qsl(body, keep_blank_values=True)))
+    return scrub_text(body)
+
+
+def _request_key(method: str, url: str, body: str | None) -> tuple:
+    parts = urlsplit(url)
+    query = tuple(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key != "_"
+        )
+    )
+    return method.upper(), parts.path, query, body or ""
+
+
+class RecordedExchange:
+    """A recorded request together with its response"""
+
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        body: str | None,
+        status: int,
+        headers: dict[str, str],
+        content: bytes,
+        elapsed: float,
+    ):
+        self.method = method
+        self.url = url
+        self.body = body
+        self.status = status
+        self.headers = headers
+        self.content = content
+        self.elapsed = elapsed
+
+    @classmethod
+    def from_record(cls, record: dict) -> RecordedExchange:
+        if record.get("encoding") == "base64":
+            content = base64.b64decode(record["response"])
+        elif record.get("response") is None:
+            content = b""
+        else:
+            content = json.dumps(record["response"]).encode()
+        return cls(
+            record["method"],
+            record["url"],
+            record.get("body"),
+            record["status"],
+            record.get("headers", {}),
+            content,
+            record.get("elapsed", 0.0),
+        )
+
+    def __repr__(self):
+        return f"RecordedExchange({self.method} {self.url} -> {self.status})"
+
+
+class TrafficRecorder:
+    """Writes scrubbed request/response pairs to a ring buffer of compressed files"""
+
+    def __init__(
+        self, directory: str, segment_records: int = 500, max_segments: int = 20
+    ):
+        """
+        :param directory: Directory of the recordings, created if needed
+        :type directory: str
+        :param segment_records: Exchanges per file
+        :type segment_records: int
+        :param max_segments: Files that are kept, the oldest file is deleted first
+        :type max_segments: int
+        """
+        self.directory = directory
+        self.segment_records = segment_records
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+        self._file = None
+        self._records = 0
+
+        os.makedirs(directory, exist_ok=True)
+        indexes = [index for index, _ in self._segments()]
+        self._index = max(indexes, default=0)
+
+    def _segments(self) -> list[tuple[int, str]]:
+        segments = []
+        for path in glob.glob(os.path.join(self.directory, SEGMENT_PATTERN)):
+            match = _SEGMENT_INDEX.search(path)
+            if match:
+                segments.append((int(match.group(1)), path))
+        return sorted(segments)
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._index += 1
+        self._records = 0
+        path = os.path.join(self.directory, f"traffic-{self._index:06d}.jsonl.gz")
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+
+        segments = self._segments()
+        for _, old_path in segments[: max(0, len(segments) - self.max_segments)]:
+            os.remove(old_path)
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        body: Any,
+        status: int,
+        headers: Any,
+        content: bytes,
+        elapsed: float,
+    ) -> None:
+        """Scrubs a request/response pair and appends it to the current file."""
+        headers = {
+            key.lower(): SCRUBBED if key.lower() in SCRUBBED_HEADERS else value
+            for key, value in headers.items()
+            if key.lower() in RECORDED_HEADERS
+        }
+        if "location" in headers:
+            headers["location"] = scrub_url(headers["location"])
+
+        record = {
+            "time": time.time(),
+            "method": method.upper(),
+            "url": scrub_url(url),
+            "body": scrub_body(body),
+            "status": status,
+            "headers": headers,
+            "elapsed": round(elapsed, 4),
+        }
+        content_type = headers.get("content-type", "")
+        if "text/html" in content_type or not content:
+            record["response"] = None
+        else:
+            try:
+                record["response"] = scrub_json(json.loads(content))
+            except ValueError:
+                record["response"] = base64.b64encode(content).decode()
+                record["encoding"] = "base64"
+
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None or self._records >= self.segment_records:
+                self._rotate()
+            self._file.write(line)
+            self._file.flush()
+            self._records += 1
+
+    def mount(self, session: requests.Session) -> None:
+        """Records all requests of a requests session."""
+        adapter = RecordingAdapter(self)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class TrafficReplayer:
+    """Answers requests with the recordings of a TrafficRecorder"""
+
+    def __init__(self, directory: str, latency_scale: float = 1.0):
+        """
+        :param directory: Directory of the recordings
+        :type directory: str
+        :param latency_scale: Factor for the recorded latencies, 0 for none
+        :type latency_scale: float
+        """
+        self.directory = directory
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        # exact request key / (method, path) -> recordings and the next one to serve
+        self._exact: dict[tuple, list] = {}
+        self._by_path: dict[tuple, list] = {}
+
+        for path in sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN))):
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                try:
+                    for line in file:
+                        self._add(RecordedExchange.from_record(json.loads(line)))
+                except (EOFError, ValueError) as e:
+                    # the last file may have been cut off while it was written
+                    _LOGGER.debug("Stopped reading %s: %s", path, e)
+
+        if not self._by_path:
+            raise FusionSolarException(f"No recorded traffic found in {directory}")
+
+    def _add(self, exchange: RecordedExchange) -> None:
+        key = _request_key(exchange.method, exchange.url, exchange.body)
+        self._exact.setdefault(key, [[], 0])[0].append(exchange)
+        self._by_path.setdefault(key[:2], [[], 0])[0].append(exchange)
+
+    def find(self, method: str, url: str, body: Any = None) -> RecordedExchange:
+        """Returns the recording that answers a request.
+
+        :raises FusionSolarException: Nothing was recorded for the endpoint
+        """
+        key = _request_key(method, scrub_url(url), scrub_body(body))
+        with self._lock:
+            candidates = self._exact.get(key) or self._by_path.get(key[:2])
+            if candidates is None:
+                raise FusionSolarException(
+                    f"No recording for {method} {urlsplit(url).path}"
+                )
+            exchanges, position = candidates
+            candidates[1] = (position + 1) % len(exchanges)
+            return exchanges[position]
+
+    def latency(self, exchange: RecordedExchange) -> float:
+        return exchange.elapsed * self.latency_scale
+
+    def mount(self, session: requests.Session) -> None:
+        """Answers all requests of a requests session from the recordings."""
+        adapter = ReplayAdapter(self)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+    def close(self) -> None:
+        pass
+
+
+class RecordingAdapter(HTTPAdapter):
+    """requests transport adapter that passes every exchange to a TrafficRecorder"""
+
+    def __init__(self, recorder: TrafficRecorder, **kwargs):
+        super().__init__(**kwargs)
+        self.recorder = recorder
+
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        try:
+            self.recorder.record(
+                request.method,
+                request.url,
+                request.body,
+                response.status_code,
+                response.headers,
+                response.content,
+                time.perf_counter() - start,
+            )
+        except Exception as e:
+            _LOGGER.warning("Failed to record %s: %s", request.url, e)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """requests transport adapter that answers from a TrafficReplayer"""
+
+    def __init__(self, replayer: TrafficReplayer):
+        super().__init__()
+        self.replayer = replayer
+
+    def send(self, request, **kwargs):
+        exchange = self.replayer.find(request.method, request.url, request.body)
+        latency = self.replayer.latency(exchange)
+        if latency > 0:
+            time.sleep(latency)
+
+        response = requests.Response()
+        response.status_code = exchange.status
+        response.headers = CaseInsensitiveDict(exchange.headers)
+        response._content = exchange.content
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        try:
+            response.reason = HTTPStatus(exchange.status).phrase
+        except ValueError:
+            response.reason = ""
+        return response
+
+    def close(self):
+        pass
@@ -0,0 +1,180 @@
+"""Response cache for endpoints whose data rarely changes.
+
+Architecture overview for contributors:
+- Which endpoints are cached, for how long and how many distinct requests per endpoint
+  are kept is declared in `CACHE_POLICIES`. Endpoints without a policy are never cached.
+- Requests are identified by method, URL path, parameters (without the `_` cache
+  buster) and JSON body. Only successful, decoded JSON responses are stored.
+- The cache is shared by the synchronous and the asyncio client, so it is guarded by
+  a lock. Callers always receive their own copy of a cached response.
+- Code that knows the data of an endpoint changed (e.g. new hardware was detected)
+  calls `invalidate` for that endpoint, or `invalidate_request` if only the response
+  of one request (e.g. of one device) is affected.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+from urllib.parse import urlsplit
+
+
+class CachePolicy:
+    """How the responses of one endpoint are cached"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        """
+        :param ttl: Seconds a response is served from the cache
+        :type ttl: float
+        :param max_entries: Number of distinct requests that are kept. Once exceeded,
+                            the least recently used response is dropped.
+        :type max_entries: int
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def __repr__(self):
+        return f"CachePolicy(ttl={self.ttl}, max_entries={self.max_entries})"
+
+
+# Endpoints that change far less often than they are polled. The energy balance of a
+# plant is paced by `plant_api` itself and therefore not listed here.
+CACHE_POLICIES = {
+    # only change when hardware is added or removed
+    "/rest/pvms/web/station/v1/station/station-list": CachePolicy(60 * 60, 4),
+    "/rest/neteco/web/config/device/v1/device-list": CachePolicy(60 * 60, 8),
+    "/rest/dp/pvms/organization/v1/tree": CachePolicy(24 * 60 * 60, 32),
+    "/rest/pvms/web/device/v1/mo-details": CachePolicy(24 * 60 * 60, 32),
+    # signals offered by a device, used to discover the connected PV strings
+    "/rest/pvms/web/device/v1/device-statistics-signal": CachePolicy(6 * 60 * 60, 64),
+}
+
+
+class ResponseCache:
+    """TTL and LRU bound cache of decoded JSON responses"""
+
+    def __init__(self, policies: dict[str, CachePolicy] | None = None):
+        self._policies = CACHE_POLICIES if policies is None else policies
+        self._lock = threading.Lock()
+        # endpoint path -> request key -> (expiry time, response)
+        self._entries: dict[str, OrderedDict[tuple, tuple[float, Any]]] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def _lookup(self, method: str, url: str, params: Any, json_body: Any):
+        path = urlsplit(url).path
+        policy = self._policies.get(path)
+        if policy is None:
+            return None, None, None
+
+        if isinstance(params, dict):
+            params = params.items()
+        key = (
+            method,
+            tuple(
+                (k, str(item))
+                for k, v in params or ()
+                if k != "_"
+                for item in (v if isinstance(v, (list, tuple)) else [v])
+                if item is not None
+            ),
+            json.dumps(json_body, sort_keys=True, default=str),
+        )
+        return path, policy, key
+
+    def _count(self, path: str, stat: str, amount: int = 1) -> None:
+        stats = self._stats.setdefault(
+            path, {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        )
+        stats[stat] += amount
+
+    def get(
+        self, method: str, url: str, params: Any = None, json_body: Any = None
+    ) -> tuple[bool, Any]:
+        """Looks up the response of a request.
+
+        :return: Whether the response was cached, and a copy of the response if so
+        :rtype: tuple
+        """
+        path, policy, key = self._lookup(method, url, params, json_body)
+        if policy is None:
+            return False, None
+
+        with self._lock:
+            entries = self._entries.get(path, {})
+            entry = entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._count(path, "misses")
+                return False, None
+
+            entries.move_to_end(key)
+            self._count(path, "hits")
+            response = entry[1]
+
+        return True, copy.deepcopy(response)
+
+    def put(
+        self,
+        method: str,
+        url: str,
+        response: Any,
+        params: Any = None,
+        json_body: Any = None,
+    ) -> None:
+        """Stores the response of a request if its endpoint has a cache policy."""
+        path, policy, key = self._lookup(method, url, params, json_body)
+        if policy is None:
+            return
+        if isinstance(response, dict) and response.get("success") is False:
+            return
+
+        response = copy.deepcopy(response)
+        with self._lock:
+            entries = self._entries.setdefault(path, OrderedDict())
+            entries[key] = (time.monotonic() + policy.ttl, response)
+            entries.move_to_end(key)
+            while len(entries) > policy.max_entries:
+                entries.popitem(last=False)
+                self._count(path, "evictions")
+
+    def invalidate(self, endpoint: str | None = None) -> None:
+        """Drops the cached responses of an endpoint, or of all endpoints.
+
+        :param endpoint: URL or path of the endpoint. None drops everything.
+        :type endpoint: str
+        """
+        with self._lock:
+            if endpoint is None:
+                paths = list(self._entries)
+            else:
+                paths = [urlsplit(endpoint).path]
+
+            for path in paths:
+                entries = self._entries.pop(path, None)
+                if entries:
+                    self._count(path, "invalidations", len(entries))
+
+    def invalidate_request(
+        self, method: str, url: str, params: Any = None, json_body: Any = None
+    ) -> None:
+        """Drops the cached response of a single request."""
+        path, policy, key = self._lookup(method, url, params, json_body)
+        if policy is None:
+            return
+
+        with self._lock:
+            entries = self._entries.get(path)
+            if entries and entries.pop(key, None) is not None:
+                self._count(path, "invalidations")
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Returns hits, misses, evictions, invalidations and the current number of
+        entries per endpoint."""
+        with self._lock:
+            return {
+                path: {**stats, "entries": len(self._entries.get(path, ()))}
+                for path, stats in self._stats.items()
+            }
@@ -0,0 +1,351 @@
+"""Account-scoped registry of shared FusionSolar clients.
+
+Design notes for contributors:
+- Every config entry represents a single device, but most users add several devices
+  of the same FusionSolar account. Entries with the same username and subdomain share
+  one `FusionSolarClient` (and therefore one HTTP session and one login).
+- Clients are reference-counted: the client is created by the first entry that needs it
+  and dropped once the last entry using it is unloaded.
+- Next to the synchronous client (logins, config flow, switches) every account has an
+  `AsyncFusionSolarClient` that the coordinators await for their data requests.
+- Re-logins are performed by the clients themselves when a response shows that the
+  session expired. There is only one login per account at a time, callers that were
+  waiting for it reuse its result, and a failed login starts a cooldown during which
+  no login is attempted (see `FusionSolarClient.reset_session`).
+- Every account has an `AccountCoordinator` that polls all its devices in one cycle
+  (`account_coordinator.py`). Entries are removed from it when they release the
+  client.
+- The account of an entry is remembered when it acquires the client. The options
+  flow can change the username or subdomain of an entry, the entry then still
+  releases the account it acquired while it is reloaded.
+- Every account has a background task that keeps its session alive the way the web
+  app does, and replaces the session with a new login before it gets too old. Logins
+  therefore rarely happen in the middle of a data poll.
+- The account-level metric sensors (`metrics_sensor.py`) are added by one entry of
+  the account, on an account device. Once that entry is unloaded, the next entry of
+  the account adds them.
+- Login captchas are solved with the ONNX model an entry configured in its options,
+  or by the Gradio spaces if no entry of the account has one.
+- The session of every account is kept in the integration storage, so after a restart
+  the client continues it instead of logging in again (if it is still alive).
+- For profiling, the traffic of every account can be recorded, or all requests can be
+  answered from recordings instead of the FusionSolar cloud (`api/recording.py`). This
+  is a developer option and set through environment variables, see
+  `create_transport`. In the same way all requests can be sent to another server than
+  the FusionSolar cloud, e.g. the stub server of `scripts/stub_server.py`.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from functools import partial
+from typing import Callable, Dict, Optional, Set, Tuple
+
+import aiohttp
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.util import dt as dt_util
+
+from .account_coordinator import AccountCoordinator
+from .api.async_client import AsyncFusionSolarClient
+from .api.client import FusionSolarClient
+from .api.exceptions import LoginCooldownException
+from .api.recording import TrafficRecorder, TrafficReplayer
+from .storage import FusionSolarStorage, async_get_storage
+from .const import (
+    CONF_CAPTCHA_MODEL,
+    CONF_PASSWORD,
+    CONF_SUBDOMAIN,
+    CONF_USERNAME,
+    DATA_CLIENT_POOL,
+    DEFAULT_SUBDOMAIN,
+    DOMAIN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+SUBDOMAIN_SUFFIX = ".fusionsolar.huawei.com"
+
+# the web app calls keep-alive about every 30 seconds
+KEEP_ALIVE_INTERVAL = 30
+
+# sessions are replaced by a new login once they are this old. FusionSolar does not
+# announce when a session ends, this stays well below the lifetimes observed so far.
+SESSION_RENEW_AGE = 4 * 60 * 60
+
+# directory the traffic of every account is recorded to, in a subdirectory per account
+ENV_RECORD_DIR = "FUSIONSOLAR_RECORD_DIR"
+# directory with recordings that answer all requests instead of the FusionSolar cloud
+ENV_REPLAY_DIR = "FUSIONSOLAR_REPLAY_DIR"
+# factor for the recorded latencies during a replay, 0 answers right away
+ENV_REPLAY_LATENCY_SCALE = "FUSIONSOLAR_REPLAY_LATENCY_SCALE"
+# base URL of a server that answers all requests instead of the FusionSolar cloud
+ENV_BASE_URL = "FUSIONSOLAR_BASE_URL"
+
+
+def get_account_credentials(entry: ConfigEntry) -> Tuple[str, str, str]:
+    """Return the (username, password, subdomain) configured for an entry."""
+    username = entry.options.get(CONF_USERNAME, entry.data[CONF_USERNAME])
+    password = entry.options.get(CONF_PASSWORD, entry.data[CONF_PASSWORD])
+    subdomain = entry.options.get(
+        CONF_SUBDOMAIN, entry.data.get(CONF_SUBDOMAIN, DEFAULT_SUBDOMAIN)
+    )
+    return username, password, subdomain
+
+
+def get_captcha_model(entry: ConfigEntry) -> Optional[str]:
+    """Return the path of the captcha model configured for an entry, if any."""
+    return entry.options.get(CONF_CAPTCHA_MODEL) or None
+
+
+def get_account_key(entry: ConfigEntry) -> Tuple[str, str]:
+    """Return the key that identifies the FusionSolar account of an entry."""
+    username, _, subdomain = get_account_credentials(entry)
+    while subdomain.endswith(SUBDOMAIN_SUFFIX):
+        subdomain = subdomain[: -len(SUBDOMAIN_SUFFIX)]
+    return username, subdomain
+
+
+def get_storage_account(key: Tuple[str, str]) -> str:
+    """Return the name under which the data of an account is stored."""
+    username, subdomain = key
+    return f"{username}@{subdomain}"
+
+
+def get_account_id(key: Tuple[str, str]) -> str:
+    """Return an id of an account that does not reveal the username."""
+    return hashlib.sha256(get_storage_account(key).encode()).hexdigest()[:12]
+
+
+def create_transport(key: Tuple[str, str]):
+    """Return the recording or replaying transport configured for an account, if any.
+
+    Does blocking I/O, a replay reads all recordings.
+    """
+    replay_dir = os.environ.get(ENV_REPLAY_DIR)
+    if replay_dir:
+        scale = float(os.environ.get(ENV_REPLAY_LATENCY_SCALE, "1"))
+        _LOGGER.warning("Answering requests from the recordings in %s", replay_dir)
+        return TrafficReplayer(replay_dir, latency_scale=scale)
+
+    record_dir = os.environ.get(ENV_RECORD_DIR)
+    if record_dir:
+        # the directory name must not reveal the user name
+        account = get_account_id(key)
+        _LOGGER.warning("Recording the requests of %s to %s", key, record_dir)
+        return TrafficRecorder(os.path.join(record_dir, account))
+    return None
+
+
+def get_client_pool(hass: HomeAssistant) -> "ClientPool":
+    """Return the client pool of this Home Assistant instance, creating it if needed."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    pool = domain_data.get(DATA_CLIENT_POOL)
+    if pool is None:
+        pool = ClientPool(hass)
+        domain_data[DATA_CLIENT_POOL] = pool
+    return pool
+
+
+class SharedClient:
+    """A logged-in client together with the config entries that use it."""
+
+    def __init__(
+        self,
+        client: FusionSolarClient,
+        async_client: AsyncFusionSolarClient,
+        coordinator: AccountCoordinator,
+    ):
+        self.client = client
+        self.async_client = async_client
+        self.coordinator = coordinator
+        self.entry_ids: Set[str] = set()
+        self.keep_alive_task: Optional[asyncio.Task] = None
+        # entry id -> callback adding the account-level metric sensors for the entry,
+        # in the order the entries registered
+        self.metrics_adders: Dict[str, Callable[[], None]] = {}
+        # the entry whose platform holds the account-level metric sensors
+        self.metrics_entry_id: Optional[str] = None
+
+
+class ClientPool:
+    """Hands out one shared FusionSolarClient per FusionSolar account."""
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._clients: Dict[Tuple[str, str], SharedClient] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        # entry id -> key of the account the entry acquired
+        self._entry_keys: Dict[str, Tuple[str, str]] = {}
+
+    async def async_acquire(self, entry: ConfigEntry) -> FusionSolarClient:
+        """Return the client of the entry's account, logging in if there is none yet."""
+        key = get_account_key(entry)
+        username, password, subdomain = get_account_credentials(entry)
+
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            shared = self._clients.get(key)
+            if shared is None:
+                _LOGGER.debug("Creating FusionSolar client for account %s", key)
+                storage = await async_get_storage(self.hass)
+                transport = await self.hass.async_add_executor_job(
+                    create_transport, key
+                )
+                base_url = os.environ.get(ENV_BASE_URL)
+                if base_url:
+                    _LOGGER.warning("Sending the requests of %s to %s", key, base_url)
+                client = await self.hass.async_add_executor_job(
+                    partial(
+                        FusionSolarClient,
+                        username,
+                        password,
+                        captcha_model_path=get_captcha_model(entry) or self.hass,
+                        huawei_subdomain=subdomain,
+                        session_state=storage.get_session(get_storage_account(key)),
+                        transport=transport,
+                        base_url=base_url,
+                    )
+                )
+                self._store_session(storage, key, client)
+                # the totals of the day roll over at midnight of HA's time zone,
+                # not of the host's
+                client.dataset_cache.today = lambda: dt_util.now().date()
+                # HA's connection pool, but without a cookie jar of its own: the
+                # cookies are owned by the session of the synchronous client
+                session = async_create_clientsession(
+                    self.hass, cookie_jar=aiohttp.DummyCookieJar()
+                )
+                async_client = AsyncFusionSolarClient(client, session)
+                shared = SharedClient(
+                    client,
+                    async_client,
+                    AccountCoordinator(self.hass, key, async_client),
+                )
+                shared.keep_alive_task = self.hass.async_create_background_task(
+                    self._async_keep_alive(key, shared),
+                    f"{DOMAIN} keep-alive {key[0]}@{key[1]}",
+                )
+                self._clients[key] = shared
+            else:
+                if shared.client._password != password:
+                    # the password was changed through the options flow of this entry
+                    shared.client._password = password
+                captcha_model = get_captcha_model(entry)
+                if captcha_model and shared.client._captcha_model_path != captcha_model:
+                    # the solver loads the new model for the next captcha
+                    shared.client._captcha_model_path = captcha_model
+                    shared.client._captcha_solver = None
+
+            shared.entry_ids.add(entry.entry_id)
+            self._entry_keys[entry.entry_id] = key
+            _LOGGER.debug(
+                "Account %s is now shared by %d config entries",
+                key,
+                len(shared.entry_ids),
+            )
+            return shared.client
+
+    async def async_release(self, entry: ConfigEntry) -> None:
+        """Drop the entry's reference and close the client once it is no longer used."""
+        key = self._entry_keys.pop(entry.entry_id, None)
+        if key is None:
+            return
+
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            shared = self._clients.get(key)
+            if shared is None:
+                return
+
+            shared.entry_ids.discard(entry.entry_id)
+            shared.coordinator.unregister(entry.entry_id)
+            shared.metrics_adders.pop(entry.entry_id, None)
+            if shared.metrics_entry_id == entry.entry_id:
+                shared.metrics_entry_id = None
+                self._add_account_metrics(shared)
+            if shared.entry_ids:
+                return
+
+            _LOGGER.debug("Closing FusionSolar client for account %s", key)
+            self._clients.pop(key)
+            shared.coordinator.shutdown()
+            shared.keep_alive_task.cancel()
+            # the session stays valid, so the next client of the account can use it
+            self._store_session(await async_get_storage(self.hass), key, shared.client)
+            await shared.async_client.close()
+            await self.hass.async_add_executor_job(shared.client._session.close)
+            if shared.client.transport is not None:
+                await self.hass.async_add_executor_job(shared.client.transport.close)
+
+    def get_client(self, entry: ConfigEntry) -> FusionSolarClient:
+        """Return the client currently used by an entry."""
+        return self._clients[self._entry_keys[entry.entry_id]].client
+
+    def get_async_client(self, entry: ConfigEntry) -> AsyncFusionSolarClient:
+        """Return the asyncio client currently used by an entry."""
+        return self._clients[self._entry_keys[entry.entry_id]].async_client
+
+    def get_account_coordinator(self, entry: ConfigEntry) -> AccountCoordinator:
+        """Return the coordinator that polls the devices of an entry's account."""
+        return self._clients[self._entry_keys[entry.entry_id]].coordinator
+
+    def get_account(self, entry: ConfigEntry) -> Tuple[str, str]:
+        """Return the key of the account an entry acquired."""
+        return self._entry_keys[entry.entry_id]
+
+    def register_account_metrics(
+        self, entry: ConfigEntry, add: Callable[[], None]
+    ) -> None:
+        """Register how an entry adds the account-level metric sensors.
+
+        Only one entry of the account holds them: the first one that registers, and
+        once it is unloaded the next one.
+        """
+        shared = self._clients[self._entry_keys[entry.entry_id]]
+        shared.metrics_adders[entry.entry_id] = add
+        self._add_account_metrics(shared)
+
+    @staticmethod
+    def _add_account_metrics(shared: SharedClient) -> None:
+        if shared.metrics_entry_id is not None or not shared.metrics_adders:
+            return
+        shared.metrics_entry_id, add = next(iter(shared.metrics_adders.items()))
+        add()
+
+    async def _async_keep_alive(self, key: Tuple[str, str], shared: SharedClient):
+        """Keep the session of an account alive and renew it before it gets too old."""
+        while True:
+            await asyncio.sleep(KEEP_ALIVE_INTERVAL)
+            client = shared.client
+            try:
+                if client.session_age >= SESSION_RENEW_AGE:
+                    _LOGGER.debug("Renewing session of account %s", key)
+                    await self.hass.async_add_executor_job(client.renew_session)
+                else:
+                    generation = client.session_generation
+                    # logs in again by itself if the session has already expired
+                    await shared.async_client.keep_alive()
+                    if client.session_generation == generation:
+                        continue
+            except LoginCooldownException as err:
+                _LOGGER.debug("Not renewing session of account %s: %s", key, err)
+                continue
+            except Exception as err:
+                _LOGGER.debug("Keep-alive for account %s failed: %s", key, err)
+                continue
+
+            self._store_session(await async_get_storage(self.hass), key, client)
+
+    async def async_store_session(self, entry: ConfigEntry) -> None:
+        """Store the current session of the entry's account."""
+        key = self._entry_keys.get(entry.entry_id)
+        shared = self._clients.get(key)
+        if shared is not None:
+            self._store_session(await async_get_storage(self.hass), key, shared.client)
+
+    @staticmethod
+    def _store_session(
+        storage: FusionSolarStorage, key: Tuple[str, str], client: FusionSolarClient
+    ) -> None:
+        storage.set_session(get_storage_account(key), client.export_session())
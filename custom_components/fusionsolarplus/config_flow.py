@@ -1,4 +1,5 @@
 import logging
+import os
 from functools import partial
 import voluptuous as vol
 from homeassistant import config_entries
@@ -12,8 +13,18 @@ from custom_components.fusionsolarplus.const import (
     CONF_DEVICE_TYPE,
     CONF_DEVICE_ID,
     CONF_DEVICE_NAME,
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_REALTIME_INTERVAL,
+    CONF_SLOW_INTERVAL,
+    CONF_STATIC_INTERVAL,
+    CONF_CAPTCHA_MODEL,
+    DEFAULT_MAX_UPDATE_INTERVAL,
+    DEFAULT_REALTIME_INTERVAL,
+    DEFAULT_SLOW_INTERVAL,
+    DEFAULT_STATIC_INTERVAL,
 )
 from .api.client import FusionSolarClient
+from .client_pool import ENV_BASE_URL
 from .api.exceptions import (
     AuthenticationException,
     FusionSolarRateLimit,
@@ -75,6 +86,7 @@ class FusionSolarPlusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                         self.password,
                         captcha_model_path=self.hass,
                         huawei_subdomain=self.subdomain,
+                        base_url=os.environ.get(ENV_BASE_URL),
                     )
                 )
             except AuthenticationException as auth_exc:
@@ -333,6 +345,34 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                             self.config_entry.data.get(CONF_INSTALLER),
                         ),
                     ): bool,
+                    vol.Optional(
+                        CONF_MAX_UPDATE_INTERVAL,
+                        default=self.config_entry.options.get(
+                            CONF_MAX_UPDATE_INTERVAL, DEFAULT_MAX_UPDATE_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=15, max=3600)),
+                    vol.Optional(
+                        CONF_REALTIME_INTERVAL,
+                        default=self.config_entry.options.get(
+                            CONF_REALTIME_INTERVAL, DEFAULT_REALTIME_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=15, max=3600)),
+                    vol.Optional(
+                        CONF_SLOW_INTERVAL,
+                        default=self.config_entry.options.get(
+                            CONF_SLOW_INTERVAL, DEFAULT_SLOW_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=60, max=86400)),
+                    vol.Optional(
+                        CONF_STATIC_INTERVAL,
+                        default=self.config_entry.options.get(
+                            CONF_STATIC_INTERVAL, DEFAULT_STATIC_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=3600, max=604800)),
+                    vol.Optional(
+                        CONF_CAPTCHA_MODEL,
+                        default=self.config_entry.options.get(CONF_CAPTCHA_MODEL, ""),
+                    ): str,
                 }
             ),
             description_placeholders={
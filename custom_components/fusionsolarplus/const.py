@@ -9,6 +9,29 @@ CONF_DEVICE_TYPE = "device_type"
 CONF_DEVICE_ID = "device_id"
 CONF_DEVICE_NAME = "device_name"
 
+DEFAULT_SUBDOMAIN = "uni001eu5"
+
+# seconds the poll interval of a device can grow to while its data does not change
+CONF_MAX_UPDATE_INTERVAL = "max_update_interval"
+DEFAULT_MAX_UPDATE_INTERVAL = 300
+
+# seconds between two refreshes of the datasets of every tier (api/datasets.py). The
+# realtime interval is also the shortest poll interval of a device.
+CONF_REALTIME_INTERVAL = "realtime_interval"
+CONF_SLOW_INTERVAL = "slow_interval"
+CONF_STATIC_INTERVAL = "static_interval"
+DEFAULT_REALTIME_INTERVAL = 15
+DEFAULT_SLOW_INTERVAL = 5 * 60
+DEFAULT_STATIC_INTERVAL = 24 * 60 * 60
+
+# path of a CRNN model in the ONNX format that solves the captchas of the logins
+# locally (api/captcha_solver_onnx.py). Without one, captchas are sent to Gradio spaces.
+CONF_CAPTCHA_MODEL = "captcha_model"
+
+# Keys for shared (non entry-specific) objects in hass.data[DOMAIN]
+DATA_CLIENT_POOL = "client_pool"
+DATA_STORAGE = "storage"
+
 # Currency map (33 does not exist fsr)
 CURRENCY_MAP = {
     1: "CNY",
@@ -2,31 +2,108 @@
 
 Design notes for contributors:
 - Each concrete device handler implements only `_async_get_data` and entity creation.
-- Session health and login recovery are centralized here, so device handlers can focus
-  on one responsibility: requesting device payloads.
+  Operations receive the account's `AsyncFusionSolarClient` and await it directly.
+- Handlers declare the tier of every dataset of their payload in `DATASET_TIERS`
+  (`api/datasets.py`) and pass `dataset_intervals` to the API, so slow and static
+  datasets are served from the client's cache between their refreshes. The tier
+  intervals are options of the entry.
+- The coordinator of a handler has no timer of its own. It is updated by the poll
+  cycle of the account (`account_coordinator.py`), together with all other devices
+  of the account, at an interval that grows while the device's data is static.
+- Retries are centralized here, so device handlers can focus on one responsibility:
+  requesting device payloads. Logins are never started from here; the shared client
+  re-logs in by itself, one login per account at a time (`client_pool.py`), and
+  only for an expired session. Errors are retried by their class
+  (`RETRY_POLICIES`, classes in `api/exceptions.py`): transient errors are already
+  retried per request by the client, rate limits pause the account coordinator,
+  invalid credentials, rejected requests and unexpected payloads do not get better by
+  retrying.
+- Requests and retries of an update are attributed to its config entry in the
+  account's client metrics (`api/metrics.py`).
 - Data parsing/normalization should happen in `custom_components/fusionsolarplus/api/*`.
   Sensor entities are expected to consume normalized coordinator payloads.
 """
 
 import asyncio
 import logging
-from datetime import timedelta
-from functools import partial
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .const import DOMAIN
-from .api.client import FusionSolarClient
+from .account_coordinator import is_rate_limited
+from .api.datasets import TIER_REALTIME, TIER_SLOW, TIER_STATIC
+from .api.exceptions import (
+    AuthenticationException,
+    ClientErrorException,
+    FusionSolarRateLimit,
+    LoginCooldownException,
+    PayloadSchemaException,
+    SessionExpiredException,
+    TransientException,
+)
+from .api.metrics import request_source
+from .client_pool import get_client_pool
+from .const import (
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_REALTIME_INTERVAL,
+    CONF_SLOW_INTERVAL,
+    CONF_STATIC_INTERVAL,
+    DEFAULT_MAX_UPDATE_INTERVAL,
+    DEFAULT_REALTIME_INTERVAL,
+    DEFAULT_SLOW_INTERVAL,
+    DEFAULT_STATIC_INTERVAL,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+# seconds to wait before retrying a failed request, multiplied by the attempt number
+RETRY_DELAY = 2
+
+# retries of an update per error class, the first matching class applies
+RETRY_POLICIES: Tuple[Tuple[type, int], ...] = (
+    (LoginCooldownException, 0),
+    (FusionSolarRateLimit, 0),
+    (AuthenticationException, 0),
+    (PayloadSchemaException, 0),
+    (ClientErrorException, 0),
+    # retried per request by the client already
+    (TransientException, 0),
+    # the client logged in again and still got an expired session
+    (SessionExpiredException, 1),
+    (Exception, 2),
+)
+
+
+def get_retries(err: Exception) -> int:
+    """Return how often an update that failed with an error is retried."""
+    if is_rate_limited(err):
+        return 0
+    for error_class, retries in RETRY_POLICIES:
+        if isinstance(err, error_class):
+            return retries
+    return 0
+
+
+def get_tier_intervals(entry: ConfigEntry) -> Dict[str, float]:
+    """Return the refresh interval of every dataset tier configured for an entry."""
+    return {
+        TIER_REALTIME: entry.options.get(
+            CONF_REALTIME_INTERVAL, DEFAULT_REALTIME_INTERVAL
+        ),
+        TIER_SLOW: entry.options.get(CONF_SLOW_INTERVAL, DEFAULT_SLOW_INTERVAL),
+        TIER_STATIC: entry.options.get(CONF_STATIC_INTERVAL, DEFAULT_STATIC_INTERVAL),
+    }
+
 
 class BaseDeviceHandler:
     """Base class that provides resilient API access for device handlers."""
 
+    # dataset name -> tier of the datasets the payload of the device is built from.
+    # Datasets that are not declared are requested on every poll.
+    DATASET_TIERS: Dict[str, str] = {}
+
     def __init__(
         self, hass: HomeAssistant, entry: ConfigEntry, device_info: Dict[str, Any]
     ):
@@ -37,98 +114,95 @@ class BaseDeviceHandler:
         self.device_name = entry.data.get("device_name")
         self.device_type = entry.data.get("device_type")
 
+    @property
+    def dataset_intervals(self) -> Optional[Dict[str, Optional[float]]]:
+        """Refresh interval of every declared dataset, None for realtime datasets
+        as they are requested on every poll."""
+        if not self.DATASET_TIERS:
+            return None
+        tier_intervals = get_tier_intervals(self.entry)
+        return {
+            name: None if tier == TIER_REALTIME else tier_intervals[tier]
+            for name, tier in self.DATASET_TIERS.items()
+        }
+
     async def create_coordinator(self) -> DataUpdateCoordinator:
-        """Create and return a data update coordinator"""
+        """Create and return a data update coordinator, polled by the account"""
         coordinator = DataUpdateCoordinator(
             self.hass,
             _LOGGER,
             name=f"{self.device_name} FusionSolar Data",
-            update_method=self._async_get_data,
-            update_interval=timedelta(seconds=15),
+            update_method=self.async_fetch,
+            update_interval=None,
         )
         await coordinator.async_config_entry_first_refresh()
+        get_client_pool(self.hass).get_account_coordinator(self.entry).register(
+            self.entry.entry_id,
+            self,
+            coordinator,
+            get_tier_intervals(self.entry)[TIER_REALTIME],
+            self.entry.options.get(
+                CONF_MAX_UPDATE_INTERVAL, DEFAULT_MAX_UPDATE_INTERVAL
+            ),
+        )
         return coordinator
 
     async def _get_client_and_retry(self, operation_func):
-        """Execute an API operation with session validation and bounded retries."""
-        client = self.hass.data[DOMAIN][self.entry.entry_id]
-
-        username = self.entry.options.get("username", self.entry.data["username"])
-        password = self.entry.options.get("password", self.entry.data["password"])
-        subdomain = self.entry.options.get(
-            "subdomain", self.entry.data.get("subdomain", "uni001eu5")
-        )
-
-        async def ensure_logged_in(client_instance):
-            try:
-                is_active = await self.hass.async_add_executor_job(
-                    client_instance.is_session_active
-                )
-                if not is_active:
-                    await self.hass.async_add_executor_job(client_instance._login)
-                    is_active = await self.hass.async_add_executor_job(
-                        client_instance.is_session_active
-                    )
-                    if not is_active:
-                        raise Exception("Login completed but session still not active")
-                return True
-            except Exception:
-                return False
-
-        async def create_new_client():
-            new_client = await self.hass.async_add_executor_job(
-                partial(
-                    FusionSolarClient,
-                    username,
-                    password,
-                    captcha_model_path=self.hass,
-                    huawei_subdomain=subdomain,
-                )
-            )
-            if await self.hass.async_add_executor_job(new_client.is_session_active):
-                self.hass.data[DOMAIN][self.entry.entry_id] = new_client
-                return new_client
-            return None
-
-        if not await ensure_logged_in(client):
-            client = await create_new_client()
-
-        max_retries = 2
-        for attempt in range(max_retries + 1):
-            try:
-                response = await operation_func(client)
-                if response is None:
-                    raise Exception("API returned None response")
-                return response
-            except Exception as err:
-                if attempt < max_retries:
-                    recovery_success = False
-                    try:
-                        await self.hass.async_add_executor_job(client._login)
-                        if await self.hass.async_add_executor_job(
-                            client.is_session_active
-                        ):
-                            recovery_success = True
-                    except Exception:
-                        pass
-
-                    if not recovery_success:
-                        try:
-                            client = await create_new_client()
-                            recovery_success = True
-                        except Exception:
-                            pass
-
-                    if recovery_success:
-                        await asyncio.sleep(2)
-                    else:
-                        await asyncio.sleep(1)
-                else:
-                    raise Exception(
-                        f"Error fetching data after {max_retries + 1} attempts: {err}"
+        """Execute an API operation with bounded retries.
+
+        Expired sessions are handled by the client itself: it performs at most one
+        login per account at a time and waits for a cooldown after a failed login.
+        The handler therefore never logs in on its own, it only retries operations
+        as often as the class of their error allows (`RETRY_POLICIES`) and backs off
+        while logins are on hold.
+        """
+        pool = get_client_pool(self.hass)
+        client = pool.get_async_client(self.entry)
+        generation = client.session_generation
+
+        # requests sent from here on are counted for this entry in the client metrics
+        source_token = request_source.set(self.entry.entry_id)
+        attempt = 0
+        try:
+            while True:
+                try:
+                    response = await operation_func(client)
+                    if response is None:
+                        raise Exception("API returned None response")
+                    break
+                except LoginCooldownException as err:
+                    # retrying now would only end up in another login attempt
+                    raise Exception(f"Login on hold: {err}") from err
+                except Exception as err:
+                    if attempt >= get_retries(err):
+                        if attempt == 0:
+                            raise
+                        raise Exception(
+                            f"Error fetching data after {attempt + 1} attempts: {err}"
+                        ) from err
+                    attempt += 1
+                    _LOGGER.debug(
+                        "Request for %s failed with %s, retrying: %s",
+                        self.device_name,
+                        type(err).__name__,
+                        err,
                     )
-
-        raise Exception("Unexpected end of retry loop")
+                    client.metrics.record_update_retry(self.entry.entry_id)
+                    await asyncio.sleep(RETRY_DELAY * attempt)
+        finally:
+            request_source.reset(source_token)
+
+        if client.session_generation != generation:
+            # the client logged in again, keep the new session for the next restart
+            await pool.async_store_session(self.entry)
+        return response
+
+    async def async_fetch(self) -> Dict[str, Any]:
+        """Fetch the current payload of the device.
+
+        Used by the poll cycle of the account and by refreshes of the coordinator.
+        """
+        return await self._async_get_data()
 
     async def _async_get_data(self) -> Dict[str, Any]:
         """Get data from the device."""
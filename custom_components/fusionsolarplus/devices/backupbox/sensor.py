@@ -18,9 +18,7 @@ class BackupBoxDeviceHandler(BaseDeviceHandler):
     async def _async_get_data(self) -> Dict[str, Any]:
         async def fetch_backupbox_data(client):
             # Get real-time data
-            return await self.hass.async_add_executor_job(
-                client.get_backupbox_data, self.device_id
-            )
+            return await client.get_backupbox_data(self.device_id)
 
         return await self._get_client_and_retry(fetch_backupbox_data)
 
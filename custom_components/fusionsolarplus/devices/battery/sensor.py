@@ -9,6 +9,7 @@ from homeassistant.components.sensor import SensorEntity
 from homeassistant.helpers.entity import generate_entity_id, EntityCategory
 from homeassistant.components.sensor import ENTITY_ID_FORMAT
 
+from ...api.datasets import TIER_REALTIME, TIER_STATIC
 from ...device_handler import BaseDeviceHandler
 from .const import (
     BATTERY_STATUS_SIGNALS,
@@ -19,11 +20,15 @@ from .const import (
 class BatteryDeviceHandler(BaseDeviceHandler):
     """Handler for Battery devices"""
 
+    DATASET_TIERS = {
+        "status": TIER_REALTIME,
+        "modules": TIER_REALTIME,
+        "module_info": TIER_STATIC,
+    }
+
     async def _async_get_data(self) -> Dict[str, Any]:
         async def fetch_battery_data(client):
-            return await self.hass.async_add_executor_job(
-                client.get_battery_data, self.device_id
-            )
+            return await client.get_battery_data(self.device_id, self.dataset_intervals)
 
         return await self._get_client_and_retry(fetch_battery_data)
 
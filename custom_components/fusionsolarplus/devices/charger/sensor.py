@@ -8,7 +8,9 @@ from homeassistant.components.sensor import SensorEntity, SensorDeviceClass
 from homeassistant.helpers.entity import generate_entity_id
 from homeassistant.components.sensor import ENTITY_ID_FORMAT
 
+from ...api.datasets import TIER_SLOW
 from ...device_handler import BaseDeviceHandler
+from ...storage import async_get_storage
 from .const import (
     CHARGING_PILE_SIGNALS,
     CHARGER_DEVICE_SIGNALS,
@@ -18,13 +20,27 @@ from .const import (
 class ChargerDeviceHandler(BaseDeviceHandler):
     """Handler for Charger devices"""
 
+    # an offline charger answers with empty data, its dnIds are looked up again at
+    # most once per slow interval
+    DATASET_TIERS = {
+        "dn_ids": TIER_SLOW,
+    }
+
     async def _async_get_data(self) -> Dict[str, Any]:
+        # the dnIds of the charger are kept across restarts, so they only have to be
+        # looked up once instead of on every poll
+        storage = await async_get_storage(self.hass)
+
         async def fetch_charger_data(client):
-            return await self.hass.async_add_executor_job(
-                client.get_charger_data, self.device_id
+            return await client.get_charger_data(
+                self.device_id,
+                storage.get_charger_dn_ids(self.device_id),
+                self.dataset_intervals,
             )
 
-        return await self._get_client_and_retry(fetch_charger_data)
+        data = await self._get_client_and_retry(fetch_charger_data)
+        storage.set_charger_dn_ids(self.device_id, data["dn_ids"])
+        return data
 
     def create_entities(self, coordinator: DataUpdateCoordinator) -> List:
         entities = []
@@ -18,9 +18,7 @@ class EMMADeviceHandler(BaseDeviceHandler):
     async def _async_get_data(self) -> Dict[str, Any]:
         async def fetch_emma_data(client):
             # Get real-time data
-            return await self.hass.async_add_executor_job(
-                client.get_emma_data, self.device_id
-            )
+            return await client.get_emma_data(self.device_id)
 
         return await self._get_client_and_retry(fetch_emma_data)
 
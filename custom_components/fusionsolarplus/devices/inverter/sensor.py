@@ -7,6 +7,7 @@ from homeassistant.components.sensor import SensorEntity, SensorDeviceClass
 from homeassistant.helpers.entity import generate_entity_id, EntityCategory
 from homeassistant.components.sensor import ENTITY_ID_FORMAT
 
+from ...api.datasets import TIER_REALTIME, TIER_SLOW, TIER_STATIC
 from ...device_handler import BaseDeviceHandler
 from .const import (
     INVERTER_SIGNALS,
@@ -18,10 +19,17 @@ from .const import (
 class InverterDeviceHandler(BaseDeviceHandler):
     """Handler for Inverter devices"""
 
+    DATASET_TIERS = {
+        "realtime": TIER_REALTIME,
+        "pv": TIER_REALTIME,
+        "optimizers": TIER_SLOW,
+        "pv_strings": TIER_STATIC,
+    }
+
     async def _async_get_data(self) -> Dict[str, Any]:
         async def fetch_inverter_data(client):
-            return await self.hass.async_add_executor_job(
-                client.get_inverter_data, self.device_id
+            return await client.get_inverter_data(
+                self.device_id, self.dataset_intervals
             )
 
         return await self._get_client_and_retry(fetch_inverter_data)
@@ -12,6 +12,8 @@ from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
 )
 
+from ...account_coordinator import AccountCoordinator
+from ...client_pool import get_client_pool
 from ...device_handler import BaseDeviceHandler
 from ...const import DOMAIN
 
@@ -43,6 +45,7 @@ class InverterSwitchHandler(BaseDeviceHandler):
                 self.device_name,
                 client,
                 password,
+                get_client_pool(self.hass).get_account_coordinator(self.entry),
             )
         ]
 
@@ -59,6 +62,7 @@ class InverterPowerSwitch(CoordinatorEntity, SwitchEntity):
         device_name: str,
         client,
         password: str,
+        account_coordinator: AccountCoordinator,
     ):
         """Initialize the switch."""
         super().__init__(coordinator)
@@ -68,6 +72,7 @@ class InverterPowerSwitch(CoordinatorEntity, SwitchEntity):
         self._device_name = device_name
         self._client = client
         self._password = password
+        self._account_coordinator = account_coordinator
         self._is_on = True  # Default to on, will be updated by is_on property
         self._is_toggling = False
         self._attr_unique_id = f"{device_id}_power_switch"
@@ -144,7 +149,9 @@ class InverterPowerSwitch(CoordinatorEntity, SwitchEntity):
             await asyncio.sleep(30)
             self._is_toggling = False
             self.async_write_ha_state()
-            # Refresh data from the device to get the true state
+            # Refresh data from the device to get the true state, and keep polling it
+            # often while it starts up or shuts down
+            self._account_coordinator.poll_fast(self.coordinator)
             await self.coordinator.async_request_refresh()
 
     async def async_turn_on(self):
@@ -8,6 +8,7 @@ from homeassistant.components.sensor import SensorEntity
 from homeassistant.helpers.entity import generate_entity_id
 from homeassistant.components.sensor import ENTITY_ID_FORMAT
 
+from ...api.datasets import TIER_REALTIME, TIER_SLOW
 from ...device_handler import BaseDeviceHandler
 from .const import PLANT_SIGNALS
 from ...const import CURRENCY_MAP
@@ -16,10 +17,16 @@ from ...const import CURRENCY_MAP
 class PlantDeviceHandler(BaseDeviceHandler):
     """Handler for Plant devices"""
 
+    DATASET_TIERS = {
+        "flow": TIER_REALTIME,
+        "kpi": TIER_SLOW,
+        "energy_balance": TIER_SLOW,
+    }
+
     async def _async_get_data(self) -> Dict[str, Any]:
         async def fetch_plant_data(client):
-            return await self.hass.async_add_executor_job(
-                client.get_current_plant_data, self.device_id
+            return await client.get_current_plant_data(
+                self.device_id, self.dataset_intervals
             )
 
         return await self._get_client_and_retry(fetch_plant_data)
@@ -17,9 +17,7 @@ class PowerSensorDeviceHandler(BaseDeviceHandler):
 
     async def _async_get_data(self) -> Dict[str, Any]:
         async def fetch_power_sensor_data(client):
-            return await self.hass.async_add_executor_job(
-                client.get_powersensor_data, self.device_id
-            )
+            return await client.get_powersensor_data(self.device_id)
 
         return await self._get_client_and_retry(fetch_power_sensor_data)
 
@@ -0,0 +1,51 @@
+"""Diagnostics support for FusionSolar Plus."""
+
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .client_pool import get_client_pool
+from .const import CONF_PASSWORD, CONF_USERNAME, DOMAIN
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    diagnostics: Dict[str, Any] = {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+    }
+
+    coordinator = hass.data.get(DOMAIN, {}).get(f"{entry.entry_id}_coordinator")
+    if coordinator is not None:
+        diagnostics["coordinator"] = {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": coordinator.update_interval.total_seconds()
+            if coordinator.update_interval
+            else None,
+        }
+
+    try:
+        async_client = get_client_pool(hass).get_async_client(entry)
+    except KeyError:
+        return diagnostics
+
+    client = async_client._client
+    diagnostics["session"] = {
+        "age": client.session_age,
+        "generation": client.session_generation,
+    }
+    diagnostics["api"] = client.metrics.snapshot()
+    diagnostics["api"]["coalesced_requests"] = async_client.coalesced_requests
+    diagnostics["response_cache"] = client.response_cache.stats()
+    diagnostics["account_poll"] = (
+        get_client_pool(hass).get_account_coordinator(entry).diagnostics(entry.entry_id)
+    )
+    return diagnostics
@@ -0,0 +1,231 @@
+"""Diagnostic sensors that expose the request metrics of the FusionSolar client.
+
+Every config entry gets the sensors of `METRICS_SENSORS` on its own device, they only
+count the requests of the entry itself. The sensors of `ACCOUNT_METRICS_SENSORS` show
+the metrics of all entries that share the account's client. They exist once per
+account, on an account device, and are added by one of its entries (see
+`ClientPool.register_account_metrics`). The values are read from the client metrics
+whenever the coordinator of the entry updates, they do not cause requests of their own.
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+from homeassistant.components.sensor import (
+    ENTITY_ID_FORMAT,
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import EntityCategory, generate_entity_id
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.entity_registry import async_get as async_get_entity_registry
+from homeassistant.helpers.update_coordinator import (
+    CoordinatorEntity,
+    DataUpdateCoordinator,
+)
+
+from .api.metrics import ClientMetrics
+from .client_pool import get_account_id, get_client_pool
+from .const import DOMAIN
+
+
+def _latency_ms(metrics: ClientMetrics, pct: float) -> Optional[float]:
+    latency = metrics.latency_percentile(pct)
+    return None if latency is None else round(latency * 1000)
+
+
+METRICS_SENSORS: List[Dict[str, Any]] = [
+    {
+        "key": "api_requests_last_hour",
+        "name": "API Requests Last Hour",
+        "unit": "requests",
+        "state_class": SensorStateClass.MEASUREMENT,
+        "value": lambda metrics, entry_id: metrics.requests_last_hour(entry_id),
+        "enabled": True,
+    },
+    {
+        "key": "api_retries",
+        "name": "API Retries",
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "value": lambda metrics, entry_id: metrics.retries(entry_id),
+        "enabled": True,
+    },
+    {
+        "key": "api_update_retries",
+        "name": "API Update Retries",
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "value": lambda metrics, entry_id: metrics.update_retries(entry_id),
+    },
+]
+
+ACCOUNT_METRICS_SENSORS: List[Dict[str, Any]] = [
+    {
+        "key": "account_api_requests_last_hour",
+        "name": "Account API Requests Last Hour",
+        "unit": "requests",
+        "state_class": SensorStateClass.MEASUREMENT,
+        "value": lambda metrics, entry_id: metrics.requests_last_hour(),
+    },
+    {
+        "key": "account_api_latency_p50",
+        "name": "Account API Latency p50",
+        "unit": UnitOfTime.MILLISECONDS,
+        "device_class": SensorDeviceClass.DURATION,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "value": lambda metrics, entry_id: _latency_ms(metrics, 50),
+    },
+    {
+        "key": "account_api_latency_p95",
+        "name": "Account API Latency p95",
+        "unit": UnitOfTime.MILLISECONDS,
+        "device_class": SensorDeviceClass.DURATION,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "value": lambda metrics, entry_id: _latency_ms(metrics, 95),
+    },
+    {
+        "key": "account_api_latency_p99",
+        "name": "Account API Latency p99",
+        "unit": UnitOfTime.MILLISECONDS,
+        "device_class": SensorDeviceClass.DURATION,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "value": lambda metrics, entry_id: _latency_ms(metrics, 99),
+    },
+    {
+        "key": "account_api_errors",
+        "name": "Account API Errors",
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "value": lambda metrics, entry_id: metrics.errors,
+    },
+    {
+        "key": "account_api_data_received",
+        "name": "Account API Data Received",
+        "unit": UnitOfInformation.KILOBYTES,
+        "device_class": SensorDeviceClass.DATA_SIZE,
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "value": lambda metrics, entry_id: round(metrics.bytes_received / 1000),
+    },
+    {
+        "key": "account_logins",
+        "name": "Account Logins",
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "value": lambda metrics, entry_id: metrics.logins,
+    },
+]
+
+
+def create_metrics_entities(
+    entry: ConfigEntry,
+    coordinator: DataUpdateCoordinator,
+    device_info: Dict[str, Any],
+    sensors: List[Dict[str, Any]] = METRICS_SENSORS,
+) -> List:
+    """Create the diagnostic metrics sensors of a config entry."""
+    return [
+        FusionSolarMetricsSensor(
+            coordinator,
+            entry,
+            device_info,
+            key=sensor["key"],
+            name=sensor["name"],
+            value_fn=sensor["value"],
+            unit=sensor.get("unit"),
+            device_class=sensor.get("device_class"),
+            state_class=sensor.get("state_class"),
+            enabled=sensor.get("enabled", False),
+        )
+        for sensor in sensors
+    ]
+
+
+@callback
+def async_register_account_metrics(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: DataUpdateCoordinator,
+    device_info: Dict[str, Any],
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Let the entry add the account-level metrics sensors if no other entry of the
+    account holds them."""
+    pool = get_client_pool(hass)
+    username, subdomain = pool.get_account(entry)
+    account_device_info = {
+        "identifiers": {(DOMAIN, f"account_{get_account_id((username, subdomain))}")},
+        "name": f"FusionSolar account {username}",
+        "manufacturer": "FusionSolar",
+        "model": "Account",
+    }
+    _remove_device_account_metrics(hass, device_info)
+
+    @callback
+    def add() -> None:
+        async_add_entities(
+            create_metrics_entities(
+                entry, coordinator, account_device_info, ACCOUNT_METRICS_SENSORS
+            )
+        )
+
+    pool.register_account_metrics(entry, add)
+
+
+@callback
+def _remove_device_account_metrics(
+    hass: HomeAssistant, device_info: Dict[str, Any]
+) -> None:
+    """Remove the account-level sensors that earlier versions added to every device."""
+    registry = async_get_entity_registry(hass)
+    device_id = list(device_info["identifiers"])[0][1]
+    for sensor in ACCOUNT_METRICS_SENSORS:
+        entity_id = registry.async_get_entity_id(
+            "sensor", DOMAIN, f"{device_id}_{sensor['key']}"
+        )
+        if entity_id is not None:
+            registry.async_remove(entity_id)
+
+
+class FusionSolarMetricsSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor for the request metrics of the FusionSolar client."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        coordinator,
+        entry: ConfigEntry,
+        device_info,
+        key: str,
+        name: str,
+        value_fn: Callable[[ClientMetrics, str], Any],
+        unit=None,
+        device_class=None,
+        state_class=None,
+        enabled: bool = False,
+    ):
+        super().__init__(coordinator)
+        self._entry = entry
+        self._value_fn = value_fn
+        self._attr_name = name
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_info = device_info
+        self._attr_device_class = device_class
+        self._attr_state_class = state_class
+        self._attr_entity_registry_enabled_default = enabled
+
+        device_id = list(device_info["identifiers"])[0][1]
+        self._attr_unique_id = f"{device_id}_{key}"
+        safe_name = name.lower().replace(" ", "_")
+        self.entity_id = generate_entity_id(
+            ENTITY_ID_FORMAT, f"fsp_{device_id}_{safe_name}", hass=coordinator.hass
+        )
+
+    @property
+    def native_value(self):
+        """Return the metric read from the client of the entry's account."""
+        try:
+            client = get_client_pool(self.hass).get_client(self._entry)
+        except KeyError:
+            return None
+        return self._value_fn(client.metrics, self._entry.entry_id)
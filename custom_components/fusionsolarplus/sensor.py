@@ -18,6 +18,7 @@ from .devices.backupbox.sensor import BackupBoxDeviceHandler
 from .devices.emma.sensor import EMMADeviceHandler
 
 from .device_handler import BaseDeviceHandler
+from .metrics_sensor import async_register_account_metrics, create_metrics_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -66,10 +67,14 @@ async def async_setup_entry(
 
     try:
         entities = handler.create_entities(coordinator)
+        entities += create_metrics_entities(entry, coordinator, handler.device_info)
         _LOGGER.info(
             "Adding %d sensor entities for device %s", len(entities), device_name
         )
         async_add_entities(entities)
+        async_register_account_metrics(
+            hass, entry, coordinator, handler.device_info, async_add_entities
+        )
     except Exception as e:
         _LOGGER.error(
             "Failed to set up sensor entities for device %s: %s", device_name, e
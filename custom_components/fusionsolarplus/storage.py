@@ -0,0 +1,76 @@
+"""Persistent storage of data that is expensive to look up again after a restart.
+
+Design notes for contributors:
+- The integration keeps a single `Store` file for all config entries. It is loaded once
+  and kept in `hass.data[DOMAIN]`; use `async_get_storage` to access it.
+- Only data that can be looked up again belongs here. Losing the file must never break
+  a device, it only costs a few extra requests.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DATA_STORAGE, DOMAIN
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.cache"
+
+# delay before changes are written, so several changes end up in one write
+SAVE_DELAY = 10
+
+_LOAD_LOCK = "storage_load_lock"
+
+
+async def async_get_storage(hass: HomeAssistant) -> "FusionSolarStorage":
+    """Return the loaded storage of this Home Assistant instance."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    storage = domain_data.get(DATA_STORAGE)
+    if storage is not None:
+        return storage
+
+    async with domain_data.setdefault(_LOAD_LOCK, asyncio.Lock()):
+        storage = domain_data.get(DATA_STORAGE)
+        if storage is None:
+            storage = FusionSolarStorage(hass)
+            await storage.async_load()
+            domain_data[DATA_STORAGE] = storage
+    return storage
+
+
+class FusionSolarStorage:
+    """Data of the integration that survives a restart of Home Assistant."""
+
+    def __init__(self, hass: HomeAssistant):
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._data: Dict[str, Any] = {}
+
+    async def async_load(self) -> None:
+        self._data = await self._store.async_load() or {}
+
+    def _async_schedule_save(self) -> None:
+        self._store.async_delay_save(lambda: self._data, SAVE_DELAY)
+
+    def get_session(self, account: str) -> Optional[Dict[str, Any]]:
+        """Return the stored FusionSolar session of an account."""
+        return self._data.get("sessions", {}).get(account)
+
+    def set_session(self, account: str, state: Dict[str, Any]) -> None:
+        """Store the FusionSolar session of an account, see `export_session`."""
+        sessions = self._data.setdefault("sessions", {})
+        if sessions.get(account) != state:
+            sessions[account] = state
+            self._async_schedule_save()
+
+    def get_charger_dn_ids(self, device_dn: str) -> Optional[List[str]]:
+        """Return the stored dnIds used to query the realtime data of a charger."""
+        return self._data.get("charger_dn_ids", {}).get(device_dn)
+
+    def set_charger_dn_ids(self, device_dn: str, dn_ids: List[str]) -> None:
+        """Store the dnIds of a charger if they changed."""
+        charger_dn_ids = self._data.setdefault("charger_dn_ids", {})
+        if charger_dn_ids.get(device_dn) != dn_ids:
+            charger_dn_ids[device_dn] = dn_ids
+            self._async_schedule_save()
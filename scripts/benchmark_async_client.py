@@ -0,0 +1,153 @@
+"""Compare the synchronous and the asyncio FusionSolar client.
+
+Every round, `--parallel` simulated coordinators poll the given device at the same
+time, the way Home Assistant does for several config entries. The synchronous client
+is driven through a thread pool of `--executor-threads` workers (like
+`hass.async_add_executor_job`). The asyncio client is awaited directly on the loop.
+
+Reported per client:
+- poll latency (p50 / p95 / max) as seen by the coordinator
+- executor occupancy: the share of the available worker-thread time that was spent
+  blocked in client calls
+
+Credentials are read from the environment:
+    FUSIONSOLAR_USERNAME, FUSIONSOLAR_PASSWORD, FUSIONSOLAR_SUBDOMAIN
+Set FUSIONSOLAR_BASE_URL to benchmark against the stub server (stub_server.py) instead
+of the FusionSolar cloud.
+
+Usage:
+    python scripts/benchmark_async_client.py --device-type inverter --device-dn NE=123
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from custom_components.fusionsolarplus.api.async_client import (  # noqa: E402
+    AsyncFusionSolarClient,
+)
+from custom_components.fusionsolarplus.api.client import FusionSolarClient  # noqa: E402
+
+DEVICE_METHODS = {
+    "plant": "get_current_plant_data",
+    "inverter": "get_inverter_data",
+    "battery": "get_battery_data",
+    "charger": "get_charger_data",
+    "powersensor": "get_powersensor_data",
+    "emma": "get_emma_data",
+    "backupbox": "get_backupbox_data",
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def report(name, latencies, busy_time, wall_time, threads):
+    occupancy = busy_time / (wall_time * threads) * 100
+    print(
+        f"{name:>6}: polls={len(latencies)} "
+        f"p50={percentile(latencies, 50) * 1000:.0f}ms "
+        f"p95={percentile(latencies, 95) * 1000:.0f}ms "
+        f"max={max(latencies) * 1000:.0f}ms "
+        f"mean={statistics.mean(latencies) * 1000:.0f}ms "
+        f"executor occupancy={occupancy:.1f}%"
+    )
+
+
+async def run_sync(client, method, device_dn, rounds, parallel, threads):
+    executor = ThreadPoolExecutor(max_workers=threads)
+    loop = asyncio.get_running_loop()
+    busy = 0.0
+    latencies = []
+
+    def call():
+        nonlocal busy
+        start = time.perf_counter()
+        try:
+            return getattr(client, method)(device_dn)
+        finally:
+            busy += time.perf_counter() - start
+
+    async def poll():
+        start = time.perf_counter()
+        await loop.run_in_executor(executor, call)
+        latencies.append(time.perf_counter() - start)
+
+    wall_start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(poll() for _ in range(parallel)))
+    wall = time.perf_counter() - wall_start
+
+    executor.shutdown()
+    report("sync", latencies, busy, wall, threads)
+
+
+async def run_async(client, method, device_dn, rounds, parallel, threads):
+    latencies = []
+
+    async def poll():
+        start = time.perf_counter()
+        await getattr(client, method)(device_dn)
+        latencies.append(time.perf_counter() - start)
+
+    wall_start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(poll() for _ in range(parallel)))
+    wall = time.perf_counter() - wall_start
+
+    # the asyncio client only uses the executor for logins, which did not happen
+    # during the measurement as the session was already established
+    report("async", latencies, 0.0, wall, threads)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--device-type", choices=DEVICE_METHODS, required=True)
+    parser.add_argument("--device-dn", required=True)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--executor-threads", type=int, default=4)
+    args = parser.parse_args()
+
+    client = FusionSolarClient(
+        os.environ["FUSIONSOLAR_USERNAME"],
+        os.environ["FUSIONSOLAR_PASSWORD"],
+        huawei_subdomain=os.environ.get("FUSIONSOLAR_SUBDOMAIN", "uni001eu5"),
+        base_url=os.environ.get("FUSIONSOLAR_BASE_URL"),
+    )
+    method = DEVICE_METHODS[args.device_type]
+
+    await run_sync(
+        client,
+        method,
+        args.device_dn,
+        args.rounds,
+        args.parallel,
+        args.executor_threads,
+    )
+
+    async with aiohttp.ClientSession(cookie_jar=aiohttp.DummyCookieJar()) as session:
+        async_client = AsyncFusionSolarClient(client, session)
+        await run_async(
+            async_client,
+            method,
+            args.device_dn,
+            args.rounds,
+            args.parallel,
+            args.executor_threads,
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+"""Measure the accuracy and speed of a captcha model for the local solver.
+
+The corpus is a directory of captcha images as returned by the verifycode endpoint,
+named after their solution, e.g. `K4T7N.png` or `K4T7N_2.png` for a second image with
+the same solution.
+
+Reported:
+- time to load (and warm up) the model
+- share of captchas solved correctly, and share of correct characters
+- solve latency (p50 / p95 / max), including the preprocessing of the image
+
+numpy, onnxruntime and Pillow have to be installed, Home Assistant is not needed.
+
+Usage:
+    python scripts/benchmark_captcha_solver.py path/to/corpus --model captcha_huawei.onnx
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+import standalone
+
+standalone.register_package()
+
+from custom_components.fusionsolarplus.api.captcha_solver_onnx import (  # noqa: E402
+    OnnxSolver,
+)
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def load_corpus(directory):
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        stem, extension = os.path.splitext(name)
+        if extension.lower() not in IMAGE_EXTENSIONS:
+            continue
+        with open(os.path.join(directory, name), "rb") as file:
+            corpus.append((stem.split("_")[0].upper(), file.read()))
+    return corpus
+
+
+def matching_characters(expected, actual):
+    return sum(1 for a, b in zip(expected, actual) if a == b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", help="directory with labelled captcha images")
+    parser.add_argument("--model", required=True, help="path of the ONNX model")
+    parser.add_argument(
+        "--provider",
+        action="append",
+        help="ONNX Runtime execution provider, may be given several times",
+    )
+    parser.add_argument(
+        "--show-errors", action="store_true", help="list every wrong solution"
+    )
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        parser.error(f"no captcha images found in {args.corpus}")
+
+    start = time.perf_counter()
+    solver = OnnxSolver(args.model, args.provider)
+    load_time = time.perf_counter() - start
+
+    latencies = []
+    solved = 0
+    characters = 0
+    correct_characters = 0
+    for label, img_bytes in corpus:
+        start = time.perf_counter()
+        result = solver.solve_captcha(img_bytes)
+        latencies.append(time.perf_counter() - start)
+
+        solved += result == label
+        characters += len(label)
+        correct_characters += matching_characters(label, result)
+        if args.show_errors and result != label:
+            print(f"expected {label}, got {result}")
+
+    print(f"model:      {args.model}")
+    print(f"load time:  {load_time * 1000:.0f}ms")
+    print(f"captchas:   {len(corpus)}")
+    print(f"accuracy:   {solved / len(corpus) * 100:.1f}%")
+    print(f"characters: {correct_characters / characters * 100:.1f}%")
+    print(
+        f"latency:    p50={percentile(latencies, 50) * 1000:.1f}ms "
+        f"p95={percentile(latencies, 95) * 1000:.1f}ms "
+        f"max={max(latencies) * 1000:.1f}ms "
+        f"mean={statistics.mean(latencies) * 1000:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Compare the Decimal based float parsing with the decoder in api/json_decoder.py.
+
+Decodes history payloads (device-history-data responses) with both:
+- the previous decoder: json.loads with a parse_float hook that builds a Decimal,
+  compares it with MAX_JS_NUMBER and quantizes it for every float
+- `json_decoder.loads(content, normalize_floats=True)`
+
+Pass recorded responses as files. Without files, a day curve of 288 points for
+`--signals` signals is generated.
+
+Usage:
+    python scripts/benchmark_json_decode.py recorded/history_*.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from custom_components.fusionsolarplus.api import json_decoder  # noqa: E402
+
+
+DEC_PRECISION = Decimal("1.00000000")
+MAX_JS_NUMBER = Decimal("1.7976931348623157E308")
+
+
+def legacy_parse_float(value: str) -> float:
+    try:
+        _d = Decimal(value)
+        if _d == MAX_JS_NUMBER:
+            return 0.0
+        return float(_d.quantize(DEC_PRECISION))
+    except Exception:
+        return 0.0
+
+
+def legacy_decode(content: bytes):
+    """The decoding of history responses used before"""
+    return json.loads(content, parse_float=legacy_parse_float)
+
+
+def decode(content: bytes):
+    return json_decoder.loads(content, normalize_floats=True)
+
+
+def generate_payload(signals: int) -> bytes:
+    points = 288  # one value every 5 minutes
+    data = {}
+    for signal in range(signals):
+        values = [round(random.uniform(0, 10000), 3) for _ in range(points)]
+        values[random.randrange(points)] = json_decoder.MAX_JS_NUMBER
+        data[str(30000 + signal)] = {
+            "name": f"Signal {signal}",
+            "unit": "kW",
+            "pmDataList": [
+                {"counterValue": value, "dataTime": 1700000000000 + i * 300000}
+                for i, value in enumerate(values)
+            ],
+        }
+    return json.dumps({"success": True, "data": data}).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("payloads", nargs="*", help="recorded history responses")
+    parser.add_argument("--signals", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    # replaced MAX_JS_NUMBER sentinels are logged, which would drown the results
+    logging.getLogger(json_decoder.__name__).setLevel(logging.ERROR)
+
+    if args.payloads:
+        payloads = []
+        for path in args.payloads:
+            with open(path, "rb") as file:
+                payloads.append((os.path.basename(path), file.read()))
+    else:
+        payloads = [(f"{args.signals} signals", generate_payload(args.signals))]
+
+    decoder = "orjson" if json_decoder.orjson is not None else "json"
+    print(f"decoder: {decoder}")
+    for name, content in payloads:
+        if legacy_decode(content) != decode(content):
+            print(f"{name}: results differ")
+
+        legacy = min(
+            timeit.repeat(lambda: legacy_decode(content), number=1, repeat=args.repeat)
+        )
+        new = min(timeit.repeat(lambda: decode(content), number=1, repeat=args.repeat))
+        print(
+            f"{name} ({len(content) / 1024:.0f} KiB): "
+            f"Decimal {legacy * 1000:.2f}ms, new {new * 1000:.2f}ms, "
+            f"{legacy / new:.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    main()
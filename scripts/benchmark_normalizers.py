@@ -0,0 +1,379 @@
+"""Benchmark the normalization of the device payloads in api/devices.
+
+The normalizers turn the responses of every poll into the value maps the sensors
+read, so they are the CPU cost of a poll apart from decoding the JSON. Every
+normalizer runs against:
+- synthetic payloads built from the signal definitions of the sensors, scaled up
+  with `--optimizers`, `--pv-strings`, `--battery-packs` and `--plant-nodes`
+  (defaults: 400 optimizers, 20 PV strings, 4 battery modules with 12 packs)
+- recorded responses, if a directory recorded by `api/recording.py` is passed with
+  `--recordings`
+
+Reported is the time of a single call (the best of `--repeat` runs), and its ratio to
+a calibration loop of plain Python work that runs in the same process. The ratios
+hardly depend on the speed of the machine, so they are what baselines store.
+`--save FILE` stores the ratios as a baseline, `--compare FILE` compares them with a
+baseline and reports calls whose ratio grew by more than `--tolerance` (default 50%)
+as regressions (exit code 1). Without `--compare` nothing is checked.
+
+Home Assistant is not needed, the signal definitions are read with `standalone.py`.
+
+Usage:
+    python scripts/benchmark_normalizers.py
+    python scripts/benchmark_normalizers.py --save before.json
+    python scripts/benchmark_normalizers.py --compare before.json
+    python scripts/benchmark_normalizers.py --recordings recordings/3f2a1c9e0b7d
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+
+import standalone  # noqa: E402
+
+standalone.register_package()
+
+from custom_components.fusionsolarplus.api.constants import MODULE_SIGNALS  # noqa: E402
+from custom_components.fusionsolarplus.api.devices import (  # noqa: E402
+    backupbox_api,
+    battery_api,
+    charger_api,
+    emma_api,
+    inverter_api,
+    plant_api,
+    powersensor_api,
+)
+from custom_components.fusionsolarplus.api.recording import (  # noqa: E402
+    SEGMENT_PATTERN,
+)
+
+# signal definitions of the sensors, read without importing Home Assistant
+BACKUPBOX_SIGNALS = standalone.load_signals("backupbox", "BACKUPBOX_SIGNALS")
+BATTERY_STATUS_SIGNALS = standalone.load_signals("battery", "BATTERY_STATUS_SIGNALS")
+CHARGER_DEVICE_SIGNALS = standalone.load_signals("charger", "CHARGER_DEVICE_SIGNALS")
+CHARGING_PILE_SIGNALS = standalone.load_signals("charger", "CHARGING_PILE_SIGNALS")
+EMMA_SIGNALS = standalone.load_signals("emma", "EMMA_SIGNALS")
+INVERTER_SIGNALS = standalone.load_signals("inverter", "INVERTER_SIGNALS")
+OPTIMIZER_METRICS = standalone.load_signals("inverter", "OPTIMIZER_METRICS")
+POWER_SENSOR_SIGNALS = standalone.load_signals("powersensor", "POWER_SENSOR_SIGNALS")
+
+# input of the calibration loop: numbers and placeholders as in the signal values
+CALIBRATION_VALUES = [f"{i * 0.37:.3f}" if i % 5 else "-" for i in range(1000)]
+
+# signals reported by every pack of a battery module (voltages, temperatures, ...)
+PACK_SIGNALS = 16
+
+
+def signal(definition, value_key="value"):
+    """A signal of a realtime response for a signal definition of the sensors."""
+    unit = definition.get("unit")
+    if unit is None:
+        value = random.choice(["Normal", "Running", "-"])
+    else:
+        value = f"{random.uniform(0, 1000):.3f}"
+    return {
+        "id": definition["id"],
+        "name": definition.get("name", ""),
+        "unit": unit or "",
+        value_key: value,
+        "realValue": value,
+        "latestTime": 1700000000000,
+    }
+
+
+def realtime_response(definitions):
+    return {"success": True, "data": [{"signals": [signal(d) for d in definitions]}]}
+
+
+def synthetic_cases(args):
+    """Returns name -> (normalizer, payload arguments) for the synthetic payloads."""
+    pv_signals = {
+        str(11001 + index): {"value": f"{random.uniform(0, 600):.2f}", "unit": "V"}
+        for index in range(args.pv_strings * 3)
+    }
+    optimizers = [
+        {
+            "optName": f"1.{index + 1}",
+            **{
+                metric["name"]: "Normal"
+                if metric.get("unit") is None
+                else f"{random.uniform(0, 400):.2f}"
+                for metric in OPTIMIZER_METRICS
+            },
+        }
+        for index in range(args.optimizers)
+    ]
+    battery_status = realtime_response(BATTERY_STATUS_SIGNALS)["data"][0]["signals"]
+    modules = {}
+    for module_id, signal_ids in MODULE_SIGNALS.items():
+        count = max(len(signal_ids), args.battery_packs * PACK_SIGNALS)
+        ids = list(signal_ids) + [
+            str(230321000 + int(module_id) * 1000 + index)
+            for index in range(count - len(signal_ids))
+        ]
+        modules[module_id] = [
+            {"id": signal_id, "realValue": f"{random.uniform(0, 60):.1f}"}
+            for signal_id in ids
+        ]
+    charger = {
+        "60081": [signal(d) for d in CHARGING_PILE_SIGNALS],
+        "60080": [signal(d) for d in CHARGER_DEVICE_SIGNALS],
+    }
+
+    nodes = [
+        {"id": index, "name": f"node.{index}", "value": index}
+        for index in range(args.plant_nodes)
+    ]
+    nodes += [
+        {"id": 9001, "name": "neteco.pvms.devTypeLangKey.string", "value": "4.2"},
+        {"id": 9002, "name": "neteco.pvms.KPI.kpiView.electricalLoad", "value": "1.1"},
+        {
+            "id": 9003,
+            "name": "neteco.pvms.partials.main.dm.detailInfo.curInfo.grid",
+            "value": "3.1",
+        },
+        {"id": 9004, "name": "neteco.pvms.devTypeLangKey.meter"},
+    ]
+    links = [
+        {"fromNode": 9004, "toNode": 9003, "description": {"value": "3.1 kW"}},
+    ]
+    kpi = {
+        "data": {
+            key: f"{random.uniform(0, 10000):.2f}"
+            for key in (
+                "currentPower",
+                "dailyEnergy",
+                "monthEnergy",
+                "yearEnergy",
+                "cumulativeEnergy",
+                "dailyIncome",
+                "dailyUseEnergy",
+            )
+        }
+    }
+    balance = {
+        "data": {
+            "existMeter": True,
+            "totalSelfUsePower": "12.3",
+            "totalOnGridPower": "4.5",
+            "totalBuyPower": "1.2",
+            "totalUsePower": "13.5",
+            "selfProvide": "12.3",
+            "buyPowerRatio": "8.89",
+            "selfUsePowerRatioByUse": "91.11",
+            "selfUsePowerRatioByProduct": "73.21",
+        }
+    }
+    flow = {"data": {"flow": {"nodes": nodes, "links": links}}}
+
+    return {
+        "inverter values": (
+            inverter_api._extract_inverter_values,
+            (realtime_response(INVERTER_SIGNALS),),
+        ),
+        f"pv values ({args.pv_strings} strings)": (
+            inverter_api._extract_pv_values,
+            ({"signals": pv_signals},),
+        ),
+        f"optimizer values ({args.optimizers} optimizers)": (
+            inverter_api._extract_optimizer_values,
+            (optimizers,),
+        ),
+        f"battery payload (4 modules, {args.battery_packs} packs)": (
+            battery_api._build_battery_payload,
+            (battery_status, modules),
+        ),
+        "charger payload": (
+            charger_api._normalize_charger_payload,
+            (charger, ["1", "2"]),
+        ),
+        "powersensor payload": (
+            powersensor_api._normalize_powersensor_payload,
+            (realtime_response(POWER_SENSOR_SIGNALS),),
+        ),
+        "emma value map": (
+            emma_api._build_value_map,
+            (realtime_response(EMMA_SIGNALS),),
+        ),
+        "backupbox value map": (
+            backupbox_api._build_value_map,
+            (realtime_response(BACKUPBOX_SIGNALS),),
+        ),
+        f"plant data ({len(nodes)} flow nodes)": (
+            plant_api._normalize_plant_data,
+            (kpi, balance, flow),
+        ),
+    }
+
+
+def load_recordings(directory):
+    """Returns the recorded JSON responses of a directory by the last segment of
+    their path."""
+    responses = {}
+    for path in sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN))):
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            try:
+                for line in file:
+                    record = json.loads(line)
+                    if isinstance(record.get("response"), (dict, list)):
+                        endpoint = record["url"].split("?")[0].rsplit("/", 1)[-1]
+                        responses.setdefault(endpoint, []).append(record["response"])
+            except (EOFError, ValueError):
+                pass
+    return responses
+
+
+def recorded_cases(directory):
+    """Returns name -> (normalizer, payload arguments) for recorded responses. Every
+    case normalizes all recorded responses of its endpoint once."""
+    responses = load_recordings(directory)
+    realtime = [r for r in responses.get("device-realtime-data", []) if "data" in r]
+    cases = {}
+
+    def add(name, normalizer, payloads):
+        if payloads:
+            cases[f"recorded {name} (x{len(payloads)})"] = (
+                lambda: [normalizer(*payload) for payload in payloads],
+                (),
+            )
+
+    add(
+        "inverter values",
+        inverter_api._extract_inverter_values,
+        [(r,) for r in realtime],
+    )
+    add(
+        "powersensor payload",
+        powersensor_api._normalize_powersensor_payload,
+        [(r,) for r in realtime],
+    )
+    add("emma value map", emma_api._build_value_map, [(r,) for r in realtime])
+    add(
+        "pv values",
+        inverter_api._extract_pv_values,
+        [(r["data"],) for r in responses.get("device-real-kpi", []) if "data" in r],
+    )
+    add(
+        "optimizer values",
+        inverter_api._extract_optimizer_values,
+        [
+            (r["data"],)
+            for r in responses.get("optimizer-info", [])
+            if isinstance(r.get("data"), list)
+        ],
+    )
+    add(
+        "battery module values",
+        battery_api._signals_to_value_map,
+        [
+            (r["data"], "realValue")
+            for r in responses.get("query-battery-dc", [])
+            if isinstance(r.get("data"), list)
+        ],
+    )
+    add(
+        "charger payload",
+        charger_api._normalize_charger_payload,
+        [(r, ["1", "2"]) for r in responses.get("get-realtime-info", [])],
+    )
+    plant = [
+        responses.get(endpoint, [])
+        for endpoint in ("station-real-kpi", "energy-balance", "energy-flow")
+    ]
+    add(
+        "plant data",
+        plant_api._normalize_plant_data,
+        [
+            payloads
+            for payloads in zip(*plant)
+            if all("data" in payload for payload in payloads)
+        ],
+    )
+    return cases
+
+
+def calibration():
+    """Parses strings and fills a dict like the normalizers do, as a measure of the
+    speed of the interpreter and the machine."""
+    values = {}
+    for index, text in enumerate(CALIBRATION_VALUES):
+        try:
+            values[index] = float(text)
+        except ValueError:
+            values[index] = None
+    return values
+
+
+def measure(normalizer, payload, repeat):
+    timer = timeit.Timer(lambda: normalizer(*payload))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recordings", help="directory recorded by api/recording.py")
+    parser.add_argument("--optimizers", type=int, default=400)
+    parser.add_argument("--pv-strings", type=int, default=20)
+    parser.add_argument("--battery-packs", type=int, default=12)
+    parser.add_argument("--plant-nodes", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--compare", metavar="FILE", help="baseline to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--save", metavar="FILE", help="store the ratios as baseline")
+    args = parser.parse_args()
+
+    random.seed(1)
+    cases = synthetic_cases(args)
+    if args.recordings:
+        cases.update(recorded_cases(args.recordings))
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["ratios"]
+
+    unit = measure(calibration, (), args.repeat)
+    print(f"{'calibration loop':<45} {unit * 1e6:>10.1f}us")
+
+    ratios = {}
+    regressions = 0
+    for name, (normalizer, payload) in cases.items():
+        seconds = measure(normalizer, payload, args.repeat)
+        ratios[name] = round(seconds / unit, 4)
+        line = f"{name:<45} {seconds * 1e6:>10.1f}us  x{ratios[name]:>8.3f}"
+        if name in baseline:
+            change = ratios[name] / baseline[name] - 1
+            line += f"  baseline x{baseline[name]:>8.3f}  {change:+7.1%}"
+            if change > args.tolerance:
+                line += "  REGRESSION"
+                regressions += 1
+        print(line)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": f"{platform.system()} {platform.machine()}",
+                    "ratios": ratios,
+                },
+                file,
+                indent=2,
+            )
+            file.write("\n")
+        print(f"Stored baseline in {args.save}")
+
+    if regressions:
+        print(f"{regressions} normalizers got slower by more than {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
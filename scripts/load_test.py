@@ -0,0 +1,757 @@
+"""Load test of the integration with hundreds of devices in one Home Assistant.
+
+Starts a headless Home Assistant (without frontend and HTTP server) in a temporary
+config directory, and the stub server of `scripts/stub_server.py` as its
+FusionSolar cloud. A config entry is added through the config flow for every
+device of the stub account, and for every account with `--accounts`, so every
+entry runs its coordinator and entities the way it does for users. The size of
+the account is set by the scenario (default: scripts/scenarios/scale.json with
+240 devices), `--limit` caps the number of entries. Transient errors of the stub
+during the setup (see scripts/scenarios/flaky.json) are retried, with backoff.
+
+With `--standalone` no Home Assistant is needed. The devices of every account are
+then polled with the asyncio client directly, one poll cycle per account every
+`--interval` seconds and at most MAX_PARALLEL_FETCHES devices at a time, with the
+dataset intervals the handlers use with the default options. This is the worst
+case of the account coordinators: every device is polled every cycle. It measures
+the client, the normalizers and the event loop, but not the entities.
+
+While the devices poll, every `--report` seconds (default: one poll cycle)
+a line is printed with:
+- loop lag: how late a timer of the event loop fires (mean and max)
+- executor: the most jobs waiting for the executor, and its number of threads
+- CPU: process CPU time of the window, and per coordinator update
+- RSS: resident memory, and its growth since all entries were set up
+- writes/s: state changes per second, which are the state rows the recorder
+  writes (with `--recorder`, the recorder runs on SQLite and its backlog is shown).
+  Standalone, the values of the device payloads that changed since the previous
+  poll are counted instead, an upper bound of the state changes.
+At the end the results are summarized, including the memory growth per hour, and
+written to `--output` as JSON if set. `--tracemalloc` also shows where the memory
+that was allocated while polling went.
+
+An already running stub server can be used with `--base-url`.
+
+Usage:
+    python scripts/load_test.py --duration 600
+    python scripts/load_test.py --accounts 3 --limit 500 --recorder --output load.json
+    python scripts/load_test.py --standalone --duration 300
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from statistics import mean
+
+import aiohttp
+import requests
+
+import standalone
+
+# the api package and const.py do not need Home Assistant, everything else is
+# imported when Home Assistant is started
+standalone.register_package()
+
+from custom_components.fusionsolarplus.const import (  # noqa: E402
+    CONF_DEVICE_NAME,
+    CONF_DEVICE_TYPE,
+    CONF_INSTALLER,
+    CONF_PASSWORD,
+    CONF_SUBDOMAIN,
+    CONF_USERNAME,
+    DEFAULT_SLOW_INTERVAL,
+    DEFAULT_STATIC_INTERVAL,
+    DOMAIN,
+)
+from custom_components.fusionsolarplus.api.exceptions import (  # noqa: E402
+    AuthenticationException,
+    FusionSolarException,
+    TransientException,
+)
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+STUB_SERVER = os.path.join(SCRIPTS, "stub_server.py")
+DEFAULT_SCENARIO = os.path.join(SCRIPTS, "scenarios", "scale.json")
+
+# seconds between two samples of the loop lag and the executor queue
+SAMPLE_INTERVAL = 0.1
+
+# Home Assistant's executor size (homeassistant.runner.MAX_EXECUTOR_WORKERS)
+MAX_EXECUTOR_WORKERS = 64
+
+# as in account_coordinator.py, which needs Home Assistant
+UPDATE_INTERVAL = 15
+MAX_PARALLEL_FETCHES = 4
+
+# the setup retries transient errors of the stub (as of scenarios/flaky.json) with
+# these delays, long enough to outlast an error burst of a scenario
+SETUP_RETRY_DELAYS = (2, 4, 8, 16, 32)
+SETUP_RETRIED = (TransientException, requests.exceptions.RequestException)
+# the login reports an error status of its pages as a FusionSolarException
+LOGIN_RETRIED = (FusionSolarException, requests.exceptions.RequestException)
+
+# device types of get_device_ids -> method of the asyncio client
+STANDALONE_METHODS = {
+    "Inverter": "get_inverter_data",
+    "Charging Pile": "get_charger_data",
+    "Power Sensor": "get_powersensor_data",
+    "EMMA": "get_emma_data",
+    "SmartAssistant": "get_emma_data",
+    "BackupBox": "get_backupbox_data",
+}
+
+# dataset intervals the handlers pass with the default options (DATASET_TIERS)
+STANDALONE_INTERVALS = {
+    "get_current_plant_data": {
+        "flow": None,
+        "kpi": DEFAULT_SLOW_INTERVAL,
+        "energy_balance": DEFAULT_SLOW_INTERVAL,
+    },
+    "get_inverter_data": {
+        "realtime": None,
+        "pv": None,
+        "optimizers": DEFAULT_SLOW_INTERVAL,
+        "pv_strings": DEFAULT_STATIC_INTERVAL,
+    },
+    "get_battery_data": {
+        "status": None,
+        "modules": None,
+        "module_info": DEFAULT_STATIC_INTERVAL,
+    },
+}
+
+CONFIGURATION = """\
+homeassistant:
+  name: FusionSolar load test
+  latitude: 52.37
+  longitude: 4.89
+  elevation: 0
+  unit_system: metric
+  time_zone: UTC
+  country: NL
+logger:
+  default: warning
+"""
+
+RECORDER = """\
+recorder:
+  db_url: sqlite:///{path}
+"""
+
+
+def rss_bytes():
+    """Returns the resident memory of the process."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # the peak instead, in KiB on Linux and in bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+def slope_per_hour(samples):
+    """Returns the least squares slope of (seconds, value) samples per hour."""
+    if len(samples) < 2:
+        return 0.0
+    xs, ys = zip(*samples)
+    x_mean, y_mean = mean(xs), mean(ys)
+    variance = sum((x - x_mean) ** 2 for x in xs)
+    if not variance:
+        return 0.0
+    covariance = sum((x - x_mean) * (y - y_mean) for x, y in samples)
+    return covariance / variance * 3600
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, math.ceil(fraction * len(values)) - 1)]
+
+
+class Probe:
+    """Samples the event loop and the executor, and counts updates and state writes"""
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.lags = []
+        self.queue_depth = 0
+        self.state_writes = 0
+        self.updates = 0
+        self.failed_updates = 0
+        self.unsubscribe = []
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._sample())
+
+    def stop(self):
+        self._task.cancel()
+        for unsubscribe in self.unsubscribe:
+            unsubscribe()
+
+    def reset(self):
+        """Returns the samples since the last reset and starts new ones."""
+        window = {
+            "lags": self.lags,
+            "queue_depth": self.queue_depth,
+            "state_writes": self.state_writes,
+            "updates": self.updates,
+            "failed_updates": self.failed_updates,
+        }
+        self.lags = []
+        self.queue_depth = 0
+        self.state_writes = self.updates = self.failed_updates = 0
+        return window
+
+    def written(self, count=1):
+        self.state_writes += count
+
+    def updated(self, success):
+        self.updates += 1
+        if not success:
+            self.failed_updates += 1
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + SAMPLE_INTERVAL
+            await asyncio.sleep(SAMPLE_INTERVAL)
+            self.lags.append(max(0.0, loop.time() - scheduled))
+            self.queue_depth = max(self.queue_depth, self.executor._work_queue.qsize())
+
+
+def watch_hass(probe, hass):
+    """Counts the state changes and coordinator updates of an instance."""
+    from homeassistant.const import EVENT_STATE_CHANGED
+    from homeassistant.core import callback
+
+    probe.unsubscribe.append(
+        hass.bus.async_listen(
+            EVENT_STATE_CHANGED, callback(lambda event: probe.written())
+        )
+    )
+    for key, coordinator in hass.data.get(DOMAIN, {}).items():
+        if isinstance(key, str) and key.endswith("_coordinator"):
+            probe.unsubscribe.append(
+                coordinator.async_add_listener(
+                    callback(
+                        partial(
+                            lambda c: probe.updated(c.last_update_success),
+                            coordinator,
+                        )
+                    )
+                )
+            )
+
+
+def flatten(value, path=()):
+    """Yields (path, value) for every leaf of a payload."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, (*path, key))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from flatten(item, (*path, index))
+    else:
+        yield path, value
+
+
+class StandaloneAccount:
+    """The devices of a stub account, polled with the asyncio client the way the
+    account coordinator polls them, but without Home Assistant"""
+
+    def __init__(self, client, async_client, devices):
+        self.client = client
+        self.async_client = async_client
+        # (name, method, device id, dataset intervals)
+        self.devices = devices
+        self._values = {}
+        self._semaphore = asyncio.Semaphore(MAX_PARALLEL_FETCHES)
+
+    async def async_poll(self, probe):
+        """Runs one poll cycle."""
+        await asyncio.gather(*(self._poll(probe, *device) for device in self.devices))
+
+    async def async_run(self, probe, interval):
+        loop = asyncio.get_running_loop()
+        next_cycle = loop.time()
+        while True:
+            await self.async_poll(probe)
+            next_cycle += interval
+            await asyncio.sleep(max(0.0, next_cycle - loop.time()))
+
+    async def _poll(self, probe, name, method, device_id, intervals):
+        async with self._semaphore:
+            try:
+                if intervals is None:
+                    data = await getattr(self.async_client, method)(device_id)
+                else:
+                    data = await getattr(self.async_client, method)(
+                        device_id, intervals
+                    )
+            except Exception as err:
+                probe.updated(False)
+                print(f"Failed to poll {name}: {err}")
+                return
+        probe.updated(True)
+        values = dict(flatten(data))
+        previous = self._values.get(name, {})
+        probe.written(sum(1 for k, v in values.items() if previous.get(k, v) != v))
+        self._values[name] = values
+
+
+def write_config(config_dir, recorder):
+    configuration = CONFIGURATION
+    if recorder:
+        path = os.path.join(config_dir, "home-assistant_v2.db")
+        configuration += RECORDER.format(path=path)
+    path = os.path.join(config_dir, "configuration.yaml")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(configuration)
+
+
+async def async_wait_for_stub(base_url, process=None, timeout=30):
+    async with aiohttp.ClientSession() as session:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                async with session.get(f"{base_url}/stub/stats") as response:
+                    return await response.json()
+            except aiohttp.ClientError:
+                if process is not None and process.poll() is not None:
+                    sys.exit("The stub server exited")
+                if time.monotonic() > deadline:
+                    sys.exit(f"No stub server answers at {base_url}")
+                await asyncio.sleep(0.2)
+
+
+async def async_setup_call(func, *args, retry_on=SETUP_RETRIED):
+    """Runs a call of the sync client in the executor, and retries it with
+    SETUP_RETRY_DELAYS while it fails with one of `retry_on`. A failed login is
+    never retried."""
+    loop = asyncio.get_running_loop()
+    for delay in (*SETUP_RETRY_DELAYS, None):
+        try:
+            return await loop.run_in_executor(None, partial(func, *args))
+        except retry_on as err:
+            if delay is None or isinstance(err, AuthenticationException):
+                raise
+            print(f"Retrying the setup in {delay}s: {type(err).__name__}: {err}")
+            await asyncio.sleep(delay)
+
+
+async def async_flow_to_devices(hass, credentials, label):
+    """Runs the config flow up to the device selection and returns its flow id and
+    the offered devices, or None if the account has no devices of the type."""
+    from homeassistant import config_entries
+    from homeassistant.data_entry_flow import FlowResultType
+
+    flow = hass.config_entries.flow
+    result = await flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    # the flow shows an error status of the cloud as an "unknown" error, and the
+    # form again to retry
+    for delay in (*SETUP_RETRY_DELAYS, None):
+        result = await flow.async_configure(result["flow_id"], credentials)
+        if delay is None or result.get("errors") != {"base": "unknown"}:
+            break
+        print(f"Retrying the login of {credentials[CONF_USERNAME]} in {delay}s")
+        await asyncio.sleep(delay)
+    if result["type"] != FlowResultType.FORM or result["step_id"] != "choose_type":
+        raise RuntimeError(f"Login failed: {result.get('errors') or result}")
+    result = await flow.async_configure(result["flow_id"], {CONF_DEVICE_TYPE: label})
+    if result["type"] != FlowResultType.FORM:
+        return None
+    (validator,) = result["data_schema"].schema.values()
+    return result["flow_id"], list(validator.container)
+
+
+async def async_add_entries(hass, accounts, password, limit, parallel):
+    """Adds a config entry for every device of every account through the config
+    flow, `parallel` flows at a time. Returns the number of entries that failed."""
+    from custom_components.fusionsolarplus.config_flow import DEVICE_TYPE_OPTIONS
+
+    semaphore = asyncio.Semaphore(parallel)
+    failed = 0
+
+    async def add(credentials, label, device):
+        nonlocal failed
+        async with semaphore:
+            try:
+                flow_id, _ = await async_flow_to_devices(hass, credentials, label)
+                await hass.config_entries.flow.async_configure(
+                    flow_id, {CONF_DEVICE_NAME: device}
+                )
+            except Exception as err:
+                failed += 1
+                print(f"Failed to add {device}: {err}")
+
+    tasks = []
+    for account in range(accounts):
+        credentials = account_credentials(account, password)
+        for label in DEVICE_TYPE_OPTIONS:
+            found = await async_flow_to_devices(hass, credentials, label)
+            if found is None:
+                continue
+            flow_id, devices = found
+            hass.config_entries.flow.async_abort(flow_id)
+            for device in devices:
+                if limit is not None and len(tasks) >= limit:
+                    break
+                tasks.append(add(credentials, label, device))
+
+    await asyncio.gather(*tasks)
+    return failed
+
+
+def print_window(elapsed, window, cpu, rss, rss_start, recorder):
+    lags = window["lags"]
+    seconds = window["seconds"]
+    line = (
+        f"{elapsed:>7.0f}s  updates {window['updates']:>5} "
+        f"({window['failed_updates']} failed)  "
+        f"loop lag {mean(lags or [0]) * 1000:>6.1f}/{max(lags or [0]) * 1000:>7.1f}ms  "
+        f"executor {window['queue_depth']:>4} queued  "
+        f"CPU {cpu:>6.2f}s ({cpu / seconds:>4.0%})"
+    )
+    if window["updates"]:
+        line += f" {cpu / window['updates'] * 1000:>6.1f}ms/update"
+    line += (
+        f"  RSS {rss / 2**20:>7.1f}MB ({(rss - rss_start) / 2**20:+.1f})"
+        f"  writes {window['state_writes'] / seconds:>7.1f}/s"
+    )
+    if recorder is not None:
+        line += f"  recorder backlog {recorder.backlog}"
+    print(line, flush=True)
+
+
+def account_credentials(account, password):
+    return {
+        CONF_USERNAME: f"loadtest{account + 1}",
+        CONF_PASSWORD: password,
+        CONF_SUBDOMAIN: "uni001eu5",
+        CONF_INSTALLER: False,
+    }
+
+
+async def async_setup_hass(args, config_dir, probe):
+    """Starts Home Assistant and adds the entries. Returns the instance, the setup
+    results and the recorder (if it runs)."""
+    from homeassistant import bootstrap, runner
+
+    write_config(config_dir, args.recorder)
+    hass = await bootstrap.async_setup_hass(
+        runner.RuntimeConfig(config_dir=config_dir, skip_pip=True)
+    )
+    if hass is None:
+        sys.exit("Home Assistant could not be set up")
+    await hass.async_start()
+
+    started = time.monotonic()
+    cpu_started = time.process_time()
+    failed = await async_add_entries(
+        hass, args.accounts, args.password, args.limit, args.parallel
+    )
+    await hass.async_block_till_done()
+    entries = len(hass.config_entries.async_entries(DOMAIN))
+    setup = {
+        "entries": entries,
+        "failed": failed,
+        "entities": len(hass.states.async_entity_ids()),
+        "seconds": round(time.monotonic() - started, 1),
+        "cpu": round(time.process_time() - cpu_started, 2),
+    }
+    print(
+        f"Set up {entries} entries ({failed} failed) with {setup['entities']} "
+        f"entities in {setup['seconds']}s, {setup['cpu']}s CPU"
+    )
+
+    recorder = None
+    if args.recorder:
+        from homeassistant.components.recorder import get_instance
+
+        recorder = get_instance(hass)
+
+    watch_hass(probe, hass)
+    return hass, setup, recorder
+
+
+async def async_setup_standalone(args, base_url, http, probe):
+    """Logs into every account, lists its devices and polls them once. Returns the
+    accounts and the setup results."""
+    from custom_components.fusionsolarplus.api.async_client import (
+        AsyncFusionSolarClient,
+    )
+    from custom_components.fusionsolarplus.api.client import FusionSolarClient
+
+    started = time.monotonic()
+    cpu_started = time.process_time()
+    accounts = []
+    count = 0
+    for account in range(args.accounts):
+        credentials = account_credentials(account, args.password)
+        client = await async_setup_call(
+            partial(
+                FusionSolarClient,
+                credentials[CONF_USERNAME],
+                credentials[CONF_PASSWORD],
+                huawei_subdomain=credentials[CONF_SUBDOMAIN],
+                base_url=base_url,
+            ),
+            retry_on=LOGIN_RETRIED,
+        )
+        devices = []
+        for plant_id in await async_setup_call(client.get_plant_ids):
+            devices.append(
+                (
+                    f"{account}/{plant_id}",
+                    "get_current_plant_data",
+                    plant_id,
+                    STANDALONE_INTERVALS["get_current_plant_data"],
+                )
+            )
+            for battery_id in await async_setup_call(client.get_battery_ids, plant_id):
+                devices.append(
+                    (
+                        f"{account}/{battery_id}",
+                        "get_battery_data",
+                        battery_id,
+                        STANDALONE_INTERVALS["get_battery_data"],
+                    )
+                )
+        for device in await async_setup_call(client.get_device_ids):
+            method = STANDALONE_METHODS.get(device["type"])
+            if method is not None:
+                devices.append(
+                    (
+                        f"{account}/{device['deviceDn']}",
+                        method,
+                        device["deviceDn"],
+                        STANDALONE_INTERVALS.get(method),
+                    )
+                )
+        if args.limit is not None:
+            devices = devices[: max(0, args.limit - count)]
+        count += len(devices)
+        accounts.append(
+            StandaloneAccount(client, AsyncFusionSolarClient(client, http), devices)
+        )
+
+    # the first poll of every device, like the first refresh of an entry
+    await asyncio.gather(*(account.async_poll(probe) for account in accounts))
+    failed = probe.failed_updates
+    probe.reset()
+    setup = {
+        "entries": count,
+        "failed": failed,
+        "entities": None,
+        "seconds": round(time.monotonic() - started, 1),
+        "cpu": round(time.process_time() - cpu_started, 2),
+    }
+    print(
+        f"Set up {count} devices ({failed} failed) of {len(accounts)} accounts "
+        f"in {setup['seconds']}s, {setup['cpu']}s CPU"
+    )
+    return accounts, setup
+
+
+async def async_main(args):
+    executor = ThreadPoolExecutor(
+        max_workers=MAX_EXECUTOR_WORKERS, thread_name_prefix="SyncWorker"
+    )
+    asyncio.get_running_loop().set_default_executor(executor)
+
+    process = None
+    base_url = args.base_url
+    if base_url is None:
+        base_url = f"http://127.0.0.1:{args.port}"
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                STUB_SERVER,
+                "--scenario",
+                args.scenario,
+                "--port",
+                str(args.port),
+            ]
+        )
+    os.environ["FUSIONSOLAR_BASE_URL"] = base_url
+
+    config_dir = tempfile.mkdtemp(prefix="fusionsolar-load-")
+    hass = None
+    http = None
+    poll_tasks = []
+    probe = Probe(executor)
+    try:
+        await async_wait_for_stub(base_url, process)
+        recorder = None
+        if args.standalone:
+            http = aiohttp.ClientSession(cookie_jar=aiohttp.DummyCookieJar())
+            accounts, setup = await async_setup_standalone(args, base_url, http, probe)
+            poll_tasks = [
+                asyncio.create_task(account.async_run(probe, args.interval))
+                for account in accounts
+            ]
+        else:
+            hass, setup, recorder = await async_setup_hass(args, config_dir, probe)
+
+        if args.tracemalloc:
+            tracemalloc.start(10)
+            snapshot = tracemalloc.take_snapshot()
+
+        probe.start()
+        rss_start = rss_bytes()
+        windows = []
+        rss_samples = []
+        started = time.monotonic()
+        while time.monotonic() - started < args.duration:
+            window_started = time.monotonic()
+            cpu_started = time.process_time()
+            await asyncio.sleep(args.report)
+            cpu = time.process_time() - cpu_started
+            elapsed = time.monotonic() - started
+            rss = rss_bytes()
+            window = probe.reset()
+            window["seconds"] = time.monotonic() - window_started
+            print_window(elapsed, window, cpu, rss, rss_start, recorder)
+
+            rss_samples.append((elapsed, rss))
+            lags = window.pop("lags")
+            windows.append(
+                {
+                    **window,
+                    "elapsed": round(elapsed, 1),
+                    "cpu": round(cpu, 3),
+                    "rss": rss,
+                    "lag_mean": mean(lags or [0]),
+                    "lag_p99": percentile(lags, 0.99),
+                    "lag_max": max(lags or [0]),
+                    "recorder_backlog": recorder.backlog if recorder else None,
+                }
+            )
+        probe.stop()
+
+        if args.tracemalloc:
+            top = tracemalloc.take_snapshot().compare_to(snapshot, "lineno")
+            print("Largest memory growth while polling:")
+            for statistic in top[:15]:
+                print(f"  {statistic}")
+            tracemalloc.stop()
+
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{base_url}/stub/stats") as response:
+                stub = await response.json()
+
+        seconds = sum(window["seconds"] for window in windows)
+        updates = sum(window["updates"] for window in windows)
+        cpu = sum(window["cpu"] for window in windows)
+        summary = {
+            "setup": setup,
+            "updates": updates,
+            "failed_updates": sum(window["failed_updates"] for window in windows),
+            "loop_lag_max": max(window["lag_max"] for window in windows),
+            "loop_lag_p99": max(window["lag_p99"] for window in windows),
+            "executor_queue_max": max(window["queue_depth"] for window in windows),
+            "executor_threads": len(executor._threads),
+            "cpu_per_second": cpu / seconds,
+            "cpu_per_update": cpu / updates if updates else None,
+            "rss_start": rss_start,
+            "rss_end": rss_samples[-1][1],
+            # the first window still contains the first polls after the setup
+            "rss_growth_per_hour": slope_per_hour(rss_samples[1:]),
+            "state_writes_per_second": sum(w["state_writes"] for w in windows)
+            / seconds,
+            "stub": stub,
+        }
+        print(
+            f"\n{updates} updates ({summary['failed_updates']} failed) in "
+            f"{seconds:.0f}s, {len(windows)} windows of {args.report}s\n"
+            f"loop lag:  max {summary['loop_lag_max'] * 1000:.1f}ms, "
+            f"p99 {summary['loop_lag_p99'] * 1000:.1f}ms\n"
+            f"executor:  max {summary['executor_queue_max']} queued, "
+            f"{summary['executor_threads']} threads\n"
+            f"CPU:       {summary['cpu_per_second']:.1%} of a core"
+            + (
+                f", {summary['cpu_per_update'] * 1000:.1f}ms per update"
+                if updates
+                else ""
+            )
+            + f"\nmemory:    {rss_start / 2**20:.1f}MB -> "
+            f"{summary['rss_end'] / 2**20:.1f}MB, "
+            f"{summary['rss_growth_per_hour'] / 2**20:+.1f}MB/h\n"
+            f"writes:    {summary['state_writes_per_second']:.1f} state changes/s\n"
+            f"stub:      {sum(stub['requests'].values())} requests, "
+            f"{sum(stub['errors'].values())} errors, {stub['logins']} logins"
+        )
+
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as file:
+                json.dump({"summary": summary, "windows": windows}, file, indent=2)
+                file.write("\n")
+            print(f"Stored the results in {args.output}")
+    finally:
+        for task in poll_tasks:
+            task.cancel()
+        if http is not None:
+            await http.close()
+        if hass is not None:
+            await hass.async_stop()
+        if process is not None:
+            process.terminate()
+            process.wait()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", default=DEFAULT_SCENARIO)
+    parser.add_argument("--base-url", help="use a running stub server")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--accounts", type=int, default=1)
+    parser.add_argument("--password", default="loadtest")
+    parser.add_argument("--limit", type=int, help="at most this many entries")
+    parser.add_argument("--parallel", type=int, default=8, help="concurrent flows")
+    parser.add_argument("--duration", type=float, default=300, help="seconds")
+    parser.add_argument("--report", type=float, default=15, help="seconds")
+    parser.add_argument("--recorder", action="store_true", help="run the recorder")
+    parser.add_argument("--tracemalloc", action="store_true")
+    parser.add_argument(
+        "--standalone",
+        action="store_true",
+        help="poll with the asyncio client, without Home Assistant",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=UPDATE_INTERVAL,
+        help="seconds between poll cycles (standalone)",
+    )
+    parser.add_argument("--output", help="JSON file for the results")
+    args = parser.parse_args()
+    if args.duration < args.report:
+        parser.error("--duration must be at least one --report window")
+    if args.standalone and args.recorder:
+        parser.error("--recorder needs Home Assistant, not --standalone")
+    if not args.standalone:
+        try:
+            import homeassistant  # noqa: F401
+        except ImportError:
+            parser.error("Home Assistant is not installed, use --standalone")
+    asyncio.run(async_main(args))
+
+
+if __name__ == "__main__":
+    main()
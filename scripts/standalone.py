@@ -0,0 +1,70 @@
+"""Access to the integration's code for scripts that run without Home Assistant.
+
+The package `custom_components.fusionsolarplus` sets up the integration in its
+`__init__`, which imports Home Assistant. The FusionSolar API (`api/`) does not need
+Home Assistant, and neither do the benchmarks and the standalone load test.
+
+- `register_package()` registers the package without running its `__init__`, so
+  `custom_components.fusionsolarplus.api` and its modules can be imported in a plain
+  Python environment. Modules outside `api/` still need Home Assistant.
+- `load_signals()` reads a list of signal definitions from a `devices/*/const.py`
+  module. These modules import the sensor enums of Home Assistant, so the plain
+  values of the definitions (id, name, unit, ...) are read from the source instead.
+
+Usage (at the top of a script):
+    import standalone
+    standalone.register_package()
+"""
+
+import ast
+import os
+import sys
+import types
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PACKAGE = "custom_components.fusionsolarplus"
+PACKAGE_DIR = os.path.join(REPO_ROOT, "custom_components", "fusionsolarplus")
+
+
+def register_package() -> None:
+    """Makes the integration's modules importable without running its `__init__`."""
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    if PACKAGE in sys.modules:
+        return
+
+    import custom_components
+
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [PACKAGE_DIR]
+    package.__file__ = os.path.join(PACKAGE_DIR, "__init__.py")
+    sys.modules[PACKAGE] = package
+    custom_components.fusionsolarplus = package
+
+
+def load_signals(device: str, name: str) -> list[dict]:
+    """Returns the signal definitions `name` of `devices/<device>/const.py`.
+
+    Only keys with a literal value are kept, Home Assistant enums such as the device
+    class are left out.
+    """
+    path = os.path.join(PACKAGE_DIR, "devices", device, "const.py")
+    with open(path, encoding="utf-8") as file:
+        tree = ast.parse(file.read(), path)
+
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and any(isinstance(t, ast.Name) and t.id == name for t in node.targets)
+            and isinstance(node.value, ast.List)
+        ):
+            return [
+                {
+                    key.value: value.value
+                    for key, value in zip(element.keys, element.values)
+                    if isinstance(key, ast.Constant) and isinstance(value, ast.Constant)
+                }
+                for element in node.value.elts
+                if isinstance(element, ast.Dict)
+            ]
+    raise LookupError(f"{name} is not a list of signal definitions in {path}")
@@ -0,0 +1,813 @@
+"""Local stand-in for the FusionSolar cloud, for benchmarks and soak tests.
+
+Serves the endpoints the integration uses (login, keep-alive, station and device
+lists, realtime data of plants, inverters, optimizers, batteries, power sensors,
+EMMAs, backup boxes and chargers, and switching a device) with generated data.
+The client is pointed at it with its base URL override:
+
+    FusionSolarClient(..., base_url="http://127.0.0.1:8080")
+    FUSIONSOLAR_BASE_URL=http://127.0.0.1:8080      (Home Assistant, other scripts)
+
+Any subdomain except the INTL ones (intl, la5) can be configured, all of them are
+answered the same way.
+
+The behaviour is scripted with a JSON scenario file, see scripts/scenarios/. All
+keys are optional, the defaults are in DEFAULT_SCENARIO:
+- "plants", "inverters", "optimizers", ...: the size of the account. The device
+  counts are per plant, "optimizers" is per inverter.
+- "latency": seconds every response is delayed: "base" plus up to "jitter", and
+  overrides for the endpoints whose path contains a key of "paths".
+- "session": sessions end "lifetime" seconds after the login, after "idle_timeout"
+  seconds without a request, and all sessions end at the "expire_at" offsets.
+- "captcha": the logins (counted from 1) that demand a captcha, as a list of
+  "logins" and/or "every" n-th login. Any answer to the captcha is accepted.
+- "errors": bursts of error responses. A burst answers requests whose path contains
+  "path" (default: all) with "status" for "duration" seconds from "start", with
+  "probability", and repeats "every" seconds if set.
+All times are seconds since the start of the server.
+
+GET /stub/stats returns the requests, errors, logins and sessions served so far.
+
+Usage:
+    python scripts/stub_server.py --scenario scripts/scenarios/soak.json --port 8080
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import secrets
+import struct
+import time
+import zlib
+from collections import Counter
+from urllib.parse import parse_qsl
+
+from aiohttp import web
+
+DEFAULT_SCENARIO = {
+    "seed": 1,
+    "username": None,
+    "password": None,
+    "plants": 1,
+    "inverters": 1,
+    "optimizers": 0,
+    "pv_strings": 2,
+    "batteries": 1,
+    "battery_modules": 1,
+    "power_sensors": 1,
+    "emmas": 0,
+    "backup_boxes": 0,
+    "chargers": 0,
+    "latency": {"base": 0.05, "jitter": 0.05, "paths": {}},
+    "session": {"lifetime": None, "idle_timeout": 1800, "expire_at": []},
+    "captcha": {"logins": [], "every": 0},
+    "errors": [],
+}
+
+SESSION_COOKIE = "dp-session"
+LOGIN_PAGE = "/unisso/login.action"
+
+# (id, name, unit) of the signals served for every device type. Signals without a
+# unit are states, their value is "Normal".
+INVERTER_SIGNALS = [
+    (10025, "Inverter status", None),
+    (10018, "Active power", "kW"),
+    (10019, "Output reactive power", "kvar"),
+    (10020, "Power factor", ""),
+    (10021, "Grid frequency", "Hz"),
+    (10011, "Phase A voltage", "V"),
+    (10012, "Phase B voltage", "V"),
+    (10013, "Phase C voltage", "V"),
+    (10014, "Grid phase A current", "A"),
+    (10015, "Grid phase B current", "A"),
+    (10016, "Grid phase C current", "A"),
+    (10023, "Internal temperature", "°C"),
+    (10024, "Insulation resistance", "MΩ"),
+    (10032, "Daily energy", "kWh"),
+    (10029, "Cumulative energy", "kWh"),
+]
+BATTERY_SIGNALS = [
+    (10003, "Battery operating status", None),
+    (10008, "Charge/Discharge mode", None),
+    (10013, "Rated capacity", "kWh"),
+    (10015, "Backup time", "min"),
+    (10001, "Energy charged today", "kWh"),
+    (10002, "Energy discharged today", "kWh"),
+    (10004, "Charge/Discharge power", "kW"),
+    (10005, "Bus voltage", "V"),
+    (10006, "SOC", "%"),
+]
+POWER_SENSOR_SIGNALS = [
+    (10001, "Meter status", None),
+    (10004, "Active power", "W"),
+    (10005, "Reactive power", "var"),
+    (10006, "Power factor", ""),
+    (10002, "Phase A voltage", "V"),
+    (10003, "Phase A current", "A"),
+    (10007, "Grid frequency", "Hz"),
+    (10008, "Positive active energy", "kWh"),
+    (10009, "Negative active energy", "kWh"),
+]
+EMMA_SIGNALS = [
+    (11207, "Active power", "kW"),
+    (11208, "Reactive power", "kvar"),
+    (10014, "Power factor", ""),
+    (11204, "Phase A voltage", "V"),
+    (10009, "Phase A current", "A"),
+    (11115, "Forward active energy", "kWh"),
+    (11116, "Reverse active energy", "kWh"),
+]
+BACKUP_BOX_SIGNALS = [
+    (10001, "Status", None),
+    (10007, "Grid A phase voltage", "V"),
+    (10063, "Phase A voltage of backup load", "V"),
+    (10061, "Internal ambient temperature", "°C"),
+]
+CHARGING_PILE_SIGNALS = [
+    (10001, "Charging Connector No.", None),
+    (10004, "Working Status", None),
+    (10003, "Rated Output Power", "kW"),
+    (10013, "Total Output Power", "kW"),
+    (10032, "A Output Current", "A"),
+    (10030, "Expected Charged Energy", "kWh"),
+]
+CHARGER_SIGNALS = [
+    (10001, "Software Version", None),
+    (10002, "Hardware Version", None),
+]
+
+# device type -> (mocTypeName in the device list, realtime signals)
+DEVICE_TYPES = {
+    "inverters": ("Inverter", INVERTER_SIGNALS),
+    "batteries": ("Battery", BATTERY_SIGNALS),
+    "power_sensors": ("Power Sensor", POWER_SENSOR_SIGNALS),
+    "emmas": ("EMMA", EMMA_SIGNALS),
+    "backup_boxes": ("BackupBox", BACKUP_BOX_SIGNALS),
+    "chargers": ("Charging Pile", CHARGING_PILE_SIGNALS),
+}
+
+OPTIMIZER_METRICS = [
+    ("outputPower", 300),
+    ("totalEnergy", 1500),
+    ("inputVoltage", 40),
+    ("outputVoltage", 30),
+    ("inputCurrent", 8),
+    ("temperature", 35),
+]
+
+# voltage and current signal of every PV string, as requested from device-real-kpi
+PV_STRING_SIGNALS = {11001 + 3 * index: index for index in range(20)}
+PV_STRING_SIGNALS.update({11002 + 3 * index: index for index in range(20)})
+
+
+def load_scenario(path):
+    scenario = json.loads(json.dumps(DEFAULT_SCENARIO))
+    if path:
+        with open(path, encoding="utf-8") as file:
+            overrides = json.load(file)
+        for key, value in overrides.items():
+            if isinstance(scenario.get(key), dict) and isinstance(value, dict):
+                scenario[key].update(value)
+            else:
+                scenario[key] = value
+    return scenario
+
+
+def captcha_png(width=160, height=60):
+    """Returns a grey image in the size of a FusionSolar captcha."""
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    rows = b"".join(b"\x00" + bytes([200]) * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+def dumps(data):
+    # FusionSolar sends compact JSON, and the login checks the beginning of the text
+    return json.dumps(data, separators=(",", ":"))
+
+
+class Device:
+    def __init__(self, dn, kind, plant, index):
+        self.dn = dn
+        self.kind = kind
+        self.plant = plant
+        self.index = index
+        self.dn_id = dn.split("=")[1]
+
+
+class Session:
+    def __init__(self, now):
+        self.started = now
+        self.last_seen = now
+        self.roarand = secrets.token_hex(16)
+
+
+class StubServer:
+    """State of the emulated account and the handlers of its endpoints"""
+
+    def __init__(self, scenario):
+        self.scenario = scenario
+        self.rng = random.Random(scenario["seed"])
+        self.started = time.monotonic()
+        self.sessions = {}
+        self.logins = 0
+        self.captcha_pending = False
+        self.captcha_answered = False
+        self.random_vals = set()
+        self.expired_at = 0.0
+        self.requests = Counter()
+        self.errors = Counter()
+
+        self.plants = [f"NE={10000000 + index}" for index in range(scenario["plants"])]
+        self.devices = {}
+        for plant_index, plant in enumerate(self.plants):
+            for kind in DEVICE_TYPES:
+                for index in range(scenario[kind]):
+                    dn = f"NE={20000000 + plant_index * 10000 + len(self.devices)}"
+                    self.devices[dn] = Device(dn, kind, plant, index)
+
+    # scenario
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def latency(self, path):
+        latency = self.scenario["latency"]
+        for key, override in latency.get("paths", {}).items():
+            if key in path:
+                latency = {**latency, **override}
+                break
+        return latency.get("base", 0) + self.rng.uniform(0, latency.get("jitter", 0))
+
+    def error_status(self, path):
+        elapsed = self.elapsed()
+        for burst in self.scenario["errors"]:
+            if burst.get("path", "") not in path:
+                continue
+            offset = elapsed - burst.get("start", 0)
+            if burst.get("every") and offset > 0:
+                offset %= burst["every"]
+            if 0 <= offset < burst.get("duration", 0):
+                if self.rng.random() < burst.get("probability", 1.0):
+                    return burst.get("status", 503)
+        return None
+
+    def demands_captcha(self, login):
+        captcha = self.scenario["captcha"]
+        every = captcha.get("every", 0)
+        return login in captcha.get("logins", []) or bool(every and login % every == 0)
+
+    # sessions
+
+    def is_alive(self, session, now):
+        for offset in self.scenario["session"].get("expire_at", []):
+            if offset <= now:
+                self.expired_at = max(self.expired_at, offset)
+        lifetime = self.scenario["session"].get("lifetime")
+        idle_timeout = self.scenario["session"].get("idle_timeout")
+        return not (
+            session.started < self.expired_at
+            or (lifetime and now - session.started > lifetime)
+            or (idle_timeout and now - session.last_seen > idle_timeout)
+        )
+
+    def session(self, request):
+        token = request.cookies.get(SESSION_COOKIE)
+        session = self.sessions.get(token)
+        if session is None:
+            return None
+
+        now = self.elapsed()
+        if not self.is_alive(session, now):
+            del self.sessions[token]
+            return None
+
+        session.last_seen = now
+        return session
+
+    def require_session(self, request):
+        session = self.session(request)
+        if session is None:
+            raise web.HTTPFound(f"{LOGIN_PAGE}?service={request.path}")
+        return session
+
+    # values
+
+    def value(self, device, signal_id, scale=1.0):
+        """A value that follows the sun, with a bit of noise."""
+        hour = time.localtime().tm_hour + time.localtime().tm_min / 60
+        sun = max(0.0, math.sin(math.pi * (hour - 6) / 12))
+        base = (signal_id % 97 + 3 + int(device.dn_id) % 7) * scale
+        return round(base * (0.2 + sun) * self.rng.uniform(0.95, 1.05), 3)
+
+    def signals(self, device, definitions):
+        now = int(time.time() * 1000)
+        signals = []
+        for signal_id, name, unit in definitions:
+            if unit is None:
+                value = "Normal"
+            else:
+                value = str(self.value(device, signal_id))
+            signals.append(
+                {
+                    "id": signal_id,
+                    "name": name,
+                    "value": value,
+                    "realValue": value,
+                    "unit": unit or "",
+                    "latestTime": now,
+                }
+            )
+        return signals
+
+    def plant_power(self, plant):
+        return round(
+            sum(
+                self.value(device, 10018, 0.05)
+                for device in self.devices.values()
+                if device.plant == plant and device.kind == "inverters"
+            ),
+            3,
+        )
+
+    # login
+
+    async def pubkey(self, request):
+        return web.json_response(
+            {"enableEncrypt": False, "timeStamp": int(time.time() * 1000)},
+            dumps=dumps,
+        )
+
+    async def validate_user(self, request):
+        body = await request.json()
+        self.logins += 1
+
+        expected = self.scenario["username"], self.scenario["password"]
+        if expected[0] is not None and (body.get("username"), body.get("password")) != (
+            expected
+        ):
+            return self.login_error("Incorrect username or password.")
+
+        if self.demands_captcha(self.logins):
+            self.captcha_pending = True
+        if self.captcha_pending:
+            if not (body.get("verifycode") and self.captcha_answered):
+                self.captcha_answered = False
+                return self.login_error("Incorrect verification code.")
+            self.captcha_pending = False
+            self.captcha_answered = False
+
+        # abandoned sessions are dropped, a soak test logs in many times
+        now = self.elapsed()
+        self.sessions = {
+            token: session
+            for token, session in self.sessions.items()
+            if self.is_alive(session, now)
+        }
+        token = secrets.token_hex(16)
+        self.sessions[token] = Session(now)
+        response = web.json_response(
+            {"errorCode": None, "errorMsg": None, "redirectURL": "/"}, dumps=dumps
+        )
+        response.set_cookie(SESSION_COOKIE, token, path="/", httponly=True)
+        return response
+
+    def login_error(self, message):
+        return web.json_response(
+            {"errorCode": "411", "errorMsg": message, "redirectURL": None},
+            dumps=dumps,
+        )
+
+    async def sso_config(self, request):
+        return web.json_response({"showVerifyCode": self.captcha_pending}, dumps=dumps)
+
+    async def verify_code(self, request):
+        return web.Response(body=captcha_png(), content_type="image/png")
+
+    async def pre_valid_verify_code(self, request):
+        form = await request.post()
+        self.captcha_answered = bool(form.get("verifycode"))
+        return web.Response(text="success" if self.captcha_answered else "failed")
+
+    async def login_page(self, request):
+        return web.Response(
+            text="<html><body>Login</body></html>", content_type="text/html"
+        )
+
+    async def logout(self, request):
+        self.sessions.pop(request.cookies.get(SESSION_COOKIE), None)
+        return await self.login_page(request)
+
+    async def keep_alive(self, request):
+        session = self.require_session(request)
+        return web.json_response({"code": 0, "payload": session.roarand}, dumps=dumps)
+
+    async def is_session_alive(self, request):
+        alive = self.session(request) is not None
+        return web.json_response({"code": 0 if alive else 1}, dumps=dumps)
+
+    async def company(self, request):
+        self.require_session(request)
+        return web.json_response(
+            {"data": {"moDn": "NE=1", "name": "Stub company"}, "success": True},
+            dumps=dumps,
+        )
+
+    # plants
+
+    async def station_list(self, request):
+        self.require_session(request)
+        body = await request.json()
+        page, size = int(body.get("curPage", 1)), int(body.get("pageSize", 10))
+        stations = [
+            {"dn": plant, "name": f"Plant {index + 1}", "capacity": 10.0}
+            for index, plant in enumerate(self.plants)
+        ]
+        return web.json_response(
+            {
+                "success": True,
+                "data": {
+                    "list": stations[(page - 1) * size : page * size],
+                    "total": len(stations),
+                },
+            },
+            dumps=dumps,
+        )
+
+    async def total_real_kpi(self, request):
+        self.require_session(request)
+        power = sum(self.plant_power(plant) for plant in self.plants)
+        return web.json_response(
+            {
+                "success": True,
+                "data": {
+                    "currentPower": power,
+                    "dailyEnergy": round(power * 4, 2),
+                    "cumulativeEnergy": round(power * 5000, 2),
+                },
+            },
+            dumps=dumps,
+        )
+
+    async def station_real_kpi(self, request):
+        self.require_session(request)
+        power = self.plant_power(request.query.get("stationDn"))
+        return web.json_response(
+            {
+                "success": True,
+                "data": {
+                    "currentPower": power,
+                    "dailyEnergy": round(power * 4, 2),
+                    "monthEnergy": round(power * 100, 2),
+                    "yearEnergy": round(power * 1200, 2),
+                    "cumulativeEnergy": round(power * 5000, 2),
+                    "dailyIncome": round(power * 0.8, 2),
+                    "dailyUseEnergy": round(power * 3, 2),
+                },
+            },
+            dumps=dumps,
+        )
+
+    async def energy_balance(self, request):
+        self.require_session(request)
+        power = self.plant_power(request.query.get("stationDn"))
+        return web.json_response(
+            {
+                "success": True,
+                "data": {
+                    "existMeter": self.scenario["power_sensors"] > 0,
+                    "existInverter": self.scenario["inverters"] > 0,
+                    "totalSelfUsePower": round(power * 2, 2),
+                    "totalOnGridPower": round(power * 2, 2),
+                    "totalBuyPower": round(power, 2),
+                    "totalUsePower": round(power * 3, 2),
+                    "selfProvide": round(power * 2, 2),
+                    "buyPowerRatio": 33.33,
+                    "selfUsePowerRatioByUse": 66.67,
+                    "selfUsePowerRatioByProduct": 50.0,
+                    "productPower": [],
+                    "usePower": [],
+                },
+            },
+            dumps=dumps,
+        )
+
+    async def energy_flow(self, request):
+        self.require_session(request)
+        plant = request.query.get("stationDn")
+        power = self.plant_power(plant)
+        batteries = [
+            device.dn
+            for device in self.devices.values()
+            if device.plant == plant and device.kind == "batteries"
+        ]
+        nodes = [
+            {"id": 1, "name": "neteco.pvms.devTypeLangKey.string", "value": power},
+            {"id": 2, "name": "neteco.pvms.KPI.kpiView.electricalLoad", "value": 1.5},
+            {
+                "id": 3,
+                "name": "neteco.pvms.partials.main.dm.detailInfo.curInfo.grid",
+                "value": round(abs(power - 1.5), 3),
+            },
+        ]
+        links = [{"fromNode": 1, "toNode": 2, "flowing": "FORWARD"}]
+        if batteries:
+            nodes.append(
+                {
+                    "id": 4,
+                    "name": "neteco.pvms.devTypeLangKey.energy_store",
+                    "value": 0.5,
+                    "devIds": batteries,
+                }
+            )
+            links.append({"fromNode": 1, "toNode": 4, "flowing": "FORWARD"})
+        if self.scenario["power_sensors"]:
+            nodes.append({"id": 5, "name": "neteco.pvms.devTypeLangKey.meter"})
+            grid = power - 1.5
+            links.append(
+                {
+                    "fromNode": 5 if grid > 0 else 3,
+                    "toNode": 3 if grid > 0 else 5,
+                    "flowing": "FORWARD",
+                    "description": {"value": f"{abs(grid):.3f} kW"},
+                }
+            )
+        return web.json_response(
+            {"success": True, "data": {"flow": {"nodes": nodes, "links": links}}},
+            dumps=dumps,
+        )
+
+    # devices
+
+    async def device_list(self, request):
+        self.require_session(request)
+        return web.json_response(
+            {
+                "success": True,
+                "data": [
+                    {
+                        "mocTypeName": DEVICE_TYPES[device.kind][0],
+                        "dn": device.dn,
+                        "name": f"{DEVICE_TYPES[device.kind][0]} {device.index + 1}",
+                        "parentDn": device.plant,
+                    }
+                    for device in self.devices.values()
+                ],
+            },
+            dumps=dumps,
+        )
+
+    async def realtime_data(self, request):
+        self.require_session(request)
+        device = self.devices.get(request.query.get("deviceDn"))
+        if device is None:
+            return web.json_response({"success": False, "data": []}, dumps=dumps)
+
+        signals = self.signals(device, DEVICE_TYPES[device.kind][1])
+        # batteries have their signals in the second group
+        groups = [{"signals": []}, {"signals": signals}]
+        if device.kind != "batteries":
+            groups = groups[1:]
+        return web.json_response({"success": True, "data": groups}, dumps=dumps)
+
+    async def statistics_signal(self, request):
+        self.require_session(request)
+        signal_list = [
+            {"id": 11001 + 3 * index + offset, "name": f"PV{index + 1} {name}"}
+            for index in range(self.scenario["pv_strings"])
+            for offset, name in enumerate(("input voltage", "input current"))
+        ]
+        return web.json_response(
+            {"success": True, "data": {"signalList": signal_list}}, dumps=dumps
+        )
+
+    async def real_kpi(self, request):
+        self.require_session(request)
+        device = self.devices.get(request.query.get("deviceDn"))
+        signals = {}
+        for signal_id in request.query.getall("signalIds", []):
+            index = PV_STRING_SIGNALS.get(int(signal_id))
+            if device is None or index is None or index >= self.scenario["pv_strings"]:
+                continue
+            # voltages of a few hundred volts, currents of a few ampere
+            voltage = (int(signal_id) - 11001) % 3 == 0
+            value = str(self.value(device, int(signal_id), 4.0 if voltage else 0.1))
+            signals[signal_id] = {"value": value, "realValue": value}
+        return web.json_response(
+            {"success": True, "data": {"signals": signals}}, dumps=dumps
+        )
+
+    async def optimizer_info(self, request):
+        self.require_session(request)
+        device = self.devices.get(request.query.get("inverterDn"))
+        if device is None:
+            return web.json_response(
+                {"exceptionType": "ROA_EXFRAME_EXCEPTION"}, dumps=dumps
+            )
+        optimizers = []
+        for index in range(self.scenario["optimizers"]):
+            optimizer = {
+                "optName": f"{device.index + 1}.{index + 1}",
+                "sn": f"STUB{device.dn_id}{index:03d}",
+                "optNumber": index + 1,
+                "runningStatus": "Normal",
+            }
+            for metric, scale in OPTIMIZER_METRICS:
+                optimizer[metric] = str(self.value(device, scale + index, scale / 100))
+            optimizers.append(optimizer)
+        return web.json_response({"success": True, "data": optimizers}, dumps=dumps)
+
+    async def battery_modules(self, request):
+        self.require_session(request)
+        device = self.devices.get(request.query.get("dn"))
+        module = int(request.query.get("moduleId", 1))
+        installed = device is not None and module <= self.scenario["battery_modules"]
+        signals = [
+            {
+                "id": signal_id,
+                "realValue": str(self.value(device, int(signal_id)))
+                if installed
+                else "-",
+            }
+            for signal_id in request.query.get("sigids", "").split(",")
+            if signal_id
+        ]
+        return web.json_response({"success": True, "data": signals}, dumps=dumps)
+
+    # chargers
+
+    def charger(self, dn_id):
+        return next(
+            (
+                device
+                for device in self.devices.values()
+                if device.kind == "chargers" and device.dn_id == dn_id
+            ),
+            None,
+        )
+
+    async def organization_tree(self, request):
+        self.require_session(request)
+        body = await request.json()
+        device = self.devices.get(body.get("parentDn"))
+        children = [{"elementId": f"1{device.dn_id}"}] if device else []
+        return web.json_response({"childList": children}, dumps=dumps)
+
+    async def mo_details(self, request):
+        self.require_session(request)
+        device = self.devices.get(request.query.get("dn"))
+        mo = {"dnId": int(device.dn_id)} if device else {}
+        return web.json_response({"success": True, "data": {"mo": mo}}, dumps=dumps)
+
+    async def charger_realtime(self, request):
+        self.require_session(request)
+        body = await request.json()
+        dn_ids = [str(condition["dnId"]) for condition in body.get("conditions", [])]
+        pile = self.charger(dn_ids[0][1:]) if dn_ids else None
+        charger = self.charger(dn_ids[1]) if len(dn_ids) > 1 else None
+        data = {}
+        if pile is not None:
+            data["60081"] = self.signals(pile, CHARGING_PILE_SIGNALS)
+        if charger is not None:
+            data["60080"] = self.signals(charger, CHARGER_SIGNALS)
+        return web.json_response(data, dumps=dumps)
+
+    # switches
+
+    async def change_pwd(self, request):
+        self.require_session(request)
+        random_val = secrets.token_hex(8)
+        self.random_vals.add(random_val)
+        return web.json_response(
+            {"success": True, "data": {"check": random_val}}, dumps=dumps
+        )
+
+    async def set_signal(self, request):
+        self.require_session(request)
+        form = dict(parse_qsl(await request.text()))
+        accepted = form.get("randomVal") in self.random_vals
+        self.random_vals.discard(form.get("randomVal"))
+        return web.json_response(
+            {"success": accepted, "data": {"dn": form.get("dn")}}, dumps=dumps
+        )
+
+    # stub
+
+    async def stats(self, request):
+        return web.json_response(
+            {
+                "elapsed": round(self.elapsed(), 1),
+                "requests": dict(self.requests),
+                "errors": dict(self.errors),
+                "logins": self.logins,
+                "sessions": len(self.sessions),
+            }
+        )
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        if request.path.startswith("/stub/"):
+            return await handler(request)
+
+        self.requests[request.path] += 1
+        latency = self.latency(request.path)
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+        status = self.error_status(request.path)
+        if status is not None:
+            self.errors[request.path] += 1
+            return web.json_response(
+                {"exceptionId": "stub error", "exceptionType": "ROA_EXFRAME_EXCEPTION"},
+                status=status,
+            )
+        return await handler(request)
+
+    def app(self):
+        app = web.Application(middlewares=[self.middleware])
+        auth = "/rest/dpcloud/auth/v1"
+        station = "/rest/pvms/web/station"
+        device = "/rest/pvms/web/device/v1"
+        app.add_routes(
+            [
+                web.get("/unisso/pubkey", self.pubkey),
+                web.post("/unisso/v2/validateUser.action", self.validate_user),
+                web.get("/unisso/config", self.sso_config),
+                web.get("/unisso/verifycode", self.verify_code),
+                web.post("/unisso/preValidVerifycode", self.pre_valid_verify_code),
+                web.get(LOGIN_PAGE, self.login_page),
+                web.get("/unisess/v1/logout", self.logout),
+                web.get(f"{auth}/keep-alive", self.keep_alive),
+                web.get(f"{auth}/is-session-alive", self.is_session_alive),
+                web.get(
+                    "/rest/neteco/web/organization/v2/company/current", self.company
+                ),
+                web.post(f"{station}/v1/station/station-list", self.station_list),
+                web.get(f"{station}/v1/station/total-real-kpi", self.total_real_kpi),
+                web.get(
+                    f"{station}/v1/overview/station-real-kpi", self.station_real_kpi
+                ),
+                web.get(f"{station}/v3/overview/energy-balance", self.energy_balance),
+                web.get(f"{station}/v1/overview/energy-flow", self.energy_flow),
+                web.get(f"{station}/v3/overview/energy-flow", self.energy_flow),
+                web.get(f"{station}/v1/layout/optimizer-info", self.optimizer_info),
+                web.get(
+                    "/rest/neteco/web/config/device/v1/device-list", self.device_list
+                ),
+                web.get(f"{device}/device-realtime-data", self.realtime_data),
+                web.get(f"{device}/device-statistics-signal", self.statistics_signal),
+                web.get(f"{device}/device-real-kpi", self.real_kpi),
+                web.get(f"{device}/query-battery-dc", self.battery_modules),
+                web.get(f"{device}/mo-details", self.mo_details),
+                web.post("/rest/dp/pvms/organization/v1/tree", self.organization_tree),
+                web.post(
+                    "/rest/neteco/web/homemgr/v1/device/get-realtime-info",
+                    self.charger_realtime,
+                ),
+                web.post(
+                    "/rest/pvms/web/management/v1/config/change_Pwd", self.change_pwd
+                ),
+                web.post(
+                    "/rest/neteco/config/device/v1/config/set-signal-with-randomval",
+                    self.set_signal,
+                ),
+                web.get("/stub/stats", self.stats),
+            ]
+        )
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", help="JSON scenario file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    for key in ("plants", "inverters", "optimizers"):
+        parser.add_argument(f"--{key}", type=int, help=f"overrides {key!r}")
+    args = parser.parse_args()
+
+    scenario = load_scenario(args.scenario)
+    for key in ("plants", "inverters", "optimizers"):
+        if getattr(args, key) is not None:
+            scenario[key] = getattr(args, key)
+
+    server = StubServer(scenario)
+    print(
+        f"Serving {len(server.plants)} plants with {len(server.devices)} devices "
+        f"on http://{args.host}:{args.port}"
+    )
+    web.run_app(server.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""The tests import the FusionSolar API without Home Assistant, see
+`scripts/standalone.py`."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import standalone  # noqa: E402
+
+standalone.register_package()
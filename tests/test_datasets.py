@@ -0,0 +1,24 @@
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from custom_components.fusionsolarplus.api.datasets import DatasetCache
+
+AUCKLAND = ZoneInfo("Pacific/Auckland")
+
+
+def test_daily_dataset_rolls_over_in_time_zone_of_date_provider():
+    # 23:30 in Auckland, the day there ends long before the one in UTC
+    now = datetime(2026, 10, 18, 10, 30, tzinfo=timezone.utc)
+    cache = DatasetCache(today=lambda: now.astimezone(AUCKLAND).date())
+    cache.put("plant", "kpi", {"data": "totals of the 18th"})
+    cache.put("plant", "flow", {"data": "flow"})
+
+    assert cache.fresh("plant", "kpi", 3600, daily=True) == {
+        "data": "totals of the 18th"
+    }
+
+    # 00:30 of the 19th in Auckland, still the 18th in UTC
+    now += timedelta(hours=1)
+    assert now.date().day == 18
+    assert cache.fresh("plant", "kpi", 3600, daily=True) is None
+    assert cache.fresh("plant", "flow", 3600) == {"data": "flow"}
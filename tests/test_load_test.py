@@ -0,0 +1,54 @@
+"""Runs `scripts/load_test.py --standalone` with every bundled scenario for a few
+seconds against the stub server."""
+
+import glob
+import json
+import os
+import socket
+import subprocess
+import sys
+
+import pytest
+
+SCRIPTS = os.path.join(os.path.dirname(__file__), "..", "scripts")
+SCENARIOS = sorted(glob.glob(os.path.join(SCRIPTS, "scenarios", "*.json")))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=os.path.basename)
+def test_scenario_runs(scenario, tmp_path):
+    output = tmp_path / "load.json"
+    process = subprocess.run(
+        [
+            sys.executable,
+            os.path.join(SCRIPTS, "load_test.py"),
+            "--standalone",
+            "--scenario",
+            scenario,
+            "--port",
+            str(free_port()),
+            "--limit",
+            "10",
+            "--duration",
+            "4",
+            "--report",
+            "2",
+            "--interval",
+            "2",
+            "--output",
+            str(output),
+        ],
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    assert process.returncode == 0, process.stdout + process.stderr
+
+    summary = json.loads(output.read_text())["summary"]
+    assert summary["setup"]["entries"] > 0
+    assert summary["stub"]["logins"] >= 1
@@ -0,0 +1,62 @@
+import gzip
+import json
+
+from custom_components.fusionsolarplus.api.recording import (
+    SCRUBBED,
+    TrafficRecorder,
+)
+
+TICKET = "ST-1280514-dE3fGhIjKlMnOpQrStUv-sso"
+
+# response of unisso/v3/validateUser.action for an account in another region
+LOGIN_RESPONSE = {
+    "errorCode": "470",
+    "errorMsg": None,
+    "respMultiRegionName": [
+        "-5",
+        f"/rest/dp/uidm/auth/v1/on-sso-credential-ready?ticket={TICKET}"
+        "&regionName=region001",
+    ],
+    "serviceUrl": "https://region01eu5.fusionsolar.huawei.com/unisess/v1/auth"
+    f"?service=%2Fnetecowebext%2Fhome%2Findex.html%3Fticket%3D{TICKET}",
+    "verifyCodeCreate": False,
+}
+
+
+def test_scrubs_tickets_in_login_response(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path))
+    recorder.record(
+        "POST",
+        "https://eu5.fusionsolar.huawei.com/unisso/v3/validateUser.action"
+        "?timeStamp=1700000000000&nonce=abc",
+        json.dumps({"username": "owner@example.com", "password": "secret"}),
+        200,
+        {
+            "Content-Type": "application/json",
+            "Location": "https://region01eu5.fusionsolar.huawei.com/unisess/v1/auth"
+            f"?ticket={TICKET}",
+            "Set-Cookie": "JSESSIONID=abc",
+        },
+        json.dumps(LOGIN_RESPONSE).encode(),
+        0.1,
+    )
+    recorder.close()
+
+    (path,) = tmp_path.glob("traffic-*.jsonl.gz")
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        line = file.read()
+    assert TICKET not in line
+    assert "owner@example.com" not in line
+    assert "secret" not in line
+
+    exchange = json.loads(line)
+    assert exchange["response"]["respMultiRegionName"] == [
+        "-5",
+        f"/rest/dp/uidm/auth/v1/on-sso-credential-ready?ticket={SCRUBBED}"
+        "&regionName=region001",
+    ]
+    assert exchange["response"]["errorCode"] == "470"
+    assert exchange["response"]["serviceUrl"].startswith(
+        "https://region01eu5.fusionsolar.huawei.com/unisess/v1/auth?service="
+    )
+    assert "nonce=abc" in exchange["url"]